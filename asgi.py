@@ -0,0 +1,168 @@
+"""
+ASGI entry point serving the same URL surface as main.py.
+
+    uvicorn asgi:app --workers 4
+
+The event loop owns the client connections: it reads request bodies, writes responses and
+waits on slow clients. The Flask views, and with them all SQLite work, run on a bounded
+thread pool. A thread is only busy while a view runs or the next part of a streamed
+response is produced, never while a client uploads slowly or reads a stream slowly. So
+many concurrent streaming clients can stay connected cheaply.
+"""
+import asyncio
+import contextvars
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from main import create_app
+
+# Threads running views and SQLite work, per process
+ASGI_EXECUTOR_THREADS = int(os.environ.get("ASGI_EXECUTOR_THREADS", 16))
+# Request bodies up to this many bytes stay in memory; larger ones are spooled to disk
+ASGI_BODY_IN_MEMORY = int(os.environ.get("ASGI_BODY_IN_MEMORY", 1024 * 1024))
+# Bytes of a streamed response produced per trip to the thread pool
+ASGI_STREAM_CHUNK = 64 * 1024
+
+
+class WSGIBridge:
+    def __init__(self, wsgi_app, max_workers=ASGI_EXECUTOR_THREADS):
+        self.wsgi_app = wsgi_app
+        self.max_workers = max_workers
+        self.executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    def _get_executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="asgi")
+        return self.executor
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._get_executor()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.executor is not None:
+                    self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive):
+        body = tempfile.SpooledTemporaryFile(max_size=ASGI_BODY_IN_MEMORY)
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                body.close()
+                return None
+            body.write(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body.seek(0)
+        return body
+
+    async def _http(self, scope, receive, send):
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        environ = _environ(scope, body)
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+            return lambda data: None
+
+        # Each request keeps one context across the threads its view and stream run on, so
+        # context variables set by Flask (e.g. in stream_with_context) stay consistent
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        disconnected = asyncio.Event()
+        watcher = None
+        try:
+            iterable = await loop.run_in_executor(executor, context.run, self.wsgi_app, environ, start_response)
+            try:
+                iterator = iter(iterable)
+                chunk, done = await loop.run_in_executor(executor, context.run, _next_chunk, iterator)
+                await send({"type": "http.response.start", "status": response["status"], "headers": response["headers"]})
+                watcher = asyncio.ensure_future(_wait_for_disconnect(receive, disconnected))
+                while not done and not disconnected.is_set():
+                    if chunk:
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    chunk, done = await loop.run_in_executor(executor, context.run, _next_chunk, iterator)
+                if not disconnected.is_set():
+                    await send({"type": "http.response.body", "body": chunk, "more_body": False})
+            finally:
+                close = getattr(iterable, "close", None)
+                if close is not None:
+                    await loop.run_in_executor(executor, context.run, close)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            body.close()
+
+
+# Pull up to ASGI_STREAM_CHUNK bytes from a WSGI response; returns (bytes, finished)
+def _next_chunk(iterator):
+    parts = []
+    size = 0
+    for part in iterator:
+        if part:
+            parts.append(part)
+            size += len(part)
+            if size >= ASGI_STREAM_CHUNK:
+                return b"".join(parts), False
+    return b"".join(parts), True
+
+
+async def _wait_for_disconnect(receive, disconnected):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            disconnected.set()
+            return
+
+
+def _environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        # WSGI carries the raw path bytes as latin-1
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "CONTENT_LENGTH": str(body.seek(0, os.SEEK_END)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    body.seek(0)
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+app = WSGIBridge(create_app())
@@ -0,0 +1,67 @@
+"""
+Latency of dropping and renaming a column, in place vs by rebuilding the table.
+
+Usage:
+    python -m benchmarks.bench_alter [rows]
+"""
+import sys
+import time
+from benchmarks.common import scratch_workdir
+
+DEFAULT_ROWS = 1000000
+
+
+def _seed(db_name, table_name, rows):
+    from schema.connection import get_connection
+    from schema.db_utils import create_table
+
+    create_table(db_name, table_name, [
+        {"name": "name", "type": "TEXT"},
+        {"name": "email", "type": "TEXT"},
+        {"name": "age", "type": "INTEGER"},
+        {"name": "notes", "type": "TEXT"},
+    ])
+    with get_connection(db_name) as conn:
+        conn.execute(f"CREATE INDEX {table_name}_email ON {table_name}(email)")
+        conn.executemany(
+            f"INSERT INTO {table_name} (name, email, age, notes) VALUES (?, ?, ?, ?)",
+            ((f"user{i}", f"user{i}@example.com", i % 90, "x" * 40) for i in range(rows)),
+        )
+        conn.commit()
+
+
+def run(rows=DEFAULT_ROWS):
+    with scratch_workdir():
+        import schema.db_utils as db_utils
+
+        db_utils.create_db("bench")
+        report = []
+        for native in (True, False):
+            table_name = "native" if native else "rebuild"
+            _seed("bench", table_name, rows)
+            db_utils.SUPPORTS_DROP_COLUMN = db_utils.SUPPORTS_RENAME_COLUMN = native
+
+            start = time.perf_counter()
+            result = db_utils.alter_table_remove_column("bench", table_name, "notes")
+            drop_seconds = time.perf_counter() - start
+            assert "message" in result, result
+
+            start = time.perf_counter()
+            result = db_utils.rename_column("bench", table_name, "age", "years")
+            rename_seconds = time.perf_counter() - start
+            assert "message" in result, result
+
+            report.append({
+                "mode": "in-place" if native else "rebuild",
+                "rows": rows,
+                "drop_column_seconds": round(drop_seconds, 3),
+                "rename_column_seconds": round(rename_seconds, 3),
+            })
+        return report
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    for result in run(rows):
+        print(f"{result['mode']:>9}  {result['rows']} rows  drop {result['drop_column_seconds']:>7.3f}s  "
+              f"rename {result['rename_column_seconds']:>7.3f}s")
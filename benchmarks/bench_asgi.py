@@ -0,0 +1,95 @@
+"""
+WSGI (gunicorn, main.py) against ASGI (uvicorn, asgi.py) with many slow streaming clients.
+
+For each server, with the same number of worker processes and threads, a table is seeded
+and --stream-clients clients stream it as NDJSON while reading slowly. Meanwhile a probe
+sends GET-by-id requests and measures their latency. On the WSGI server every open
+stream holds a worker thread, so probes queue behind the streams. On the ASGI server
+the threads are only busy while rows are being produced.
+
+Usage:
+    python -m benchmarks.bench_asgi [--workers 2] [--threads 4] [--stream-clients 100] [--read-delay 10]
+"""
+import argparse
+import http.client
+import random
+import threading
+import time
+from types import SimpleNamespace
+from benchmarks.common import percentile
+from benchmarks.suite import DB_NAME, serving, seed, run_scenario, _by_id_requests
+
+READ_SIZE = 16 * 1024
+
+
+def slow_stream(client, delay, results):
+    started = time.perf_counter()
+    try:
+        conn = http.client.HTTPConnection(client.host, client.port, timeout=300)
+        conn.request("GET", f"/{DB_NAME}/items?stream=ndjson")
+        response = conn.getresponse()
+        received = 0
+        while True:
+            chunk = response.read(READ_SIZE)
+            if not chunk:
+                break
+            received += len(chunk)
+            time.sleep(delay)
+        conn.close()
+        results.append((time.perf_counter() - started, response.status == 200 and received > 0))
+    except (OSError, http.client.HTTPException):
+        results.append((time.perf_counter() - started, False))
+
+
+def run_server(server, options):
+    with serving(options.workers, options.threads, server) as client:
+        seed(client, SimpleNamespace(rows=options.rows, requests=1))
+        streams = []
+        threads = [
+            threading.Thread(target=slow_stream, args=(client, options.read_delay / 1000, streams))
+            for _ in range(options.stream_clients)
+        ]
+        for thread in threads:
+            thread.start()
+        # Let the streams take their seats before probing
+        time.sleep(0.5)
+        probes = _by_id_requests(random.Random(options.seed), SimpleNamespace(rows=options.rows, requests=options.requests))
+        probe = run_scenario(client, probes, options.probe_concurrency)
+        for thread in threads:
+            thread.join()
+
+    durations = sorted(duration for duration, _ in streams)
+    return {
+        "probe": probe,
+        "streams": {
+            "clients": len(streams),
+            "failed": sum(1 for _, ok in streams if not ok),
+            "p50_seconds": round(percentile(durations, 50), 3),
+            "max_seconds": round(durations[-1], 3) if durations else 0.0,
+        },
+    }
+
+
+def run(options):
+    return {server: run_server(server, options) for server in ("wsgi", "asgi")}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_asgi")
+    parser.add_argument("--workers", type=int, default=2, help="server processes")
+    parser.add_argument("--threads", type=int, default=4, help="threads per process (gunicorn threads / ASGI executor threads)")
+    parser.add_argument("--rows", type=int, default=10000, help="rows of the streamed table")
+    parser.add_argument("--stream-clients", type=int, default=100, help="concurrent slow streaming clients")
+    parser.add_argument("--read-delay", type=float, default=10, help="milliseconds a streaming client sleeps between 16 KiB reads")
+    parser.add_argument("--requests", type=int, default=200, help="GET-by-id probes")
+    parser.add_argument("--probe-concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    results = run(parser.parse_args())
+
+    print(f"{'server':<6} {'probe req/s':>12} {'p50 ms':>9} {'p99 ms':>10} {'streams':>8} {'failed':>7} {'stream p50 s':>13} {'stream max s':>13}")
+    for server, result in results.items():
+        probe, streams = result["probe"], result["streams"]
+        print(
+            f"{server:<6} {probe['throughput_rps']:>12.1f} {probe['latency_ms']['p50']:>9.2f} {probe['latency_ms']['p99']:>10.2f} "
+            f"{streams['clients']:>8} {streams['failed']:>7} {streams['p50_seconds']:>13.3f} {streams['max_seconds']:>13.3f}"
+        )
@@ -0,0 +1,64 @@
+"""
+Write throughput with and without the write coordinator (group commit).
+
+Runs the suite's single-row write scenarios twice, each in a fresh interpreter since
+WRITE_COORDINATOR is read at import: once with every request committing on its own and
+once with writes queued to the per-database writer thread.
+
+Usage:
+    python -m benchmarks.bench_group_commit [--requests 2000] [--concurrency 32] [--synchronous FULL]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from benchmarks.common import REPO_ROOT
+
+SCENARIOS = "insert,update,delete"
+
+
+def run_mode(coordinator, options, profile_file):
+    with tempfile.NamedTemporaryFile(suffix=".json") as output:
+        env = dict(os.environ, WRITE_COORDINATOR="true" if coordinator else "false")
+        if profile_file:
+            env["DB_PROFILE_FILE"] = profile_file
+        subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.suite", "--scenarios", SCENARIOS, "--insert-batch", "1",
+                "--rows", "1000", "--requests", str(options.requests), "--concurrency", str(options.concurrency),
+                "--output", output.name,
+            ],
+            cwd=REPO_ROOT, env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+        return json.load(open(output.name))["scenarios"]
+
+
+def run(options):
+    profile_file = None
+    if options.synchronous:
+        # Profiles are read from DB_PROFILE_FILE, so an absolute path reaches the suite's scratch folder
+        handle, profile_file = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, "w") as f:
+            json.dump({"default": {"synchronous": options.synchronous}, "databases": {}}, f)
+    try:
+        return {mode: run_mode(mode == "group_commit", options, profile_file) for mode in ("per_request", "group_commit")}
+    finally:
+        if profile_file:
+            os.remove(profile_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_group_commit")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--synchronous", choices=["OFF", "NORMAL", "FULL", "EXTRA"], help="synchronous setting of the databases")
+    results = run(parser.parse_args())
+    print(f"{'scenario':<10} {'per request':>14} {'group commit':>14} {'speedup':>8} {'errors':>8}")
+    for name in results["per_request"]:
+        before, after = results["per_request"][name], results["group_commit"][name]
+        print(
+            f"{name:<10} {before['throughput_rps']:>10.1f} r/s {after['throughput_rps']:>10.1f} r/s "
+            f"{after['throughput_rps'] / before['throughput_rps']:>7.2f}x {before['errors']:>3}/{after['errors']:<3}"
+        )
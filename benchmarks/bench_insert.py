@@ -0,0 +1,37 @@
+"""
+Throughput of bulk POST /<db>/<table> for growing payloads.
+
+Usage:
+    python -m benchmarks.bench_insert [sizes...]
+"""
+import sys
+from benchmarks.common import scratch_workdir, make_rows, timed
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def run(sizes=DEFAULT_SIZES):
+    with scratch_workdir():
+        from main import app
+
+        client = app.test_client()
+        client.post("/db/", json={"name": "bench"})
+        report = []
+        for size in sizes:
+            rows = make_rows(size)
+            timings = {}
+            with timed(timings, "seconds"):
+                response = client.post(f"/bench/insert_{size}", json={"data": rows})
+            assert response.status_code == 200, response.json
+            report.append({
+                "rows": size,
+                "seconds": round(timings["seconds"], 4),
+                "rows_per_second": round(size / timings["seconds"]),
+            })
+        return report
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for result in run(sizes):
+        print(f"{result['rows']:>8} rows  {result['seconds']:>8.3f}s  {result['rows_per_second']:>10} rows/s")
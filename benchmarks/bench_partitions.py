@@ -0,0 +1,82 @@
+"""
+A plain table against a hash-partitioned one under concurrent writers.
+
+A gunicorn server (gunicorn.conf.py) is started with --workers processes. Two tables get
+the same traffic: "plain", a regular table, and "sharded", split into --partitions
+partition files by id. Inserts into the plain table all wait for the one write lock of
+its database; inserts into the sharded table are spread over the partitions' locks.
+Reads by id and sorted pages of the list are measured as well.
+
+Usage:
+    python -m benchmarks.bench_partitions [--workers 4] [--partitions 4] [--requests 2000] [--concurrency 32]
+"""
+import argparse
+import random
+from benchmarks.common import make_rows
+from benchmarks.suite import DB_NAME, ITEM_COLUMNS, serving, run_scenario, _json
+
+TABLES = ("plain", "sharded")
+
+
+def requests_for(table_name, options):
+    rng = random.Random(options.seed)
+    rows = options.rows
+    return {
+        "insert": [
+            ("POST", f"/{DB_NAME}/{table_name}", *_json({"data": make_rows(options.insert_batch, start=i)}))
+            for i in range(options.requests)
+        ],
+        # Ids of the seeded rows; partitioned ids are not dense, so some probes miss
+        "by_id": [("GET", f"/{DB_NAME}/{table_name}/{rng.randint(1, rows)}", None, None) for _ in range(options.requests)],
+        "list": [
+            ("GET", f"/{DB_NAME}/{table_name}?orderby=age&limit=20&start={rng.randint(0, 200)}", None, None)
+            for _ in range(options.requests)
+        ],
+    }
+
+
+def seed(client, options):
+    client.request("DELETE", f"/db/{DB_NAME}", *_json({}))
+    client.request("POST", "/db/", *_json({"name": DB_NAME}))
+    for table_name in TABLES:
+        payload = {"columns": [dict(column) for column in ITEM_COLUMNS]}
+        if table_name == "sharded":
+            payload["partitions"] = options.partitions
+        status = client.request("POST", f"/db/{DB_NAME}/{table_name}", *_json(payload))
+        assert status < 400, f"Could not create table {table_name} (HTTP {status})"
+        for start in range(0, options.rows, 5000):
+            client.request("POST", f"/{DB_NAME}/{table_name}", *_json({"data": make_rows(min(5000, options.rows - start), start=start)}))
+
+
+def run(options):
+    results = {}
+    with serving(options.workers, options.threads) as client:
+        seed(client, options)
+        for table_name in TABLES:
+            results[table_name] = {
+                name: run_scenario(client, requests, options.concurrency)
+                for name, requests in requests_for(table_name, options).items()
+            }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_partitions")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="threads per worker")
+    parser.add_argument("--partitions", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=10000, help="rows seeded into each table")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario and table")
+    parser.add_argument("--insert-batch", type=int, default=1, help="rows per insert request")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    results = run(parser.parse_args())
+
+    print(f"{'scenario':<8} {'plain':>14} {'sharded':>14} {'speedup':>8} {'p95 plain':>10} {'p95 sharded':>12}")
+    for name in results["plain"]:
+        plain, sharded = results["plain"][name], results["sharded"][name]
+        print(
+            f"{name:<8} {plain['throughput_rps']:>10.1f} r/s {sharded['throughput_rps']:>10.1f} r/s "
+            f"{sharded['throughput_rps'] / plain['throughput_rps']:>7.2f}x "
+            f"{plain['latency_ms']['p95']:>10.2f} {sharded['latency_ms']['p95']:>12.2f}"
+        )
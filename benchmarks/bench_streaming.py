@@ -0,0 +1,83 @@
+"""
+Peak RSS and time-to-first-byte of a full table read, buffered vs streamed.
+
+Each mode runs in a fresh interpreter so peak RSS is not shared between them.
+
+Usage:
+    python -m benchmarks.bench_streaming [rows]
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from benchmarks.common import REPO_ROOT, scratch_workdir, make_rows
+
+DEFAULT_ROWS = 200000
+MODES = {
+    "buffered": "/bench/events?limit={rows}",
+    "ndjson": "/bench/events?stream=ndjson",
+    "json": "/bench/events?stream=json",
+}
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def worker(mode, workdir, rows):
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+    from main import app
+
+    client = app.test_client()
+    baseline_rss = _peak_rss_mb()
+    start = time.perf_counter()
+    response = client.get(MODES[mode].format(rows=rows), buffered=False)
+    received = 0
+    first_byte = None
+    for chunk in response.response:
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        received += len(chunk)
+    response.close()
+    total = time.perf_counter() - start
+    print(json.dumps({
+        "mode": mode,
+        "ttfb_seconds": round(first_byte, 4),
+        "total_seconds": round(total, 4),
+        "bytes": received,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rss_growth_mb": round(_peak_rss_mb() - baseline_rss, 1),
+    }))
+
+
+def run(rows=DEFAULT_ROWS):
+    with scratch_workdir() as workdir:
+        from main import app
+
+        client = app.test_client()
+        client.post("/db/", json={"name": "bench"})
+        for offset in range(0, rows, 50000):
+            client.post("/bench/events", json={"data": make_rows(min(50000, rows - offset), offset)})
+
+        report = []
+        for mode in MODES:
+            output = subprocess.check_output(
+                [sys.executable, "-m", "benchmarks.bench_streaming", "--worker", mode, workdir, str(rows)],
+                cwd=REPO_ROOT,
+            )
+            report.append(json.loads(output))
+        return report
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--worker"]:
+        worker(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+        for result in run(rows):
+            print(f"{result['mode']:>9}  ttfb {result['ttfb_seconds']:>7.3f}s  total {result['total_seconds']:>7.3f}s  "
+                  f"rss +{result['rss_growth_mb']:>7.1f} MB")
@@ -0,0 +1,98 @@
+"""
+A plain event table against a time-partitioned one when most reads ask for recent rows.
+
+A gunicorn server (gunicorn.conf.py) is started with --workers processes. Two tables get
+the same --rows events, spread evenly over the last --months months: "plain", a regular
+table, and "timed", partitioned by month of created_at with partitions older than
+--archive-after months archived. The scenarios read the last week of events, sorted by
+time, and count them. The plain table scans every month; the timed table only reads the
+partitions of the requested range. Neither table has an index on created_at.
+
+Usage:
+    python -m benchmarks.bench_time_partitions [--workers 4] [--rows 100000] [--months 12] [--requests 500]
+"""
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+from benchmarks.suite import DB_NAME, serving, run_scenario, _json
+
+TABLES = ("plain", "timed")
+EVENT_COLUMNS = [
+    {"name": "created_at", "type": "TEXT"},
+    {"name": "kind", "type": "TEXT"},
+    {"name": "amount", "type": "INTEGER"},
+]
+
+
+def make_events(count, months, rng):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    span = months * 30 * 86400
+    return [
+        {
+            "created_at": (now - timedelta(seconds=rng.randrange(span))).strftime("%Y-%m-%d %H:%M:%S"),
+            "kind": rng.choice(("view", "click", "buy")),
+            "amount": rng.randint(1, 500),
+        }
+        for _ in range(count)
+    ]
+
+
+def requests_for(table_name, options):
+    since = (datetime.now(timezone.utc) - timedelta(days=7)).strftime("%Y-%m-%d")
+    return {
+        "recent_page": [
+            ("GET", f"/{DB_NAME}/{table_name}?created_at__gte={since}&orderby=created_at&order=DESC&limit=50", None, None)
+        ] * options.requests,
+        "recent_count": [
+            ("GET", f"/{DB_NAME}/{table_name}/aggregate?agg=count&group_by=kind&created_at__gte={since}", None, None)
+        ] * options.requests,
+    }
+
+
+def seed(client, options):
+    client.request("DELETE", f"/db/{DB_NAME}", *_json({}))
+    client.request("POST", "/db/", *_json({"name": DB_NAME}))
+    events = make_events(options.rows, options.months, random.Random(options.seed))
+    for table_name in TABLES:
+        payload = {"columns": [dict(column) for column in EVENT_COLUMNS]}
+        if table_name == "timed":
+            payload.update(partition_key="created_at", partition_interval="month", archive_after=options.archive_after)
+        status = client.request("POST", f"/db/{DB_NAME}/{table_name}", *_json(payload))
+        assert status < 400, f"Could not create table {table_name} (HTTP {status})"
+        # One request, so no month is archived before all of its history is in
+        status = client.request("POST", f"/{DB_NAME}/{table_name}", *_json({"data": events}))
+        assert status < 400, f"Could not load {table_name} (HTTP {status})"
+
+
+def run(options):
+    results = {}
+    with serving(options.workers, options.threads) as client:
+        seed(client, options)
+        for table_name in TABLES:
+            results[table_name] = {
+                name: run_scenario(client, requests, options.concurrency)
+                for name, requests in requests_for(table_name, options).items()
+            }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_time_partitions")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="threads per worker")
+    parser.add_argument("--rows", type=int, default=100000, help="events seeded into each table")
+    parser.add_argument("--months", type=int, default=12, help="months the events are spread over")
+    parser.add_argument("--archive-after", type=int, default=3, help="months before a partition of the timed table is archived")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario and table")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    results = run(parser.parse_args())
+
+    print(f"{'scenario':<13} {'plain':>14} {'timed':>14} {'speedup':>8} {'p95 plain':>10} {'p95 timed':>10}")
+    for name in results["plain"]:
+        plain, timed = results["plain"][name], results["timed"][name]
+        print(
+            f"{name:<13} {plain['throughput_rps']:>10.1f} r/s {timed['throughput_rps']:>10.1f} r/s "
+            f"{timed['throughput_rps'] / plain['throughput_rps']:>7.2f}x "
+            f"{plain['latency_ms']['p95']:>10.2f} {timed['latency_ms']['p95']:>10.2f}"
+        )
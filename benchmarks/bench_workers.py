@@ -0,0 +1,66 @@
+"""
+Throughput of the benchmark suite's scenarios as the number of gunicorn workers grows.
+
+Each worker count gets a fresh gunicorn server (gunicorn.conf.py) and a freshly seeded
+database; any benchmarks.suite option other than --serve, --url and the baseline options
+is passed through.
+
+Usage:
+    python -m benchmarks.bench_workers [--workers 1,2,4,8] [--output scaling.json] [suite options...]
+"""
+import json
+import sys
+from benchmarks.suite import build_parser, parse_options, run
+
+DEFAULT_WORKERS = [1, 2, 4]
+DEFAULT_SCENARIOS = "list,by_id,insert,update,sql"
+
+
+def run_scaling(worker_counts, options):
+    reports = {}
+    for workers in worker_counts:
+        options.serve = workers
+        reports[workers] = run(options)
+    return reports
+
+
+def scaling_table(reports):
+    baseline_workers = min(reports)
+    table = {}
+    for workers, report in sorted(reports.items()):
+        for name, result in report["scenarios"].items():
+            base = reports[baseline_workers]["scenarios"][name]["throughput_rps"]
+            table.setdefault(name, {})[workers] = {
+                "throughput_rps": result["throughput_rps"],
+                "p95_ms": result["latency_ms"]["p95"],
+                "speedup": round(result["throughput_rps"] / base, 2) if base else None,
+                "errors": result["errors"],
+            }
+    return table
+
+
+def main(argv=None):
+    parser = build_parser("python -m benchmarks.bench_workers")
+    parser.add_argument("--workers", default=",".join(map(str, DEFAULT_WORKERS)), help="comma-separated worker counts")
+    parser.set_defaults(scenarios=DEFAULT_SCENARIOS, concurrency=16)
+    options = parse_options(parser, argv)
+    if options.url or options.compare or options.baseline:
+        parser.error("--url, --baseline and --compare do not apply to the scaling benchmark")
+    worker_counts = sorted({int(count) for count in options.workers.split(",")})
+
+    reports = run_scaling(worker_counts, options)
+    table = scaling_table(reports)
+
+    print(f"{'scenario':<14} " + " ".join(f"{f'{count} worker(s)':>22}" for count in worker_counts))
+    for name, row in table.items():
+        cells = (f"{row[count]['throughput_rps']:>9.1f} req/s x{row[count]['speedup']:<5}" for count in worker_counts)
+        print(f"{name:<14} " + " ".join(f"{cell:>22}" for cell in cells))
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump({"scaling": table, "reports": {str(count): report for count, report in reports.items()}}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Run the API from a scratch directory so benchmarks never touch real databases
+@contextmanager
+def scratch_workdir():
+    workdir = tempfile.mkdtemp(prefix="dynamic-api-bench-")
+    cwd = os.getcwd()
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    os.chdir(workdir)
+    try:
+        yield workdir
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def make_rows(count, start=0):
+    return [
+        {
+            "name": f"user{i}",
+            "email": f"user{i}@example.com",
+            "age": 18 + i % 60,
+            "city": ("delhi", "mumbai", "pune", "chennai")[i % 4],
+        }
+        for i in range(start, start + count)
+    ]
+
+
+@contextmanager
+def timed(results, key):
+    start = time.perf_counter()
+    yield
+    results[key] = time.perf_counter() - start
+
+
+# Nearest-rank percentile of an already sorted list
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
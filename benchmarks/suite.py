@@ -0,0 +1,456 @@
+"""
+Load benchmark of the API's hot paths, with a JSON report and regression check.
+
+Seeds a synthetic database, then runs each scenario with a fixed number of requests
+spread over a pool of client threads and reports throughput and p50/p95/p99 latency.
+Requests are generated up front from a seeded RNG, so two runs with the same options
+send exactly the same traffic.
+
+Targets:
+    (default)        the Flask test client, in-process, against a scratch databases/ folder
+    --serve N        a gunicorn server with N workers (gunicorn.conf.py) started in a scratch folder;
+                     with --server asgi, uvicorn serving asgi.py instead
+    --url URL        an already running server; the "bench_suite" database on it is replaced
+
+Usage:
+    python -m benchmarks.suite [--rows 10000] [--requests 500] [--concurrency 4]
+                               [--scenarios list,by_id,...] [--output report.json]
+                               [--baseline baseline.json] [--tolerance 10]
+    python -m benchmarks.suite --compare baseline.json report.json [--tolerance 10]
+
+With --baseline (or --compare) the exit status is 1 when any scenario lost more than
+--tolerance percent of its throughput or gained more than that in p95/p99 latency.
+"""
+import argparse
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from benchmarks.common import REPO_ROOT, scratch_workdir, make_rows, percentile
+
+DB_NAME = "bench_suite"
+SEED_CHUNK = 5000
+DEFAULT_ROWS = 10000
+DEFAULT_REQUESTS = 500
+DEFAULT_CONCURRENCY = 4
+DEFAULT_INSERT_BATCH = 100
+DEFAULT_UPLOAD_ROWS = 200
+DEFAULT_TOLERANCE = 10.0
+SERVER_START_TIMEOUT = 30
+
+ITEM_COLUMNS = [
+    {"name": "name", "type": "TEXT"},
+    {"name": "email", "type": "TEXT"},
+    {"name": "age", "type": "INTEGER"},
+    {"name": "city", "type": "TEXT"},
+]
+CITIES = ("delhi", "mumbai", "pune", "chennai")
+
+
+class LocalClient:
+    # One Flask test client per thread
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, content_type=None):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        response = client.open(path, method=method, data=body, content_type=content_type)
+        response.close()
+        return response.status_code
+
+
+class HttpClient:
+    # One keep-alive connection per thread
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, content_type=None):
+        headers = {"Content-Type": content_type} if content_type else {}
+        for attempt in range(2):
+            conn = getattr(self.local, "conn", None)
+            if conn is None:
+                conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                conn.request(method, self.prefix + path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, OSError):
+                # The server closed an idle keep-alive connection; reconnect once
+                conn.close()
+                self.local.conn = None
+                if attempt:
+                    raise
+
+
+def _json(payload):
+    return json.dumps(payload).encode(), "application/json"
+
+
+def _multipart(fields, file_field, filename, content):
+    boundary = uuid.uuid4().hex
+    lines = []
+    for name, value in fields.items():
+        lines.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    lines.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        f"Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet\r\n\r\n".encode()
+    )
+    lines.append(content + b"\r\n")
+    lines.append(f"--{boundary}--\r\n".encode())
+    return b"".join(lines), f"multipart/form-data; boundary={boundary}"
+
+
+def _workbook(rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["firstName", "lastName", "emailAddress"])
+    for i in range(rows):
+        sheet.append([f"first{i}", f"last{i}", f"user{i}@example.com"])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+# Scenario builders return the list of (method, path, body, content_type) to send
+def _list_requests(rng, options):
+    last_start = max(options.rows - 50, 0)
+    return [("GET", f"/{DB_NAME}/items?limit=50&start={rng.randint(0, last_start)}", None, None) for _ in range(options.requests)]
+
+
+def _filtered_requests(rng, options):
+    return [
+        ("GET", f"/{DB_NAME}/items?city={rng.choice(CITIES)}&age__gte={rng.randint(18, 77)}&limit=50", None, None)
+        for _ in range(options.requests)
+    ]
+
+
+def _by_id_requests(rng, options):
+    return [("GET", f"/{DB_NAME}/items/{rng.randint(1, options.rows)}", None, None) for _ in range(options.requests)]
+
+
+def _insert_requests(rng, options):
+    batch = options.insert_batch
+    return [
+        ("POST", f"/{DB_NAME}/inserts", *_json({"data": make_rows(batch, start=i * batch)}))
+        for i in range(options.requests)
+    ]
+
+
+def _update_requests(rng, options):
+    return [
+        ("PUT", f"/{DB_NAME}/writes/{rng.randint(1, options.requests)}", *_json({"age": rng.randint(18, 77)}))
+        for _ in range(options.requests)
+    ]
+
+
+def _delete_requests(rng, options):
+    # Every row of the writes table is deleted exactly once
+    ids = list(range(1, options.requests + 1))
+    rng.shuffle(ids)
+    return [("DELETE", f"/{DB_NAME}/writes/{row_id}", None, None) for row_id in ids]
+
+
+def _sql_requests(rng, options):
+    return [
+        ("POST", "/sql", *_json({
+            "db_name": DB_NAME,
+            "query": f"SELECT city, COUNT(*) AS rows, AVG(age) AS age FROM items WHERE age >= {rng.randint(18, 77)} GROUP BY city",
+        }))
+        for _ in range(options.requests)
+    ]
+
+
+def _upload_requests(rng, options):
+    body, content_type = _multipart({"db": DB_NAME, "table": "uploads"}, "file", "bench.xlsx", _workbook(options.upload_rows))
+    return [("POST", "/media/docs", body, content_type) for _ in range(options.requests)]
+
+
+# Run order matters: update and delete share the writes table
+SCENARIOS = {
+    "list": _list_requests,
+    "list_filtered": _filtered_requests,
+    "by_id": _by_id_requests,
+    "insert": _insert_requests,
+    "update": _update_requests,
+    "delete": _delete_requests,
+    "sql": _sql_requests,
+    "excel_upload": _upload_requests,
+}
+
+
+def seed(client, options):
+    client.request("DELETE", f"/db/{DB_NAME}")
+    status = client.request("POST", "/db/", *_json({"name": DB_NAME}))
+    assert status < 400, f"Could not create database {DB_NAME} (HTTP {status})"
+    for table_name, rows in (("items", options.rows), ("writes", options.requests)):
+        status = client.request("POST", f"/db/{DB_NAME}/{table_name}", *_json({"columns": [dict(column) for column in ITEM_COLUMNS]}))
+        assert status < 400, f"Could not create table {table_name} (HTTP {status})"
+        for start in range(0, rows, SEED_CHUNK):
+            status = client.request("POST", f"/{DB_NAME}/{table_name}", *_json({"data": make_rows(min(SEED_CHUNK, rows - start), start=start)}))
+            assert status < 400, f"Could not seed table {table_name} (HTTP {status})"
+
+
+def run_scenario(client, requests, concurrency):
+    latencies = [0.0] * len(requests)
+    errors = [0]
+    lock = threading.Lock()
+
+    def send(index):
+        method, path, body, content_type = requests[index]
+        start = time.perf_counter()
+        status = client.request(method, path, body, content_type)
+        latencies[index] = time.perf_counter() - start
+        if status >= 400:
+            with lock:
+                errors[0] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, range(len(requests))))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "requests": len(requests),
+        "errors": errors[0],
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(len(requests) / elapsed, 2),
+        "latency_ms": {
+            "mean": round(sum(latencies_ms) / len(latencies_ms), 3),
+            "p50": round(percentile(latencies_ms, 50), 3),
+            "p95": round(percentile(latencies_ms, 95), 3),
+            "p99": round(percentile(latencies_ms, 99), 3),
+            "max": round(latencies_ms[-1], 3),
+        },
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(client, server):
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with status {server.returncode}")
+        try:
+            if client.request("GET", "/db/") == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Server did not start in time")
+
+
+def _start_server(workdir, workers, threads, port, server="wsgi"):
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])),
+        GUNICORN_ACCESS_LOG="",
+        GUNICORN_LOG_LEVEL="warning",
+        ASGI_EXECUTOR_THREADS=str(threads),
+    )
+    if server == "asgi":
+        command = [
+            sys.executable, "-m", "uvicorn", "asgi:app", "--workers", str(workers),
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--no-access-log",
+        ]
+    else:
+        command = [
+            sys.executable, "-m", "gunicorn", "--config", os.path.join(REPO_ROOT, "gunicorn.conf.py"),
+            "--workers", str(workers), "--threads", str(threads), "--bind", f"127.0.0.1:{port}",
+        ]
+    return subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL)
+
+
+# Start a server with --serve's settings in a scratch folder; yields a client for it
+@contextmanager
+def serving(workers, threads, server="wsgi"):
+    with scratch_workdir() as workdir:
+        port = _free_port()
+        process = _start_server(workdir, workers, threads, port, server)
+        try:
+            client = HttpClient(f"http://127.0.0.1:{port}")
+            _wait_until_up(client, process)
+            yield client
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def _run_all(client, options):
+    seed(client, options)
+    results = {}
+    for name in options.scenarios:
+        # Each scenario gets its own RNG so selecting a subset does not change the traffic
+        requests = SCENARIOS[name](random.Random(f"{options.seed}:{name}"), options)
+        results[name] = run_scenario(client, requests, options.concurrency)
+    return results
+
+
+def run(options):
+    if options.url:
+        target = {"kind": "url", "url": options.url}
+        results = _run_all(HttpClient(options.url), options)
+    elif options.serve:
+        target = {"kind": "gunicorn" if options.server == "wsgi" else "uvicorn", "workers": options.serve, "threads": options.threads}
+        with serving(options.serve, options.threads, options.server) as client:
+            results = _run_all(client, options)
+    else:
+        target = {"kind": "test_client"}
+        with scratch_workdir():
+            from main import app
+
+            results = _run_all(LocalClient(app), options)
+
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "target": target,
+            "rows": options.rows,
+            "requests": options.requests,
+            "concurrency": options.concurrency,
+            "insert_batch": options.insert_batch,
+            "upload_rows": options.upload_rows,
+            "seed": options.seed,
+        },
+        "scenarios": results,
+    }
+
+
+# Scenarios of current that are slower than in baseline by more than tolerance percent
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    factor = tolerance / 100
+    regressions = []
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        checks = [("throughput_rps", before["throughput_rps"], result["throughput_rps"], True)]
+        checks += [(f"{key}_ms", before["latency_ms"][key], result["latency_ms"][key], False) for key in ("p95", "p99")]
+        for metric, old, new, higher_is_better in checks:
+            if not old:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -factor) or (not higher_is_better and change > factor):
+                regressions.append({"scenario": name, "metric": metric, "baseline": old, "current": new, "change_pct": round(change * 100, 1)})
+    return regressions
+
+
+def _print_report(report):
+    print(f"{'scenario':<14} {'reqs':>6} {'errors':>6} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, result in report["scenarios"].items():
+        latency = result["latency_ms"]
+        print(
+            f"{name:<14} {result['requests']:>6} {result['errors']:>6} {result['throughput_rps']:>10.1f} "
+            f"{latency['p50']:>9.2f} {latency['p95']:>9.2f} {latency['p99']:>9.2f}"
+        )
+
+
+def _print_regressions(regressions, tolerance):
+    if not regressions:
+        print(f"No regressions beyond {tolerance}%")
+        return
+    print(f"Regressions beyond {tolerance}%:")
+    for item in regressions:
+        print(f"  {item['scenario']:<14} {item['metric']:<15} {item['baseline']:>10} -> {item['current']:<10} ({item['change_pct']:+}%)")
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_parser(prog="python -m benchmarks.suite"):
+    parser = argparse.ArgumentParser(prog=prog, description="Load benchmark of the API's hot paths")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="rows seeded into the read table")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="client threads")
+    parser.add_argument("--insert-batch", type=int, default=DEFAULT_INSERT_BATCH, help="rows per bulk insert request")
+    parser.add_argument("--upload-rows", type=int, default=DEFAULT_UPLOAD_ROWS, help="rows in the uploaded workbook")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=0, help="seed of the request generator")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="benchmark a running server at this base URL")
+    target.add_argument("--serve", type=int, metavar="WORKERS", help="start gunicorn with this many workers and benchmark it")
+    parser.add_argument("--threads", type=int, default=1, help="threads per worker with --serve")
+    parser.add_argument("--server", choices=["wsgi", "asgi"], default="wsgi", help="with --serve: gunicorn (main.py) or uvicorn (asgi.py)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="compare the run against this saved report")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two saved reports without running")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed change in percent before flagging a regression")
+    return parser
+
+
+def parse_options(parser, argv=None):
+    options = parser.parse_args(argv)
+    # Keep the registry order, which the write scenarios depend on
+    wanted = {name.strip() for name in options.scenarios.split(",") if name.strip()}
+    unknown = wanted - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    options.scenarios = [name for name in SCENARIOS if name in wanted]
+    return options
+
+
+def main(argv=None):
+    options = parse_options(build_parser(), argv)
+
+    if options.compare:
+        regressions = compare(_load(options.compare[0]), _load(options.compare[1]), options.tolerance)
+        _print_regressions(regressions, options.tolerance)
+        return 1 if regressions else 0
+
+    report = run(options)
+    _print_report(report)
+    regressions = None
+    if options.baseline:
+        regressions = report["regressions"] = compare(_load(options.baseline), report, options.tolerance)
+        _print_regressions(regressions, options.tolerance)
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
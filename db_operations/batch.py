@@ -0,0 +1,136 @@
+import os
+import sqlite3
+from schema.connection import get_connection, retry_on_busy
+from schema.catalog import has_table
+from schema.versions import bump, observe
+from schema.counts import adjust_count
+from schema.partitions import partition_spec
+from db_operations.utils import ensure_columns, insert_rows
+from schema.db_utils import is_reserved_table
+
+# Operations accepted in a single /batch request
+BATCH_MAX_OPERATIONS = int(os.environ.get("BATCH_MAX_OPERATIONS", 1000))
+
+BATCH_OPERATIONS = {"insert", "update", "delete"}
+
+
+class BatchError(Exception):
+    pass
+
+
+# Check the operations and apply their schema changes up front; DDL cannot share the
+# batch transaction because it runs on its own pooled connection
+def prepare_operations(db_name, operations):
+    if not isinstance(operations, list) or not operations:
+        raise BatchError("operations must be a non-empty list")
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise BatchError(f"At most {BATCH_MAX_OPERATIONS} operations are allowed per batch")
+
+    new_columns = {}
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise BatchError(f"Operation {index} must be an object")
+        op = operation.get("op")
+        table_name = operation.get("table")
+        if op not in BATCH_OPERATIONS:
+            raise BatchError(f"Operation {index}: op must be one of insert, update, delete")
+        if not table_name:
+            raise BatchError(f"Operation {index}: table is required")
+        if is_reserved_table(table_name):
+            raise BatchError(f"Operation {index}: table {table_name} is reserved for internal use")
+        if partition_spec(db_name, table_name):
+            # Partitions are separate databases, which one transaction cannot span
+            raise BatchError(f"Operation {index}: table {table_name} is partitioned and cannot be part of a batch")
+
+        if op == "insert":
+            data = operation.get("data")
+            if isinstance(data, dict):
+                data = operation["data"] = [data]
+            if not data or not all(isinstance(row, dict) for row in data):
+                raise BatchError(f"Operation {index}: data is required for insertion")
+            columns = new_columns.setdefault(table_name, {})
+            for row in data:
+                columns.update(dict.fromkeys(row.keys()))
+        elif op == "update":
+            values = operation.get("data") if "id" in operation else operation.get("update")
+            if not values or not isinstance(values, dict):
+                raise BatchError(f"Operation {index}: {'data' if 'id' in operation else 'update'} is required")
+            if "id" not in operation and not operation.get("where"):
+                raise BatchError(f"Operation {index}: where or id is required")
+            if "id" not in operation:
+                # Like PUT /<db>/<table>, a where-update adds columns it does not find
+                new_columns.setdefault(table_name, {}).update(dict.fromkeys(values.keys()))
+        elif "id" not in operation and not operation.get("where"):
+            raise BatchError(f"Operation {index}: where or id is required")
+
+    inserted_tables = {operation["table"] for operation in operations if operation["op"] == "insert"}
+    for table_name, columns in new_columns.items():
+        # Inserts create missing tables; an update of a missing table fails on its own
+        if table_name in inserted_tables or has_table(db_name, table_name):
+            ensure_columns(db_name, table_name, list(columns))
+
+
+def _run_operation(conn, operation):
+    op = operation["op"]
+    table_name = operation["table"]
+
+    if op == "insert":
+        return insert_rows(conn, table_name, operation["data"])
+
+    if "id" in operation:
+        where = {"id": operation["id"]}
+    else:
+        where = operation["where"]
+    where_clause = " AND ".join(f"{key} = ?" for key in where.keys())
+    where_values = tuple(where.values())
+
+    if op == "update":
+        values = operation["data"] if "id" in operation else operation["update"]
+        set_clause = ", ".join(f"{key} = ?" for key in values.keys())
+        cursor = conn.execute(f"UPDATE {table_name} SET {set_clause} WHERE {where_clause}", tuple(values.values()) + where_values)
+    else:
+        cursor = conn.execute(f"DELETE FROM {table_name} WHERE {where_clause}", where_values)
+        adjust_count(conn, table_name, -cursor.rowcount)
+
+    if "id" in operation and cursor.rowcount == 0:
+        # Same outcome as PUT/DELETE /<db>/<table>/<id>
+        raise BatchError("Record not found")
+    return {"rowcount": cursor.rowcount}
+
+
+# Run the operations in one transaction on one connection. With atomic=True the first
+# failure rolls everything back; otherwise failed operations are undone on their own
+# and the rest are committed. Returns (committed, results).
+@retry_on_busy
+def run_batch(db_name, operations, atomic=True):
+    prepare_operations(db_name, operations)
+
+    results = []
+    touched = set()
+    with get_connection(db_name) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        observe(db_name)
+        try:
+            for index, operation in enumerate(operations):
+                conn.execute("SAVEPOINT batch_op")
+                try:
+                    result = _run_operation(conn, operation)
+                except (sqlite3.Error, BatchError) as e:
+                    conn.execute("ROLLBACK TO batch_op")
+                    conn.execute("RELEASE batch_op")
+                    results.append({"index": index, "status": "ERROR", "message": str(e)})
+                    if atomic:
+                        conn.rollback()
+                        return False, results
+                    continue
+                conn.execute("RELEASE batch_op")
+                touched.add(operation["table"])
+                results.append({"index": index, "status": "SUCCESS", **result})
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+    for table_name in touched:
+        bump(db_name, table_name)
+    return True, results
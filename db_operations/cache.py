@@ -0,0 +1,97 @@
+import os
+import threading
+from collections import OrderedDict
+from flask import request, Response
+from schema.versions import version
+from metrics.registry import register_collector
+
+# Set RESPONSE_CACHE_MAX_ENTRIES=0 to disable caching; ETags are still sent
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+class ResponseCache:
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, data_version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != data_version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, data_version, body):
+        if self.max_entries <= 0 or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[1])
+            self._entries[key] = (data_version, body)
+            self.size += len(body)
+            # Evict least recently used entries
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache()
+
+
+@register_collector
+def _cache_metrics():
+    stats = response_cache.stats()
+    return [
+        ("dynamic_api_response_cache_hits_total", "counter", "GET responses served from the response cache", [({}, stats["hits"])]),
+        ("dynamic_api_response_cache_misses_total", "counter", "GET responses that had to be built", [({}, stats["misses"])]),
+        ("dynamic_api_response_cache_entries", "gauge", "Responses held in the response cache", [({}, stats["entries"])]),
+        ("dynamic_api_response_cache_bytes", "gauge", "Bytes held in the response cache", [({}, stats["bytes"])]),
+    ]
+
+
+# Order-independent key for the query string
+def normalise_args(args):
+    return tuple(sorted((key, tuple(sorted(args.getlist(key)))) for key in args))
+
+
+def make_etag(db_name, table_name, data_version=None):
+    return f"{db_name}.{table_name}.{data_version or version(db_name, table_name)}"
+
+
+# Serve a GET read from the cache, or build it with build() -> (response, status) and cache it.
+# Clients that send the current ETag in If-None-Match get a 304 without any query running.
+# data_version replaces the table's version for data kept elsewhere, e.g. in partitions.
+def cached_response(db_name, table_name, kind, build, data_version=None):
+    etag = make_etag(db_name, table_name, data_version)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    key = (db_name, table_name, kind, normalise_args(request.args))
+    body = response_cache.get(key, etag)
+    if body is None:
+        response, status = build()
+        if status != 200:
+            return response, status
+        # The version was read before the query ran, so a concurrent write can only make this entry stale
+        body = response.get_data()
+        response_cache.put(key, etag, body)
+
+    response = Response(body, status=200, mimetype="application/json")
+    response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,211 @@
+import codecs
+import csv
+import json
+import sqlite3
+from functools import partial
+from schema.connection import get_connection, retry_on_busy
+from schema.versions import bump, observe
+from schema.partitions import partition_spec
+from db_operations.utils import ensure_columns, insert_rows
+from db_operations.partitioned import (
+    ensure_partition_columns, ensure_partitions, check_writable, insert_into_partition, run_partitions,
+)
+from schema.db_utils import schedule_archiving
+
+# Bytes read from the request body at a time
+INGEST_CHUNK_SIZE = 64 * 1024
+# Rows committed per transaction
+INGEST_BATCH_SIZE = 5000
+# Rejected rows reported back in detail; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+# Errors that only concern the rows being written: constraint violations and values SQLite
+# cannot store (nested objects, lists, integers beyond 64 bits)
+ROW_ERRORS = (sqlite3.IntegrityError, sqlite3.InterfaceError, sqlite3.ProgrammingError, OverflowError)
+
+INGEST_FORMATS = {"application/x-ndjson": "ndjson", "application/jsonl": "ndjson", "text/csv": "csv"}
+
+
+# Yield decoded lines (with their line endings) from a binary stream, one chunk at a time
+def iter_lines(stream, chunk_size=INGEST_CHUNK_SIZE):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+# Yield (line_number, row_dict or None, error) for each NDJSON record
+def parse_ndjson(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Each line must be a JSON object"
+            continue
+        yield line_number, row, None
+
+
+# Yield (line_number, row_dict or None, error) for each CSV record; the first record is the header
+def parse_csv(lines):
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if not header:
+        return
+    header = [name.strip() for name in header]
+    for record in reader:
+        if not record:
+            continue
+        if len(record) != len(header):
+            yield reader.line_num, None, f"Expected {len(header)} fields, got {len(record)}"
+            continue
+        yield reader.line_num, dict(zip(header, record)), None
+
+
+class IngestSummary:
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.errors = []
+
+    def reject(self, line_number, error):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "error": error})
+
+    def to_dict(self):
+        return {"accepted": self.accepted, "rejected": self.rejected, "batches": self.batches, "errors": self.errors}
+
+
+def _flush(db_name, table_name, batch, summary):
+    column_names = {}
+    for _, row in batch:
+        column_names.update(dict.fromkeys(row.keys()))
+
+    spec = partition_spec(db_name, table_name)
+    if spec:
+        column_names.pop("id", None)
+        accepted, rejected = _write_partitioned_batch(spec, batch, list(column_names))
+        summary.accepted += accepted
+        for line_number, message in rejected:
+            summary.reject(line_number, message)
+        summary.batches += 1
+        return
+
+    ensure_columns(db_name, table_name, list(column_names))
+    accepted, rejected = _write_batch(db_name, table_name, batch)
+    summary.accepted += accepted
+    for line_number, message in rejected:
+        summary.reject(line_number, message)
+    bump(db_name, table_name)
+    summary.batches += 1
+
+
+# Returns (accepted, [(line_number, error), ...]); runs again from scratch if the database is locked
+@retry_on_busy
+def _write_batch(db_name, table_name, batch):
+    with get_connection(db_name) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        observe(db_name)
+        try:
+            insert_rows(conn, table_name, [row for _, row in batch])
+            conn.commit()
+            return len(batch), []
+        except ROW_ERRORS:
+            # Retry row by row so one bad record does not reject the whole batch
+            conn.rollback()
+        conn.execute("BEGIN IMMEDIATE")
+        accepted, rejected = 0, []
+        for line_number, row in batch:
+            conn.execute("SAVEPOINT ingest_row")
+            try:
+                insert_rows(conn, table_name, [row])
+                accepted += 1
+            except ROW_ERRORS as e:
+                conn.execute("ROLLBACK TO ingest_row")
+                rejected.append((line_number, str(e)))
+            conn.execute("RELEASE ingest_row")
+        conn.commit()
+    return accepted, rejected
+
+
+# Each partition commits its share of the batch on its own, so a bad record only sends
+# the rows of its own partition through one at a time. Rows without a valid timestamp, or
+# bound for a read-only archive, are rejected.
+def _write_partitioned_batch(spec, batch, column_names):
+    groups, rejected = {}, []
+    for line_number, row in batch:
+        try:
+            groups.setdefault(spec.index_for_row(row), []).append((line_number, row))
+        except ValueError as e:
+            rejected.append((line_number, str(e)))
+    spec = ensure_partitions(spec, list(groups))
+    for index in list(groups):
+        try:
+            check_writable(spec, [index])
+        except ValueError as e:
+            rejected.extend((line_number, str(e)) for line_number, _ in groups.pop(index))
+    ensure_partition_columns(spec, column_names)
+
+    def write(index, items):
+        try:
+            insert_into_partition(spec, index, [row for _, row in items])
+            return len(items), []
+        except ROW_ERRORS:
+            pass
+        except ValueError as e:
+            # The partition was archived read-only meanwhile
+            return 0, [(line_number, str(e)) for line_number, _ in items]
+        accepted, rejected = 0, []
+        for line_number, row in items:
+            try:
+                insert_into_partition(spec, index, [row])
+                accepted += 1
+            except ROW_ERRORS as e:
+                rejected.append((line_number, str(e)))
+        return accepted, rejected
+
+    results = run_partitions([partial(write, index, items) for index, items in groups.items()])
+    schedule_archiving(spec)
+    return sum(accepted for accepted, _ in results), rejected + [item for _, failed in results for item in failed]
+
+
+# Insert (line_number, row, error) records in batches, evolving the schema as new columns appear
+def ingest_rows(db_name, table_name, records, batch_size=INGEST_BATCH_SIZE, progress=None):
+    summary = IngestSummary()
+    batch = []
+    for line_number, row, error in records:
+        if error:
+            summary.reject(line_number, error)
+            continue
+        batch.append((line_number, row))
+        if len(batch) >= batch_size:
+            _flush(db_name, table_name, batch, summary)
+            batch = []
+            if progress:
+                progress(summary.accepted + summary.rejected)
+    if batch:
+        _flush(db_name, table_name, batch, summary)
+    if progress:
+        progress(summary.accepted + summary.rejected)
+    return summary.to_dict()
+
+
+# Load NDJSON or CSV from a binary stream into a table
+def ingest_stream(db_name, table_name, stream, fmt="ndjson", batch_size=INGEST_BATCH_SIZE, progress=None):
+    parse = parse_csv if fmt == "csv" else parse_ndjson
+    return ingest_rows(db_name, table_name, parse(iter_lines(stream)), batch_size, progress)
@@ -0,0 +1,363 @@
+import heapq
+import operator
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from schema.catalog import get_columns
+from schema.connection import db_path
+from schema.db_utils import add_time_partitions, schedule_archiving, writable_partition
+from schema.partitions import partition_spec
+from schema.versions import bump
+from schema.writer import run_write
+from db_operations.utils import (
+    ensure_columns,
+    insert_rows,
+    fetch_data,
+    build_aggregate,
+    aggregate_data,
+    update_rows,
+    delete_rows,
+)
+from schema.counts import count_rows
+
+# Threads per process that run the queries of a partitioned table in parallel
+PARTITION_WORKERS = int(os.environ.get("PARTITION_WORKERS", 8))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+HAVING_COMPARISONS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+}
+
+
+# Threads do not survive a fork; a forked worker starts its own pool on first use
+def _reset_after_fork():
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PARTITION_WORKERS, thread_name_prefix="partition")
+        return _executor
+
+
+# Run zero-argument calls, one per partition, in parallel and return their results in order.
+# The calls must not fan out themselves, or the pool could run out of threads.
+def run_partitions(calls):
+    if len(calls) == 1:
+        return [calls[0]()]
+    futures = [_get_executor().submit(call) for call in calls]
+    return [future.result() for future in futures]
+
+
+# Value of a column as SQLite orders it: NULL, then numbers, then text, then blobs
+def _sort_value(value):
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, bytes(value))
+
+
+# Partitions must keep the same columns, so a new column is added to every one of them
+def ensure_partition_columns(spec, column_names):
+    while True:
+        for shard in spec.shards:
+            if not os.path.exists(db_path(shard)):
+                # Archived since the spec was read
+                continue
+            columns = get_columns(shard, spec.table_name) or {}
+            if any(name not in columns for name in column_names):
+                with writable_partition(shard):
+                    ensure_columns(shard, spec.table_name, column_names)
+        # A partition archived meanwhile may have been copied before its new columns arrived
+        fresh = partition_spec(spec.db_name, spec.table_name)
+        if fresh is None or fresh.shards == spec.shards:
+            return
+        spec = fresh
+
+
+# Partitions a write is about to touch must exist; returns the spec that includes them.
+# Time partitions are created by their first row.
+def ensure_partitions(spec, indexes):
+    missing = [index for index in indexes if index not in spec.indexes()]
+    if missing:
+        spec = add_time_partitions(spec, missing)
+    return spec
+
+
+# Writes must not reach read-only archives
+def check_writable(spec, indexes):
+    for index in indexes:
+        if not spec.writable(index):
+            raise ValueError(f"Partition {spec.label(index)} of {spec.table_name} is archived read-only")
+
+
+# Insert rows into one partition in a single transaction. Ids continue from the
+# partition's sequence as the spec dictates (in steps of the partition count for hash
+# partitions, from the range's own block for time partitions), so the id of a row always
+# names its partition and ids never collide across partitions.
+def insert_into_partition(spec, index, rows):
+    def work(conn):
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (spec.table_name,)).fetchone()
+        next_id = spec.first_id(index, row[0] if row else 0)
+        for record in rows:
+            record["id"] = next_id
+            next_id += spec.id_step
+        return insert_rows(conn, spec.table_name, rows, keep_ids=True)
+
+    shard = spec.shard(index)
+    try:
+        result = run_write(shard, work)
+    except sqlite3.OperationalError:
+        # The partition may have been archived since the spec was read; follow it there
+        fresh = partition_spec(spec.db_name, spec.table_name)
+        if fresh is None or index not in fresh.indexes() or fresh.shard(index) == shard:
+            raise
+        check_writable(fresh, [index])
+        return insert_into_partition(fresh, index, rows)
+    bump(shard, spec.table_name)
+    return result
+
+
+# The file a partition moved to since the spec was read (archived meanwhile), or None
+def _moved_shard(spec, index):
+    fresh = partition_spec(spec.db_name, spec.table_name)
+    if fresh is None or index not in fresh.indexes() or fresh.shard(index) == spec.shard(index):
+        return None
+    return fresh.shard(index)
+
+
+# Run read(shard, *args) on one partition. A partition archived while the request runs
+# disappears from its hot file, so a failed read is repeated on the archive once.
+def read_partition(spec, index, read, *args):
+    try:
+        result = read(spec.shard(index), *args)
+    except sqlite3.OperationalError:
+        shard = _moved_shard(spec, index)
+        if shard is None:
+            raise
+        return read(shard, *args)
+    if isinstance(result, dict) and "error" in result:
+        shard = _moved_shard(spec, index)
+        if shard is not None:
+            return read(shard, *args)
+    return result
+
+
+# Split rows by partition: {partition index: [row, ...]}
+def group_rows(spec, rows):
+    groups = {}
+    for index, row in zip(spec.assign(rows), rows):
+        groups.setdefault(index, []).append(row)
+    return groups
+
+
+def insert_partitioned(spec, data):
+    if isinstance(data, dict):
+        data = [data]
+
+    try:
+        groups = group_rows(spec, data)
+        spec = ensure_partitions(spec, list(groups))
+        check_writable(spec, groups)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    column_names = {}
+    for row in data:
+        column_names.update(dict.fromkeys(row.keys()))
+    column_names.pop("id", None)
+    ensure_partition_columns(spec, list(column_names))
+
+    calls = [partial(insert_into_partition, spec, index, rows) for index, rows in groups.items()]
+    try:
+        results = run_partitions(calls)
+    except sqlite3.Error as e:
+        return {"error": str(e)}
+    # A new time range may leave older partitions due for the archive
+    schedule_archiving(spec)
+
+    # Each partition commits on its own; its ids ascend within the partition
+    partitions = [{"partition": spec.label(index), **result} for index, result in sorted(zip(groups, results), key=lambda pair: pair[0])]
+    return {
+        "message": "Records inserted successfully",
+        "inserted": sum(result["inserted"] for result in results),
+        "partitions": partitions,
+    }
+
+
+# The same as fetch_data across the given partitions (all by default). Each partition
+# returns its first start + limit rows in order and the sorted lists are merged, so deep
+# offsets read start + limit rows from every partition; cursors avoid that.
+def fetch_partitioned(spec, limit=10, start=0, order_by="id", order="ASC", where_clause=None, where_values=None, after=None, columns=None, indexes=None):
+    indexes = spec.indexes() if indexes is None else indexes
+    # Rows are merged by (orderby, id), so read both even when not asked for
+    hidden = [name for name in dict.fromkeys(["id", order_by]) if columns and name not in columns]
+    selected = columns + hidden if columns else None
+    per_partition = -1 if limit < 0 else start + limit
+
+    calls = [
+        partial(read_partition, spec, index, fetch_data, spec.table_name, per_partition, 0, order_by, order, where_clause, where_values, after, selected)
+        for index in indexes
+    ]
+    results = run_partitions(calls)
+    for result in results:
+        if isinstance(result, dict):
+            return result
+
+    if order_by == "id":
+        key = lambda row: row["id"]
+    else:
+        key = lambda row: (_sort_value(row[order_by]), row["id"])
+    merged = heapq.merge(*results, key=key, reverse=order == "DESC")
+    data = list(islice(merged, start, None if limit < 0 else start + limit))
+    for row in data if hidden else ():
+        for name in hidden:
+            del row[name]
+    return data
+
+
+def count_partitioned(spec, where_clause=None, where_values=None, indexes=None):
+    indexes = spec.indexes() if indexes is None else indexes
+    calls = [partial(read_partition, spec, index, count_rows, spec.table_name, where_clause, where_values) for index in indexes]
+    return sum(run_partitions(calls))
+
+
+# Aggregate across partitions: every partition groups its own rows, then the partial
+# results are combined. count and sum add up, min and max take the extreme, and avg is
+# computed from a sum and a count per partition. having, orderby and limit apply last.
+def aggregate_partitioned(spec, group_by, aggregates, where_clause=None, where_values=None, having=(), order_by=None, order="ASC", limit=-1, indexes=None):
+    indexes = spec.indexes() if indexes is None else indexes
+    partials = []
+    for position, (function, column, _) in enumerate(aggregates):
+        if function == "avg":
+            partials.append(("sum", column, f"_sum{position}"))
+            partials.append(("count", column, f"_count{position}"))
+        else:
+            partials.append((function, column, f"_part{position}"))
+    query, values = build_aggregate(spec.table_name, group_by, partials, where_clause, where_values)
+    results = run_partitions([partial(read_partition, spec, index, aggregate_data, query, values) for index in indexes])
+    for result in results:
+        if isinstance(result, dict):
+            return result
+
+    groups = {}
+    for rows in results:
+        for row in rows:
+            group_key = tuple(row[column] for column in group_by)
+            merged = groups.get(group_key)
+            if merged is None:
+                groups[group_key] = dict(row)
+                continue
+            for function, _, alias in partials:
+                current, value = merged[alias], row[alias]
+                if value is None:
+                    continue
+                if current is None:
+                    merged[alias] = value
+                elif function in ("count", "sum"):
+                    merged[alias] = current + value
+                elif function == "min":
+                    merged[alias] = min(current, value, key=_sort_value)
+                else:
+                    merged[alias] = max(current, value, key=_sort_value)
+
+    data = []
+    for merged in groups.values():
+        record = {column: merged[column] for column in group_by}
+        for position, (function, _, alias) in enumerate(aggregates):
+            if function == "avg":
+                total, count = merged[f"_sum{position}"], merged[f"_count{position}"]
+                record[alias] = total / count if count else None
+            else:
+                record[alias] = merged[f"_part{position}"]
+        data.append(record)
+
+    for alias, condition, value in having:
+        # Like SQL, a NULL aggregate never satisfies a condition
+        data = [
+            record for record in data
+            if record[alias] is not None and HAVING_COMPARISONS[condition](_sort_value(record[alias]), _sort_value(value))
+        ]
+    if order_by:
+        # orderby is an aggregate, a group_by column or, by default, all group_by columns
+        aliases = {alias for _, _, alias in aggregates}
+        sort_columns = [order_by] if order_by in aliases or order_by in group_by else list(group_by)
+        data.sort(key=lambda record: [_sort_value(record[column]) for column in sort_columns], reverse=order == "DESC")
+    return data if limit < 0 else data[:limit]
+
+
+# Values that decide where a row lives cannot be changed in place
+def _check_update(spec, update_values):
+    for name in update_values:
+        if name.lower() in ("id", spec.key.lower()):
+            raise ValueError(f"Column {name} decides the partition of a row and cannot be updated")
+
+
+def update_partitioned(spec, update_values, where_clause, where_values, indexes=None):
+    _check_update(spec, update_values)
+    indexes = spec.indexes() if indexes is None else indexes
+    check_writable(spec, indexes)
+    calls = [
+        partial(update_rows, spec.shard(index), spec.table_name, update_values, where_clause, tuple(where_values))
+        for index in indexes
+    ]
+    return sum(run_partitions(calls))
+
+
+def delete_partitioned(spec, where_clause, where_values, indexes=None):
+    indexes = spec.indexes() if indexes is None else indexes
+    check_writable(spec, indexes)
+    calls = [partial(delete_rows, spec.shard(index), spec.table_name, where_clause, tuple(where_values)) for index in indexes]
+    return sum(run_partitions(calls))
+
+
+# A PUT or DELETE where object ({column: value}) with its values in the stored form
+def _normalise_where(spec, where_conditions):
+    filters = spec.normalise_filters([(column, "eq", [value]) for column, value in where_conditions.items()])
+    return {column: values[0] for column, _, values in filters}
+
+
+# Partitions a PUT or DELETE where object ({column: value}) can match
+def _where_indexes(spec, where_conditions):
+    return spec.indexes_for_filters([(column, "eq", [value]) for column, value in where_conditions.items()])
+
+
+# PUT /<db>/<table> on a partitioned table; like dynamic_update, it adds missing columns
+def dynamic_update_partitioned(spec, update_values, where_conditions):
+    _check_update(spec, update_values)
+    ensure_partition_columns(spec, list(update_values))
+    where_conditions = _normalise_where(spec, where_conditions)
+    where_clause = ' AND '.join([f"{key} = ?" for key in where_conditions.keys()])
+    update_partitioned(spec, update_values, where_clause, list(where_conditions.values()), _where_indexes(spec, where_conditions))
+    return {"message": "Record updated successfully"}
+
+
+# DELETE /<db>/<table> on a partitioned table; see delete_data
+def delete_data_partitioned(spec, where_conditions):
+    try:
+        where_conditions = _normalise_where(spec, where_conditions)
+        where_clause = ' AND '.join([f"{key} = ?" for key in where_conditions.keys()])
+        delete_partitioned(spec, where_clause, list(where_conditions.values()), _where_indexes(spec, where_conditions))
+        return {"message": "Record(s) deleted successfully"}
+    except sqlite3.Error as e:
+        return {"error": str(e)}
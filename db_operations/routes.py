@@ -1,5 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 import sqlite3
+from schema.connection import get_connection
+from schema.catalog import invalidate, get_columns
+from schema.versions import bump, version
+from schema.counts import forget_counts, count_rows
+from schema.partitions import partition_spec
+from schema.db_utils import is_reserved_table
+from db_operations.cache import cached_response
+from schema.advisor import record_query
 from db_operations.utils import (
     execute_query,
     table_exists,
@@ -7,13 +15,50 @@ from db_operations.utils import (
     insert_data,
     update_data,
     delete_data,
-    parse_where_conditions, 
+    update_rows,
+    delete_rows,
+    parse_filters,
+    parse_projection,
+    parse_aggregates,
+    parse_having,
+    build_aggregate,
+    aggregate_data,
+    AGGREGATE_PARAMS,
+    compile_filters,
+    filter_columns,
+    decode_cursor,
+    encode_cursor,
+    build_select,
+    stream_query,
+    STREAM_FORMATS,
     dynamic_insert,
     dynamic_update
 )
+from db_operations.partitioned import (
+    insert_partitioned,
+    fetch_partitioned,
+    count_partitioned,
+    aggregate_partitioned,
+    update_partitioned,
+    delete_partitioned,
+    dynamic_update_partitioned,
+    delete_data_partitioned,
+)
+from db_operations.batch import run_batch, BatchError
+from db_operations.ingest import ingest_stream, INGEST_FORMATS, INGEST_BATCH_SIZE
+from jobs.manager import submit, async_requested, spool_upload
+from jobs.routes import job_accepted
 import  os
+import time
 op_routes = Blueprint("op_routes", __name__)
 
+# SQLite's own tables and the API's bookkeeping tables are not part of the API, whatever the route
+@op_routes.before_request
+def reject_reserved_tables():
+    table_name = (request.view_args or {}).get("table_name")
+    if table_name and is_reserved_table(table_name):
+        return jsonify({"status": "ERROR", "message": f"Table {table_name} is reserved for internal use"}), 400
+
 # Dynamic route to handle all HTTP methods for a specific table
 @op_routes.route("/<db_name>/<table_name>", methods=["GET", "POST", "PUT", "DELETE"])
 def table_operations(db_name, table_name):
@@ -27,13 +72,25 @@ def table_operations(db_name, table_name):
             start (int): The starting record number. Default is 0.
             order (str): The order of the records. Can be "ASC" or "DESC". Default is "ASC".
             orderby (str): The column to order the records by. Default is "id".
-            where (dict): Conditions for the WHERE clause. Can contain the following keys:
-                column (str): The column name.
-                operator (str): The operator to use. Can be "=", "<", ">", "<=", ">=", "<>", "IN", "LIKE", "NOT LIKE".
-                value (str): The value to compare with.
+            cursor (str): Switches to keyset pagination. Pass an empty value for the first page
+                and the returned next_cursor for the following pages; start is ignored.
+            with_count (bool): Adds total (rows matching the filters), has_more and page
+                (limit, start, returned) to the response. Ignored when streaming.
+            fields (str): Comma-separated columns to return, e.g. fields=id,name. Only these are read.
+            exclude (str): Comma-separated columns to leave out of every record.
+            stream (str): Streams the result instead of buffering it. Can be "ndjson" (one record
+                per line) or "json" (the usual envelope written in chunks). limit defaults to no limit.
+            If-None-Match (header): The ETag of an earlier response. A 304 with no body is returned
+                while the table is unchanged. Non-streamed responses are cached in memory by table version.
+            <column>__<operator> (str): Filters, e.g. age__gte=30 or status__in=a,b. Operators are
+                eq, ne, lt, lte, gt, gte, like, notlike, in, notin (comma-separated values) and
+                isnull (true or false). A bare <column>=<value> means eq. Unknown columns or
+                operators are rejected.
         Returns:
             A JSON object with the following keys:
                 data (list): The retrieved records.
+                next_cursor (str): Only in cursor mode. The cursor for the next page, or null on the last page.
+                total, has_more, page: Only with with_count=true.
                 status (str): The status of the request. Can be "SUCCESS" or "ERROR".
                 message (str): A message describing the status of the request.
 
@@ -41,6 +98,8 @@ def table_operations(db_name, table_name):
         Inserts data into the table.
         Parameters:
             data (list): A list of records to insert.
+            async (bool, query string): Run the insert as a background job and return a job_id
+                to poll at /jobs/<job_id>.
         Returns:
             A JSON object with the following keys:
                 status (str): The status of the request. Can be "SUCCESS" or "ERROR".
@@ -75,20 +134,101 @@ def table_operations(db_name, table_name):
                 status (str): The status of the request. Can be "SUCCESS" or "ERROR".
                 message (str): A message describing the status of the request.
                 data (list): The deleted records.
+
+    Partitioned tables (see POST /db/<db_name>/<table_name>) take the same requests. Reads
+    query the partitions in parallel and merge the results; equality filters on id or the
+    partition key only read the partitions that can match. They cannot be streamed.
     """
+    spec = partition_spec(db_name, table_name)
+
     if request.method == "GET":
-        if not table_exists(db_name, table_name):
+        if not spec and not table_exists(db_name, table_name):
             return jsonify({"status": "ERROR", "message": f"Table {table_name} does not exist in database {db_name}"}), 400
         try:
-            limit = int(request.args.get("limit", 10))
+            stream = request.args.get("stream")
+            if stream and stream not in STREAM_FORMATS:
+                return jsonify({"status": "ERROR", "message": "Invalid stream parameter"}), 400
+            if stream and spec:
+                return jsonify({"status": "ERROR", "message": "Partitioned tables cannot be streamed"}), 400
+            limit = int(request.args.get("limit", -1 if stream else 10))
             start = int(request.args.get("start", 0))
             order = request.args.get("order", "ASC").upper()
             order_by = request.args.get("orderby", "id")
             if order not in ["ASC", "DESC"]:
                 return jsonify({"status": "ERROR", "message": "Invalid order parameter"}), 400
-            where_clause, where_values = parse_where_conditions(request.args)
-            data = fetch_data(db_name, table_name, limit, start, order_by, order, where_clause, where_values)
-            return jsonify({"data": data, "status": "SUCCESS", "message": "Data Fetched Successfully"}), 200
+            # Filters and orderby are checked against the cached column list
+            columns = (spec.columns() if spec else get_columns(db_name, table_name)) or {}
+            names = {name.lower(): name for name in columns}
+            if order_by.lower() not in names:
+                return jsonify({"status": "ERROR", "message": f"Unknown column {order_by}"}), 400
+            # Rows are keyed by the column's own spelling, which the next cursor is read from
+            order_by = names[order_by.lower()]
+            filters = parse_filters(request.args, columns)
+            if spec:
+                filters = spec.normalise_filters(filters)
+            where_clause, where_values = compile_filters(filters)
+            indexes = spec.indexes_for_filters(filters) if spec else None
+            with_count = request.args.get("with_count", "false").lower() in ("1", "true", "yes")
+            equality_columns, range_columns = filter_columns(filters)
+            projection = parse_projection(request.args, columns)
+
+            if stream:
+                token = request.args.get("cursor")
+                after = decode_cursor(token, order_by) if token else None
+                query, values = build_select(table_name, limit, start, order_by, order, where_clause, where_values, after, projection)
+                started = time.perf_counter()
+                chunks = stream_query(db_name, query, values, stream)
+                # Only the time to the first row is known before the response is sent
+                record_query(db_name, table_name, equality_columns, order_by, time.perf_counter() - started, range_columns)
+                return Response(chunks, mimetype=STREAM_FORMATS[stream])
+
+            def build():
+                cursor_mode = "cursor" in request.args
+                token = request.args.get("cursor")
+                after = decode_cursor(token, order_by) if token else None
+                # The next cursor is built from id and orderby, so select them even when not asked for
+                selected = projection
+                hidden = []
+                if cursor_mode and projection:
+                    hidden = [name for name in dict.fromkeys(["id", order_by]) if name not in projection]
+                    selected = projection + hidden
+                started = time.perf_counter()
+                if spec:
+                    data = fetch_partitioned(spec, limit, 0 if cursor_mode else start, order_by, order, where_clause, where_values, after=after, columns=selected, indexes=indexes)
+                else:
+                    data = fetch_data(db_name, table_name, limit, 0 if cursor_mode else start, order_by, order, where_clause, where_values, after=after, columns=selected)
+                if isinstance(data, dict):
+                    return jsonify({"status": "ERROR", "message": data["error"]}), 400
+                # Feeds the index advisor (GET /db/<db_name>/<table_name>/indexes/recommendations)
+                if not spec:
+                    record_query(db_name, table_name, equality_columns, order_by, time.perf_counter() - started, range_columns)
+
+                result = {"data": data, "status": "SUCCESS", "message": "Data Fetched Successfully"}
+                if cursor_mode:
+                    next_cursor = encode_cursor(order_by, data[-1]) if data and len(data) == limit else None
+                    for row in data if hidden else ():
+                        for name in hidden:
+                            del row[name]
+                    result["next_cursor"] = next_cursor
+
+                if with_count:
+                    # Unfiltered totals come from the maintained per-table count, filtered ones from the count cache
+                    if spec:
+                        total = count_partitioned(spec, where_clause, where_values, indexes)
+                    else:
+                        total = count_rows(db_name, table_name, where_clause, where_values)
+                    if cursor_mode:
+                        has_more = result["next_cursor"] is not None
+                        result["page"] = {"limit": limit, "returned": len(data)}
+                    else:
+                        has_more = limit >= 0 and start + len(data) < total
+                        result["page"] = {"limit": limit, "start": start, "returned": len(data)}
+                    result["total"] = total
+                    result["has_more"] = has_more
+                return jsonify(result), 200
+
+            # Streams are never cached; everything else is served by version
+            return cached_response(db_name, table_name, "list", build, spec.version() if spec else None)
         except Exception as e:
             return jsonify({"status": "ERROR", "message": str(e)}), 400
 
@@ -98,7 +238,16 @@ def table_operations(db_name, table_name):
             if not data:
                 return jsonify({"status": "ERROR", "message": "Data is required for insertion"}), 400
 
-            result = dynamic_insert(db_name, table_name, data)
+            def insert():
+                if spec:
+                    return insert_partitioned(spec, data)
+                return dynamic_insert(db_name, table_name, data)
+
+            if async_requested(request.args):
+                job_id = submit("insert", lambda progress: insert(), db_name, table_name)
+                return job_accepted(job_id)
+
+            result = insert()
             
             # Check if result contains an error message
             if "error" in result:
@@ -119,7 +268,10 @@ def table_operations(db_name, table_name):
             where_conditions = request.get_json().get("where")
             if not update_values or not where_conditions:
                 return jsonify({"status": "ERROR", "message": "Both 'update' and 'where' conditions are required"}), 400
-            result = dynamic_update(db_name, table_name, update_values, where_conditions)
+            if spec:
+                result = dynamic_update_partitioned(spec, update_values, where_conditions)
+            else:
+                result = dynamic_update(db_name, table_name, update_values, where_conditions)
             return jsonify({"status": "SUCCESS", "message": "Data Updated Successfully", "data": result}), 200
         except Exception as e:
             return jsonify({"status": "ERROR", "message": str(e)}), 400
@@ -129,11 +281,196 @@ def table_operations(db_name, table_name):
             where_conditions = request.get_json().get("where")
             if not where_conditions:
                 return jsonify({"status": "ERROR", "message": "'where' conditions are required for deletion"}), 400
-            result = delete_data(db_name, table_name, where_conditions)
+            if spec:
+                result = delete_data_partitioned(spec, where_conditions)
+            else:
+                result = delete_data(db_name, table_name, where_conditions)
             return jsonify({"status": "SUCCESS", "message": "Data Deleted Successfully", "data": result}), 200
         except Exception as e:
             return jsonify({"status": "ERROR", "message": str(e)}), 400
 
+@op_routes.route("/<db_name>/<table_name>/aggregate", methods=["GET"])
+def aggregate(db_name, table_name):
+    """
+    Computes aggregates over a table inside SQLite.
+
+    Parameters:
+        - group_by (str, optional): Comma-separated columns to group by.
+        - agg (str, optional): Comma-separated aggregates written as <function>:<column>, e.g.
+          agg=count,sum:amount,avg:price. Functions are count, sum, avg, min and max; a bare
+          count counts rows. Each result is named <function>_<column> (or count). Default is count.
+        - having (str, optional, repeatable): Conditions on the results written as
+          <name>__<operator>:<value>, e.g. having=count__gte:10. Operators are eq, ne, lt, lte, gt and gte.
+        - orderby (str, optional): A group_by column or an aggregate name. Defaults to the group_by columns.
+        - order (str, optional): "ASC" or "DESC". Default is "ASC".
+        - limit (int, optional): The number of groups to return. Default is no limit.
+        - <column>__<operator> (str, optional): The same filters as GET /<db_name>/<table_name>,
+          applied before grouping.
+
+    Returns:
+        - JSON response containing:
+            - status (str): "SUCCESS" or "ERROR".
+            - message (str): A message describing the result of the operation.
+            - data (list): One record per group with the group_by columns and the aggregates.
+
+    Results are cached and carry an ETag like table reads. On partitioned tables every
+    partition aggregates its own rows in parallel and the partial results are combined.
+    """
+    spec = partition_spec(db_name, table_name)
+    if not spec and not table_exists(db_name, table_name):
+        return jsonify({"status": "ERROR", "message": f"Table {table_name} does not exist in database {db_name}"}), 400
+    try:
+        columns = (spec.columns() if spec else get_columns(db_name, table_name)) or {}
+        known = {name.lower(): name for name in columns}
+        group_by = []
+        for name in (item.strip() for item in request.args.get("group_by", "").split(",")):
+            if not name:
+                continue
+            if name.lower() not in known:
+                return jsonify({"status": "ERROR", "message": f"Unknown column {name}"}), 400
+            group_by.append(known[name.lower()])
+        aggregates = parse_aggregates(request.args.get("agg"), columns)
+        aliases = {alias for _, _, alias in aggregates}
+        having = parse_having(request.args.getlist("having"), aliases)
+
+        order = request.args.get("order", "ASC").upper()
+        if order not in ["ASC", "DESC"]:
+            return jsonify({"status": "ERROR", "message": "Invalid order parameter"}), 400
+        order_by = request.args.get("orderby")
+        if order_by:
+            if order_by in aliases:
+                pass
+            elif order_by.lower() in known and known[order_by.lower()] in group_by:
+                order_by = known[order_by.lower()]
+            else:
+                return jsonify({"status": "ERROR", "message": "orderby must be a group_by column or an aggregate"}), 400
+        elif group_by:
+            order_by = ", ".join(group_by)
+        limit = int(request.args.get("limit", -1))
+
+        filters = parse_filters(request.args, columns, AGGREGATE_PARAMS)
+        if spec:
+            filters = spec.normalise_filters(filters)
+        where_clause, where_values = compile_filters(filters)
+        equality_columns, range_columns = filter_columns(filters)
+        query, values = build_aggregate(table_name, group_by, aggregates, where_clause, where_values, having, order_by, order, limit)
+
+        def build():
+            started = time.perf_counter()
+            if spec:
+                data = aggregate_partitioned(
+                    spec, group_by, aggregates, where_clause, where_values, having, order_by, order, limit,
+                    spec.indexes_for_filters(filters),
+                )
+            else:
+                data = aggregate_data(db_name, query, values)
+            if isinstance(data, dict):
+                return jsonify({"status": "ERROR", "message": data["error"]}), 400
+            # Grouping benefits from the same indexes as sorting on the first group column
+            if not spec:
+                record_query(db_name, table_name, equality_columns, group_by[0] if group_by else None, time.perf_counter() - started, range_columns)
+            return jsonify({"data": data, "status": "SUCCESS", "message": "Data Aggregated Successfully"}), 200
+
+        return cached_response(db_name, table_name, "aggregate", build, spec.version() if spec else None)
+    except ValueError as e:
+        return jsonify({"status": "ERROR", "message": str(e)}), 400
+
+@op_routes.route("/<db_name>/<table_name>/ingest", methods=["POST"])
+def ingest(db_name, table_name):
+    """
+    Bulk-loads NDJSON or CSV from the request body into a table.
+
+    The body is read from the request stream in fixed-size chunks, so payloads of any
+    size can be sent in a single call. The table is created if needed and new columns
+    are added as TEXT as soon as they appear. Rows are committed in batches.
+
+    Parameters:
+        - format (str, optional): "ndjson" or "csv". Defaults to the request Content-Type
+          (application/x-ndjson or text/csv), then to "ndjson". CSV bodies start with a header row.
+        - batch_size (int, optional): Rows committed per transaction. Default is 5000.
+        - async (bool, optional): Spool the body to disk and load it in a background job.
+          The response then contains a job_id to poll at /jobs/<job_id>.
+
+    Returns:
+        - JSON response containing:
+            - status (str): "SUCCESS" or "ERROR".
+            - message (str): A message describing the result of the operation.
+            - data (dict): accepted, rejected and batches counts, and the first rejected rows
+              with their line number and error.
+    """
+    fmt = request.args.get("format") or INGEST_FORMATS.get(request.mimetype, "ndjson")
+    if fmt not in ("ndjson", "csv"):
+        return jsonify({"status": "ERROR", "message": "Invalid format parameter"}), 400
+    try:
+        batch_size = int(request.args.get("batch_size", INGEST_BATCH_SIZE))
+        if batch_size <= 0:
+            return jsonify({"status": "ERROR", "message": "batch_size must be positive"}), 400
+        if async_requested(request.args):
+            path = spool_upload(request.stream)
+
+            def run(progress):
+                with open(path, "rb") as body:
+                    return ingest_stream(db_name, table_name, body, fmt, batch_size, progress)
+
+            return job_accepted(submit("ingest", run, db_name, table_name, cleanup=[path]))
+
+        result = ingest_stream(db_name, table_name, request.stream, fmt, batch_size)
+        return jsonify({"status": "SUCCESS", "message": "Data Ingested Successfully", "data": result}), 200
+    except (sqlite3.Error, UnicodeDecodeError) as e:
+        return jsonify({"status": "ERROR", "message": str(e)}), 400
+
+@op_routes.route("/batch", methods=["POST"])
+def batch():
+    """
+    Runs several insert, update and delete operations against one database in a single
+    transaction on one connection.
+
+    This endpoint expects a JSON payload with the following keys:
+        - db_name (str): The name of the database.
+        - atomic (bool, optional): true (default) rolls back the whole batch on the first failed
+          operation. false undoes only the failed operations and commits the rest.
+        - operations (list): The operations, run in order. Each one is an object with:
+            - op (str): "insert", "update" or "delete".
+            - table (str): The table to operate on.
+            - data (list or dict): insert: the records, as for POST /<db_name>/<table_name>.
+              update by id: the new values, as for PUT /<db_name>/<table_name>/<id>.
+            - update (dict), where (dict): update/delete by condition, as for
+              PUT and DELETE /<db_name>/<table_name>.
+            - id: update/delete a single record, as for PUT and DELETE /<db_name>/<table_name>/<id>.
+
+    Tables and columns are created as needed before the transaction starts, as for the
+    single-operation endpoints; they are kept even if the batch is rolled back.
+
+    Returns:
+        - JSON response containing:
+            - status (str): "SUCCESS" if the batch was committed, "ERROR" otherwise.
+            - message (str): A message describing the result of the operation.
+            - data (list): One result per operation that ran, with its index, status and
+              inserted rowid range or rowcount, or its error message.
+    """
+    data = request.get_json(silent=True) or {}
+    db_name = data.get("db_name")
+    if not db_name:
+        return jsonify({"status": "ERROR", "message": "db_name is required"}), 400
+    if not os.path.exists(os.path.join("databases", f"{db_name}.db")):
+        return jsonify({"status": "ERROR", "message": f"Database {db_name} does not exist"}), 404
+    atomic = data.get("atomic", True)
+    try:
+        committed, results = run_batch(db_name, data.get("operations"), bool(atomic))
+    except (BatchError, sqlite3.Error) as e:
+        return jsonify({"status": "ERROR", "message": str(e)}), 400
+
+    if not committed:
+        failed = results[-1]
+        return jsonify({
+            "status": "ERROR",
+            "message": f"Batch rolled back: operation {failed['index']} failed: {failed['message']}",
+            "data": results,
+        }), 400
+    failed = sum(1 for result in results if result["status"] == "ERROR")
+    message = "Batch Executed Successfully" if not failed else f"Batch committed with {failed} failed operation(s)"
+    return jsonify({"status": "SUCCESS", "message": message, "data": results}), 200
+
 @op_routes.route('/sql', methods=['POST'])
 def execute_sql():
     """
@@ -145,6 +482,8 @@ def execute_sql():
 
     If the query is a SELECT query, the response will contain the results of the query
     as a list of dictionaries, where each dictionary represents a row in the result set.
+    An optional 'stream' key ("ndjson" or "json") streams SELECT results in chunks
+    instead of building the whole list in memory.
     If the query is not a SELECT query, the response will contain a success message
     indicating that the query was executed successfully.
 
@@ -160,24 +499,30 @@ def execute_sql():
         if not sql_query or not db_name:
             return jsonify({"status" : "ERROR", "message": "Missing SQL query or database name"}), 400
 
-        # Connect to the database
-        conn = sqlite3.connect(f"databases/{db_name}.db")
-        cursor = conn.cursor()
-        
-        # Execute the SQL query
-        cursor.execute(sql_query)
-        
-        # If it's a SELECT query, fetch the data
-        if sql_query.strip().lower().startswith("select"):
-            rows = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            result = [dict(zip(columns, row)) for row in rows]
-        else:
-            conn.commit()
-            result = {"status" : "ERROR", "message": "Query executed successfully"}
-        
-        # Close the connection
-        conn.close()
+        stream = data.get("stream")
+        if stream and sql_query.strip().lower().startswith("select"):
+            if stream not in STREAM_FORMATS:
+                return jsonify({"status" : "ERROR", "message": "Invalid stream parameter"}), 400
+            return Response(stream_query(db_name, sql_query, fmt=stream), mimetype=STREAM_FORMATS[stream])
+
+        # Borrow a connection to the database
+        with get_connection(db_name) as conn:
+            # Execute the SQL query
+            cursor = conn.execute(sql_query)
+
+            # If it's a SELECT query, fetch the data
+            if sql_query.strip().lower().startswith("select"):
+                rows = cursor.fetchall()
+                columns = [description[0] for description in cursor.description]
+                result = [dict(zip(columns, row)) for row in rows]
+            else:
+                # Raw SQL may have added or removed rows anywhere; counts are rebuilt on demand
+                forget_counts(conn)
+                conn.commit()
+                result = {"status" : "ERROR", "message": "Query executed successfully"}
+                # Raw SQL may have changed the schema or any table
+                invalidate(db_name)
+                bump(db_name)
         
         # Return the result
         return jsonify({"status" : "SUCCESS", "data" : result})
@@ -198,6 +543,8 @@ def get_by_id(db_name, table_name, id):
         db_name (str): The name of the database.
         table_name (str): The name of the table from which to retrieve the record.
         id (str): The ID of the record to retrieve.
+        fields (str, query string): Comma-separated columns to return.
+        exclude (str, query string): Comma-separated columns to leave out.
 
     Returns:
         JSON response containing:
@@ -212,29 +559,36 @@ def get_by_id(db_name, table_name, id):
         if not db_name:
             return jsonify({"status" : "ERROR", "message": "Missing database name"}), 400
 
-        # Connect to the database
-        conn = sqlite3.connect(f"databases/{db_name}.db")
-        cursor = conn.cursor()
-        
-        # Execute the SQL query
-        sql_query = f"SELECT * FROM {table_name} WHERE id = ?"
-        cursor.execute(sql_query, (id,))
-        
-        # Fetch the data
-        row = cursor.fetchone()
-        if row:
-            columns = [description[0] for description in cursor.description]
-            result = dict(zip(columns, row))
-        else:
-            result = {"status": "ERROR", "message": "Data Not Available"}
-        
-        # Close the connection
-        conn.close()
-        
-        # Return the result
-        return jsonify({ "status" : "SUCCESS", "data" : result})
+        # A record of a partitioned table can only live in the partition its id maps to;
+        # other ids are looked up (and not found) in the first partition
+        spec = partition_spec(db_name, table_name)
+        source = (spec.shard_for_id(id) or spec.shards[0]) if spec else db_name
 
-    except sqlite3.Error as e:
+        columns = get_columns(source, table_name)
+        projection = parse_projection(request.args, columns) if columns else None
+        select_list = ", ".join(projection) if projection else "*"
+
+        def build():
+            # Borrow a connection to the database
+            with get_connection(source) as conn:
+                # Execute the SQL query
+                sql_query = f"SELECT {select_list} FROM {table_name} WHERE id = ?"
+                cursor = conn.execute(sql_query, (id,))
+
+                # Fetch the data
+                row = cursor.fetchone()
+                if row:
+                    columns = [description[0] for description in cursor.description]
+                    result = dict(zip(columns, row))
+                else:
+                    result = {"status": "ERROR", "message": "Data Not Available"}
+
+            # Return the result
+            return jsonify({ "status" : "SUCCESS", "data" : result}), 200
+
+        return cached_response(db_name, table_name, f"row:{id}", build, version(source, table_name) if spec else None)
+
+    except (sqlite3.Error, ValueError) as e:
         return jsonify({"status" : "ERROR", "message": str(e)}), 400
 
 
@@ -263,20 +617,18 @@ def delete_by_id(db_name, table_name, id):
         if not os.path.exists(db_path):
             return jsonify({"status": "error", "message": f"Database {db_name} does not exist"}), 404
 
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        query = f"DELETE FROM {table_name} WHERE id = ?"
-        cursor.execute(query, (id,))
-        conn.commit()
+        spec = partition_spec(db_name, table_name)
+        if spec:
+            rowcount = delete_partitioned(spec, "id = ?", (id,), spec.indexes_for_filters([("id", "eq", [id])]))
+        else:
+            rowcount = delete_rows(db_name, table_name, "id = ?", (id,))
 
-        if cursor.rowcount == 0:
+        if rowcount == 0:
             return jsonify({"status": "error", "message": "Record not found"}), 404
 
-        conn.close()
         return jsonify({"status": "SUCCESS", "message": "Record deleted successfully"}), 200
 
-    except sqlite3.Error as e:
+    except (sqlite3.Error, ValueError) as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
 
@@ -310,24 +662,16 @@ def update_by_id(db_name, table_name, id):
         if not os.path.exists(db_path):
             return jsonify({"status": "ERROR", "message": f"Database {db_name} does not exist"}), 404
 
-        # Prepare the SET part of the SQL query
-        set_clause = ', '.join([f"{key} = ?" for key in data.keys()])
-        values = tuple(data.values())
-
-        # Prepare the full query
-        query = f"UPDATE {table_name} SET {set_clause} WHERE id = ?"
-        
         # Execute the query
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute(query, values + (id,))
-        conn.commit()
+        spec = partition_spec(db_name, table_name)
+        if spec:
+            rowcount = update_partitioned(spec, data, "id = ?", (id,), spec.indexes_for_filters([("id", "eq", [id])]))
+        else:
+            rowcount = update_rows(db_name, table_name, data, "id = ?", (id,))
 
         # Check if any rows were updated
-        if cursor.rowcount == 0:
+        if rowcount == 0:
             return jsonify({"status": "ERROR", "message": "Record not found or no changes made"}), 404
-        
-        conn.close()
 
         return jsonify({
             "status": "SUCCESS", 
@@ -1,72 +1,122 @@
+import base64
+import json
+import math
 import sqlite3
+from contextlib import ExitStack
+from functools import lru_cache
+from itertools import groupby
 from flask import jsonify
+from schema.connection import get_connection, get_dedicated_connection, retry_on_busy
+from schema.catalog import has_table, get_columns
+from schema.versions import bump
+from schema.writer import run_write
+from schema.counts import adjust_count
 from schema.db_utils import create_table, alter_table_add_column
-DB_FOLDER = "databases"
+from metrics.registry import register_collector
 
 # Helper function to execute a query and return results
 def execute_query(db_name, query, params=None, fetch=False):
     try:
-        conn = sqlite3.connect(f"{DB_FOLDER}/{db_name}.db")
-        cursor = conn.cursor()
-        cursor.execute(query, params or [])
-        if fetch:
-            result = cursor.fetchall()
-        else:
-            conn.commit()
-            result = {"message": "Query executed successfully"}
-        conn.close()
-        return result
+        return _execute(db_name, query, params, fetch)
     except sqlite3.Error as e:
         return {"error": str(e)}
 
+@retry_on_busy
+def _execute(db_name, query, params, fetch):
+    with get_connection(db_name) as conn:
+        cursor = conn.execute(query, params or [])
+        if fetch:
+            return cursor.fetchall()
+        conn.commit()
+    return {"message": "Query executed successfully"}
+
 # Helper function to check if a table exists in the database
 def table_exists(db_name, table_name):
     try:
-        conn = sqlite3.connect(f"{DB_FOLDER}/{db_name}.db")
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
-        table = cursor.fetchone()
-        conn.close()
-        return bool(table)
+        return has_table(db_name, table_name)
     except sqlite3.Error as e:
         return {"error": str(e)}
 
 
+# Helper function to insert rows on an open connection, batching runs of consecutive rows
+# with the same column set so ids follow the order of the rows.
+# The caller owns the transaction. Returns the row count and rowid range. Ids in the
+# rows are dropped unless keep_ids is set, for callers that hand out ids themselves.
+def insert_rows(conn, table_name, rows, keep_ids=False):
+    for row in rows:
+        if "id" in row and not keep_ids:
+            del row["id"]
+
+    inserted = 0
+    first_rowid = last_rowid = None
+    for columns, group in groupby(rows, key=lambda row: tuple(sorted(row.keys()))):
+        values = [tuple(row[col] for col in columns) for row in group]
+        if columns:
+            placeholders = ', '.join(['?'] * len(columns))
+            query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+        else:
+            query = f"INSERT INTO {table_name} DEFAULT VALUES"
+        conn.executemany(query, values)
+        # Rowids are handed out consecutively while this transaction holds the write lock
+        group_last = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        group_first = group_last - len(values) + 1
+        first_rowid = group_first if first_rowid is None else min(first_rowid, group_first)
+        last_rowid = group_last if last_rowid is None else max(last_rowid, group_last)
+        inserted += len(values)
+
+    if keep_ids and rows:
+        first_rowid, last_rowid = min(row["id"] for row in rows), max(row["id"] for row in rows)
+    adjust_count(conn, table_name, inserted)
+    return {"inserted": inserted, "first_rowid": first_rowid, "last_rowid": last_rowid}
+
+# Helper function to insert rows in a single all-or-nothing transaction
+def insert_batch(db_name, table_name, rows):
+    result = run_write(db_name, lambda conn: insert_rows(conn, table_name, rows))
+    bump(db_name, table_name)
+    return result
+
 # Insert data into a table
 def insert_data(db_name, table_name, data):
     try:
         if isinstance(data, dict):
             data = [data]
 
-        for row in data:
-            if "id" in row:
-                del row["id"]
-
-        columns = ', '.join(data[0].keys())
-        placeholders = ', '.join(['?'] * len(data[0]))
-        query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-        
-        for row in data:
-            values = tuple(row.values())
-            execute_query(db_name, query, values)
-        
-        return {"message": "Records inserted successfully"}
+        result = insert_batch(db_name, table_name, data)
+        return {"message": "Records inserted successfully", **result}
     except sqlite3.Error as e:
         print(str(e))
         return {"error": str(e)}
 
 
 
+# Helper function to run an UPDATE in its own write transaction; returns the rowcount
+def update_rows(db_name, table_name, update_values, where_clause, where_values):
+    set_clause = ', '.join([f"{key} = ?" for key in update_values.keys()])
+    query = f"UPDATE {table_name} SET {set_clause} WHERE {where_clause}"
+    params = tuple(update_values.values()) + tuple(where_values)
+    rowcount = run_write(db_name, lambda conn: conn.execute(query, params).rowcount)
+    bump(db_name, table_name)
+    return rowcount
+
+# Helper function to run a DELETE in its own write transaction; returns the rowcount
+def delete_rows(db_name, table_name, where_clause, where_values):
+    query = f"DELETE FROM {table_name} WHERE {where_clause}"
+    params = tuple(where_values)
+
+    def work(conn):
+        rowcount = conn.execute(query, params).rowcount
+        adjust_count(conn, table_name, -rowcount)
+        return rowcount
+
+    rowcount = run_write(db_name, work)
+    bump(db_name, table_name)
+    return rowcount
+
 # Update data in a table
 def update_data(db_name, table_name, update_values, where_conditions):
     try:
-        set_clause = ', '.join([f"{key} = ?" for key in update_values.keys()])
         where_clause = ' AND '.join([f"{key} = ?" for key in where_conditions.keys()])
-        query = f"UPDATE {table_name} SET {set_clause} WHERE {where_clause}"
-        
-        params = tuple(update_values.values()) + tuple(where_conditions.values())
-        execute_query(db_name, query, params)
-        
+        update_rows(db_name, table_name, update_values, where_clause, where_conditions.values())
         return {"message": "Record updated successfully"}
     except sqlite3.Error as e:
         return {"error": str(e)}
@@ -75,55 +125,242 @@ def update_data(db_name, table_name, update_values, where_conditions):
 def delete_data(db_name, table_name, where_conditions):
     try:
         where_clause = ' AND '.join([f"{key} = ?" for key in where_conditions.keys()])
-        query = f"DELETE FROM {table_name} WHERE {where_clause}"
-        
-        params = tuple(where_conditions.values())
-        execute_query(db_name, query, params)
-        
+        delete_rows(db_name, table_name, where_clause, where_conditions.values())
         return {"message": "Record(s) deleted successfully"}
     except sqlite3.Error as e:
         return {"error": str(e)}
 
 
-def parse_where_conditions(args):
-    conditions = []
-    values = []
-    
-    # Loop through the query parameters to identify where conditions
+# Query parameters of GET /<db>/<table> that are not column filters
+RESERVED_PARAMS = {"limit", "start", "order", "orderby", "cursor", "stream", "fields", "exclude", "with_count"}
+
+# Rows fetched from SQLite per chunk when streaming a result
+STREAM_CHUNK_SIZE = 500
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+# Operators accepted in GET filters written as <column>__<operator>=<value>; a bare
+# <column>=<value> is "eq". "in" and "notin" take comma-separated values and "isnull"
+# takes true or false.
+FILTER_OPERATORS = {
+    "eq": "=",
+    "ne": "<>",
+    "lt": "<",
+    "lte": "<=",
+    "gt": ">",
+    "gte": ">=",
+    "like": "LIKE",
+    "notlike": "NOT LIKE",
+    "in": "IN",
+    "notin": "NOT IN",
+    "isnull": "IS NULL",
+}
+# Operators an index can seek on, as leading columns and as the trailing range column
+EQUALITY_OPERATORS = {"eq", "in", "isnull"}
+RANGE_OPERATORS = {"lt", "lte", "gt", "gte"}
+
+# Distinct query shapes whose SQL is kept compiled
+QUERY_SHAPE_CACHE_SIZE = 512
+
+# Whether SQLite gives a declared column type TEXT or BLOB affinity, under which stored
+# numbers like '10' and '5' compare as text
+def _text_affinity(declared_type):
+    declared_type = (declared_type or "").upper()
+    if "INT" in declared_type:
+        return False
+    return not declared_type or any(name in declared_type for name in ("CHAR", "CLOB", "TEXT", "BLOB"))
+
+# The number a filter value spells, or None
+def _as_number(text):
+    for convert in (int, float):
+        try:
+            number = convert(text)
+        except ValueError:
+            continue
+        return number if math.isfinite(number) else None
+    return None
+
+# Parse GET filters into (column, operator, values) triples, checking columns against
+# the table's columns when they are given. A range filter with a number on a column with
+# text affinity (such as the TEXT columns created on insert) gets a numeric value, which
+# compile_filters compares numerically.
+def parse_filters(args, columns=None, reserved=RESERVED_PARAMS):
+    declared_types = columns if isinstance(columns, dict) else {}
+    known = {name.lower(): name for name in columns} if columns is not None else None
+    filters = []
     for key, value in args.items():
-        if key.endswith("_IN"):
-            column = key.replace("_IN", "")
-            values = value.strip("[]").split(",")  # Parse the array for IN condition
-            conditions.append(f"{column} IN ({','.join(['?' for _ in values])})")
-            values.extend(values)
-        elif key != 'limit' and key != 'start' and key != 'order' and key != 'orderby':  # Skip pagination and ordering params
-            column = key
-            conditions.append(f"{column} = ?")
-            values.append(value)
-
-    where_clause = " AND ".join(conditions)
-    return where_clause, values
-
-def fetch_data(db_name, table_name, limit=10, start=0, order_by="id", order="ASC", where_clause=None, where_values=None):
+        if key in reserved:
+            continue
+        if known is not None and key.lower() in known:
+            column, operator = key, "eq"
+        elif key.endswith("_IN") and "__" not in key:
+            # Older clients send column_IN=[a,b]
+            column, operator = key[:-len("_IN")], "in"
+        else:
+            column, _, operator = key.partition("__")
+            operator = operator.lower() or "eq"
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown filter operator {operator} in {key}")
+        if known is not None:
+            if column.lower() not in known:
+                raise ValueError(f"Unknown column {column}")
+            column = known[column.lower()]
+
+        if operator in ("in", "notin"):
+            values = [item.strip() for item in value.strip("[]").split(",")]
+        elif operator == "isnull":
+            if value.lower() not in ("true", "false", "1", "0"):
+                raise ValueError(f"{key} must be true or false")
+            operator = "isnull" if value.lower() in ("true", "1") else "notnull"
+            values = []
+        else:
+            values = [value]
+            if operator in RANGE_OPERATORS and column in declared_types and _text_affinity(declared_types[column]):
+                number = _as_number(value)
+                if number is not None:
+                    values = [number]
+        filters.append((column, operator, values))
+    return filters
+
+# SQL for a filter shape, compiled once per distinct ((column, operator, value count, numeric), ...)
+@lru_cache(maxsize=QUERY_SHAPE_CACHE_SIZE)
+def _compile_where(shape):
+    conditions = []
+    for column, operator, count, numeric in shape:
+        if operator == "isnull":
+            conditions.append(f"{column} IS NULL")
+        elif operator == "notnull":
+            conditions.append(f"{column} IS NOT NULL")
+        elif operator in ("in", "notin"):
+            conditions.append(f"{column} {FILTER_OPERATORS[operator]} ({','.join('?' * count)})")
+        elif numeric:
+            # Text affinity would turn the number back into text, so numeric-looking values of
+            # the column are converted instead; other text still sorts after every number
+            value = f"CASE WHEN {column} GLOB '*[0-9]*' AND {column} NOT GLOB '*[^0-9.eE+-]*' THEN CAST({column} AS NUMERIC) ELSE {column} END"
+            conditions.append(f"{value} {FILTER_OPERATORS[operator]} ?")
+        else:
+            conditions.append(f"{column} {FILTER_OPERATORS[operator]} ?")
+    return " AND ".join(conditions)
+
+def _numeric_range(operator, values):
+    return operator in RANGE_OPERATORS and isinstance(values[0], (int, float)) and not isinstance(values[0], bool)
+
+def compile_filters(filters):
+    shape = tuple((column, operator, len(values), _numeric_range(operator, values)) for column, operator, values in filters)
+    values = [value for _, _, filter_values in filters for value in filter_values]
+    return _compile_where(shape), values
+
+def parse_where_conditions(args, columns=None):
+    return compile_filters(parse_filters(args, columns))
+
+# Columns to SELECT from fields= and exclude= (comma-separated), or None for every column
+def parse_projection(args, columns):
+    fields = args.get("fields")
+    exclude = args.get("exclude")
+    if not fields and not exclude:
+        return None
+    known = {name.lower(): name for name in columns}
+
+    def resolve(names):
+        resolved = []
+        for name in (item.strip() for item in names.split(",")):
+            if not name:
+                continue
+            if name.lower() not in known:
+                raise ValueError(f"Unknown column {name}")
+            resolved.append(known[name.lower()])
+        return resolved
+
+    selected = resolve(fields) if fields else list(columns)
+    if exclude:
+        excluded = set(resolve(exclude))
+        selected = [name for name in selected if name not in excluded]
+    if not selected:
+        raise ValueError("No columns left to return")
+    return list(dict.fromkeys(selected))
+
+# Columns filters can seek an index on: (equality columns, range columns)
+def filter_columns(filters):
+    equality = [column for column, operator, _ in filters if operator in EQUALITY_OPERATORS]
+    ranges = [column for column, operator, _ in filters if operator in RANGE_OPERATORS]
+    return equality, ranges
+
+# Encode the position after a row as an opaque keyset pagination cursor
+def encode_cursor(order_by, row):
+    payload = json.dumps([order_by, row.get(order_by), row.get("id")], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(token, order_by):
     try:
-        where_condition = ""
-        values = []
+        padded = token + "=" * (-len(token) % 4)
+        cursor_order_by, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_order_by != order_by:
+        raise ValueError("Cursor was issued for a different orderby column")
+    return value, last_id
+
+# SELECT template for a query shape; keyset is None, "id", "column" or "null" (the cursor's
+# orderby value is NULL) depending on the cursor
+@lru_cache(maxsize=QUERY_SHAPE_CACHE_SIZE)
+def _select_template(table_name, where_clause, order_by, order, keyset, select_list="*"):
+    conditions = []
+
+    # Handle WHERE condition
+    if where_clause:
+        conditions.append(f"({where_clause})")
 
-        # Handle WHERE condition
-        if where_clause and where_values:
-            where_condition = f"WHERE {where_clause}"
-            values = where_values
+    # Keyset pagination seeks past the last (orderby, id) seen instead of using OFFSET.
+    # SQLite sorts NULLs first in ascending order and last in descending order, and a
+    # comparison with NULL is never true, so NULL values need their own conditions.
+    comparison = ">" if order == "ASC" else "<"
+    if keyset == "id":
+        conditions.append(f"id {comparison} ?")
+    elif keyset == "column" and order == "ASC":
+        conditions.append(f"({order_by}, id) > (?, ?)")
+    elif keyset == "column":
+        conditions.append(f"(({order_by}, id) < (?, ?) OR {order_by} IS NULL)")
+    elif keyset == "null" and order == "ASC":
+        conditions.append(f"(({order_by} IS NULL AND id > ?) OR {order_by} IS NOT NULL)")
+    elif keyset == "null":
+        conditions.append(f"({order_by} IS NULL AND id < ?)")
 
-        # Construct the final query
-        query = f"SELECT * FROM {table_name} {where_condition} ORDER BY {order_by} {order} LIMIT ? OFFSET ?"
-        values.extend([limit, start])
+    where_condition = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order_clause = f"{order_by} {order}" if order_by == "id" else f"{order_by} {order}, id {order}"
+
+    # Construct the final query
+    return f"SELECT {select_list} FROM {table_name} {where_condition} ORDER BY {order_clause} LIMIT ? OFFSET ?"
+
+# Helper function to build the SELECT used by fetch_data and the streaming reads.
+# columns limits the SELECT list; None selects every column.
+def build_select(table_name, limit=10, start=0, order_by="id", order="ASC", where_clause=None, where_values=None, after=None, columns=None):
+    values = list(where_values or [])
+    keyset = None
+    if after is not None:
+        value, last_id = after
+        if order_by == "id":
+            keyset = "id"
+            values.append(last_id)
+        elif value is None:
+            keyset = "null"
+            values.append(last_id)
+        else:
+            keyset = "column"
+            values.extend([value, last_id])
+        start = 0
+
+    select_list = ", ".join(columns) if columns else "*"
+    query = _select_template(table_name, where_clause or "", order_by, order, keyset, select_list)
+    values.extend([limit, start])
+    return query, values
+
+def fetch_data(db_name, table_name, limit=10, start=0, order_by="id", order="ASC", where_clause=None, where_values=None, after=None, columns=None):
+    try:
+        query, values = build_select(table_name, limit, start, order_by, order, where_clause, where_values, after, columns)
 
         # Execute the query
-        conn = sqlite3.connect(f"{DB_FOLDER}/{db_name}.db")
-        cursor = conn.cursor()
-        cursor.execute(query, values)
-        rows = cursor.fetchall()
-        conn.close()
+        with get_connection(db_name) as conn:
+            cursor = conn.execute(query, values)
+            rows = cursor.fetchall()
 
         # Prepare and return results as a list of dictionaries
         columns = [description[0] for description in cursor.description]
@@ -133,48 +370,182 @@ def fetch_data(db_name, table_name, limit=10, start=0, order_by="id", order="ASC
         return {"error": str(e)}
 
 
+# Query parameters of GET /<db>/<table>/aggregate that are not column filters
+AGGREGATE_PARAMS = {"group_by", "agg", "having", "orderby", "order", "limit"}
+AGGREGATE_FUNCTIONS = {"count", "sum", "avg", "min", "max"}
+HAVING_OPERATORS = {"eq", "ne", "lt", "lte", "gt", "gte"}
+
+# Parse agg=count,sum:amount,max:age into (function, column or None, alias) triples
+def parse_aggregates(value, columns):
+    known = {name.lower(): name for name in columns}
+    aggregates = []
+    for item in (part.strip() for part in (value or "count").split(",")):
+        if not item:
+            continue
+        function, _, column = item.partition(":")
+        function = function.lower()
+        if function not in AGGREGATE_FUNCTIONS:
+            raise ValueError(f"Unknown aggregate function {function}")
+        if column:
+            if column.lower() not in known:
+                raise ValueError(f"Unknown column {column}")
+            column = known[column.lower()]
+            alias = f"{function}_{column}"
+        elif function == "count":
+            column, alias = None, "count"
+        else:
+            raise ValueError(f"{function} needs a column, e.g. {function}:<column>")
+        aggregates.append((function, column, alias))
+    if not aggregates:
+        raise ValueError("At least one aggregate is required")
+    return aggregates
+
+# Parse having=<alias>__<operator>:<value> conditions on aggregate aliases
+def parse_having(values, aliases):
+    having = []
+    for item in values:
+        condition, _, value = item.partition(":")
+        alias, _, operator = condition.partition("__")
+        operator = operator.lower() or "eq"
+        if alias not in aliases:
+            raise ValueError(f"Unknown aggregate {alias} in having")
+        if operator not in HAVING_OPERATORS:
+            raise ValueError(f"Unknown having operator {operator}")
+        # Aggregates have no column affinity, so compare numbers as numbers
+        for convert in (int, float):
+            try:
+                value = convert(value)
+                break
+            except ValueError:
+                pass
+        having.append((alias, operator, value))
+    return having
+
+# SQL for an aggregate shape, compiled once like the SELECT templates
+@lru_cache(maxsize=QUERY_SHAPE_CACHE_SIZE)
+def _aggregate_template(table_name, group_by, aggregates, where_clause, having, order_by, order):
+    select_list = list(group_by)
+    for function, column, alias in aggregates:
+        select_list.append(f"{function.upper()}({column or '*'}) AS {alias}")
+    query = f"SELECT {', '.join(select_list)} FROM {table_name}"
+    if where_clause:
+        query += f" WHERE {where_clause}"
+    if group_by:
+        query += f" GROUP BY {', '.join(group_by)}"
+    if having:
+        query += " HAVING " + " AND ".join(f"{alias} {FILTER_OPERATORS[operator]} ?" for alias, operator in having)
+    if order_by:
+        query += f" ORDER BY {order_by} {order}"
+    return query + " LIMIT ?"
+
+def build_aggregate(table_name, group_by, aggregates, where_clause=None, where_values=None, having=(), order_by=None, order="ASC", limit=-1):
+    query = _aggregate_template(
+        table_name,
+        tuple(group_by),
+        tuple(aggregates),
+        where_clause or "",
+        tuple((alias, operator) for alias, operator, _ in having),
+        order_by,
+        order,
+    )
+    values = list(where_values or []) + [value for _, _, value in having] + [limit]
+    return query, values
+
+def aggregate_data(db_name, query, values):
+    try:
+        with get_connection(db_name) as conn:
+            cursor = conn.execute(query, values)
+            rows = cursor.fetchall()
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+    except sqlite3.Error as e:
+        return {"error": str(e)}
+
+
+@register_collector
+def _query_shape_metrics():
+    caches = {"where": _compile_where, "select": _select_template, "aggregate": _aggregate_template}
+    infos = {name: cache.cache_info() for name, cache in caches.items()}
+    return [
+        ("dynamic_api_query_shape_cache_hits_total", "counter", "Queries whose SQL was already compiled",
+         [({"cache": name}, info.hits) for name, info in infos.items()]),
+        ("dynamic_api_query_shape_cache_misses_total", "counter", "Queries whose SQL had to be compiled",
+         [({"cache": name}, info.misses) for name, info in infos.items()]),
+    ]
+
+
+# Helper function to run a SELECT and yield the result as encoded chunks.
+# The query runs before this returns so errors surface before any byte is sent;
+# the stream's own connection is held until the generator is exhausted or closed.
+def stream_query(db_name, query, values=None, fmt="ndjson"):
+    stack = ExitStack()
+    conn = stack.enter_context(get_dedicated_connection(db_name))
+    try:
+        cursor = conn.execute(query, values or [])
+    except BaseException:
+        stack.close()
+        raise
+
+    def generate():
+        with stack:
+            columns = [description[0] for description in cursor.description]
+            if fmt == "json":
+                yield '{"status": "SUCCESS", "data": ['
+            first = True
+            while True:
+                rows = cursor.fetchmany(STREAM_CHUNK_SIZE)
+                if not rows:
+                    break
+                encoded = [json.dumps(dict(zip(columns, row))) for row in rows]
+                if fmt == "json":
+                    yield ("" if first else ",") + ",".join(encoded)
+                else:
+                    yield "\n".join(encoded) + "\n"
+                first = False
+            if fmt == "json":
+                yield "]}"
+
+    return generate()
+
+# Helper function to create the table or add the TEXT columns that a set of rows needs
+def ensure_columns(db_name, table_name, column_names):
+    table_columns = get_columns(db_name, table_name)
+    if table_columns is None:
+        columns = [{"name": key, "type": "TEXT"} for key in column_names]
+        return create_table(db_name, table_name, columns)
+
+    for col in column_names:
+        if col not in table_columns:
+            alter_table_add_column(db_name, table_name, {"name": col, "type": "TEXT"})
+
 def dynamic_insert(db_name, table_name, data):
     if isinstance(data, dict):
         data = [data]
-    if not table_exists(db_name, table_name):
-        columns = [{"name": key, "type": "TEXT"} for key in data[0].keys()]
-        create_table(db_name, table_name, columns)
-    
-    for row in data:
-        existing_columns = set(row.keys())
-        table_columns_query = f"PRAGMA table_info({table_name})"
-        table_columns = execute_query(db_name, table_columns_query, fetch=True)
-        table_column_names = {col[1] for col in table_columns}
-        missing_columns = existing_columns - table_column_names
-        for col in missing_columns:
-            alter_table_add_column(db_name, table_name, {"name": col, "type": "TEXT"})
-    
+
+    # Work out the schema changes for the whole batch once
+    column_names = {}
     for row in data:
-        if "id" in row:
-            del row["id"]
-        columns = ', '.join(row.keys())
-        placeholders = ', '.join(['?'] * len(row))
-        query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-        execute_query(db_name, query, tuple(row.values()))
-    
-    return {"message": "Records inserted successfully"}
+        column_names.update(dict.fromkeys(row.keys()))
+    ensure_columns(db_name, table_name, list(column_names))
+
+    try:
+        result = insert_batch(db_name, table_name, data)
+    except sqlite3.Error as e:
+        return {"error": str(e)}
+
+    return {"message": "Records inserted successfully", **result}
 
 def dynamic_update(db_name, table_name, update_values, where_conditions):
     if not table_exists(db_name, table_name):
         return {"error": f"Table {table_name} does not exist in database {db_name}"}, 404
 
     existing_columns = set(update_values.keys())
-    table_columns_query = f"PRAGMA table_info({table_name})"
-    table_columns = execute_query(db_name, table_columns_query, fetch=True)
-    table_column_names = {col[1] for col in table_columns}
+    table_column_names = set(get_columns(db_name, table_name) or {})
     missing_columns = existing_columns - table_column_names
     for col in missing_columns:
         alter_table_add_column(db_name, table_name, {"name": col, "type": "TEXT"})
 
-    set_clause = ', '.join([f"{key} = ?" for key in update_values.keys()])
     where_clause = ' AND '.join([f"{key} = ?" for key in where_conditions.keys()])
-    query = f"UPDATE {table_name} SET {set_clause} WHERE {where_clause}"
-    params = tuple(update_values.values()) + tuple(where_conditions.values())
-    execute_query(db_name, query, params)
-    
+    update_rows(db_name, table_name, update_values, where_clause, where_conditions.values())
+
     return {"message": "Record updated successfully"}
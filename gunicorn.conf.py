@@ -0,0 +1,32 @@
+# Production server settings; every value can be overridden from the environment.
+#
+#   gunicorn --config gunicorn.conf.py
+#
+# Each worker is a separate process with its own connection pools, caches and job
+# threads. SQLite serialises writers per database file, so extra workers mostly add read
+# throughput; concurrent writers wait on busy_timeout and are retried (DB_BUSY_RETRIES).
+import multiprocessing
+import os
+
+wsgi_app = "main:create_app()"
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+# Worker processes
+workers = int(os.environ.get("GUNICORN_WORKERS", os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count())))
+# Threads per worker; more than one switches gunicorn to the gthread worker
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+# Import the app once in the master before forking. Workers share its memory pages and
+# start faster; connections opened before the fork are never reused by a worker.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "false").lower() in ("1", "true", "yes")
+# Seconds a request may run; large uploads and synchronous schema changes take a while
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+# Restart a worker after this many requests (0 disables), with jitter so they do not restart together
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 0))
+
+# An empty GUNICORN_ACCESS_LOG turns the access log off
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = os.environ.get("GUNICORN_ERROR_LOG", "-")
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
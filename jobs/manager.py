@@ -0,0 +1,202 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from schema.connection import DB_FOLDER, get_path_connection, retry_on_busy
+
+JOBS_FOLDER = os.path.join(DB_FOLDER, "_jobs")
+JOBS_DB = os.path.join(JOBS_FOLDER, "jobs.db")
+UPLOADS_FOLDER = os.path.join(JOBS_FOLDER, "uploads")
+
+# Background jobs run on this many threads per process
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+# Minimum seconds between two progress writes of the same job
+PROGRESS_INTERVAL = 0.5
+
+_executor = None
+_init_lock = threading.Lock()
+
+
+# Threads do not survive a fork; a forked worker starts its own job pool on first use
+def _reset_after_fork():
+    global _executor, _init_lock
+    _executor = None
+    _init_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _get_executor():
+    global _executor
+    with _init_lock:
+        if _executor is None:
+            os.makedirs(UPLOADS_FOLDER, exist_ok=True)
+            with get_path_connection(JOBS_DB) as conn:
+                conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT,
+                    status TEXT,
+                    db_name TEXT,
+                    table_name TEXT,
+                    pid INTEGER,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+                """)
+                # Jobs left behind by a process that no longer exists will never finish
+                stale = conn.execute("SELECT id, pid FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+                for job_id, pid in stale:
+                    if pid != os.getpid() and not _pid_alive(pid):
+                        conn.execute(
+                            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                            ("Interrupted: the worker process exited", _now(), job_id),
+                        )
+                conn.commit()
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+        return _executor
+
+
+# Every worker process writes to the same jobs database
+@retry_on_busy
+def _update(job_id, **fields):
+    assignments = ", ".join(f"{key} = ?" for key in fields)
+    with get_path_connection(JOBS_DB) as conn:
+        conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", tuple(fields.values()) + (job_id,))
+        conn.commit()
+
+
+# Progress callback handed to job functions as progress(done, total)
+class JobProgress:
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.state = {"rows_done": 0, "rows_total": None, "percent": None}
+        self._written_at = 0
+
+    def __call__(self, done, total=None):
+        self.state["rows_done"] = done
+        if total is not None:
+            self.state["rows_total"] = total
+        total = self.state["rows_total"]
+        self.state["percent"] = round(100.0 * done / total, 1) if total else None
+        if time.monotonic() - self._written_at >= PROGRESS_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        self._written_at = time.monotonic()
+        _update(self.job_id, progress=json.dumps(self.state))
+
+
+def _run(job_id, func, cleanup):
+    progress = JobProgress(job_id)
+    _update(job_id, status="running", started_at=_now())
+    try:
+        result = func(progress)
+        # Helpers return either a dict or a (dict, status_code) tuple
+        if isinstance(result, tuple):
+            result = result[0]
+        progress.flush()
+        failed = isinstance(result, dict) and "error" in result
+        _update(
+            job_id,
+            status="failed" if failed else "succeeded",
+            result=json.dumps(result, default=str),
+            error=result["error"] if failed else None,
+            finished_at=_now(),
+        )
+    except Exception as e:
+        _update(job_id, status="failed", error=str(e), finished_at=_now())
+    finally:
+        for path in cleanup:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+@retry_on_busy
+def _insert_job(job_id, kind, db_name, table_name):
+    with get_path_connection(JOBS_DB) as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, status, db_name, table_name, pid, progress, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, "queued", db_name, table_name, os.getpid(),
+             json.dumps({"rows_done": 0, "rows_total": None, "percent": None}), _now()),
+        )
+        conn.commit()
+
+
+# Queue func(progress) on the job pool and return the new job id.
+# Files listed in cleanup are removed once the job has finished.
+def submit(kind, func, db_name=None, table_name=None, cleanup=()):
+    executor = _get_executor()
+    job_id = uuid.uuid4().hex
+    _insert_job(job_id, kind, db_name, table_name)
+    executor.submit(_run, job_id, func, list(cleanup))
+    return job_id
+
+
+def _to_dict(row, columns):
+    job = dict(zip(columns, row))
+    for key in ("progress", "result"):
+        if job[key] is not None:
+            job[key] = json.loads(job[key])
+    return job
+
+
+def get_job(job_id):
+    _get_executor()
+    with get_path_connection(JOBS_DB) as conn:
+        cursor = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        row = cursor.fetchone()
+        columns = [description[0] for description in cursor.description]
+    return _to_dict(row, columns) if row else None
+
+
+def list_jobs(limit=50, status=None):
+    _get_executor()
+    query = "SELECT * FROM jobs"
+    params = []
+    if status:
+        query += " WHERE status = ?"
+        params.append(status)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    params.append(limit)
+    with get_path_connection(JOBS_DB) as conn:
+        cursor = conn.execute(query, params)
+        rows = cursor.fetchall()
+        columns = [description[0] for description in cursor.description]
+    return [_to_dict(row, columns) for row in rows]
+
+
+# Copy a request or upload stream to disk so a job can read it after the request has ended
+def spool_upload(stream, suffix=""):
+    _get_executor()
+    path = os.path.join(UPLOADS_FOLDER, uuid.uuid4().hex + suffix)
+    with open(path, "wb") as target:
+        shutil.copyfileobj(stream, target, 1024 * 1024)
+    return path
+
+
+def async_requested(args):
+    return str(args.get("async", "")).lower() in ("1", "true", "yes")
@@ -0,0 +1,52 @@
+from flask import Blueprint, request, jsonify
+from jobs.manager import get_job, list_jobs
+
+job_routes = Blueprint("job_routes", __name__)
+
+
+# Response returned by any endpoint called with ?async=true
+def job_accepted(job_id):
+    return jsonify({
+        "status": "SUCCESS",
+        "message": "Job submitted",
+        "job_id": job_id,
+        "url": f"/jobs/{job_id}"
+    }), 202
+
+
+@job_routes.route("/", methods=["GET"])
+def route_list_jobs():
+    """
+    Lists the most recent background jobs.
+
+    Parameters:
+        - limit (int, optional): The number of jobs to return. Default is 50.
+        - status (str, optional): Only return jobs in this state ("queued", "running", "succeeded" or "failed").
+
+    Returns:
+        - JSON response containing:
+            - status (str): "SUCCESS".
+            - data (list): The jobs, newest first.
+    """
+    limit = request.args.get("limit", 50, type=int)
+    return jsonify({"status": "SUCCESS", "data": list_jobs(limit, request.args.get("status"))})
+
+
+@job_routes.route("/<job_id>", methods=["GET"])
+def route_get_job(job_id):
+    """
+    Retrieves the state of a background job.
+
+    Parameters:
+        - job_id (str): The id returned when the job was submitted.
+
+    Returns:
+        - JSON response containing:
+            - status (str): "SUCCESS" if the job exists, "ERROR" otherwise.
+            - data (dict): The job, with its status ("queued", "running", "succeeded" or "failed"),
+              progress (rows_done, rows_total, percent), result and error.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"status": "ERROR", "message": f"Job {job_id} not found"}), 404
+    return jsonify({"status": "SUCCESS", "data": job})
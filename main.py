@@ -1,34 +1,71 @@
 import os
-from flask import Flask, jsonify
+import time
+from flask import Flask, jsonify, request, g, Response, current_app
 from flask_cors import CORS
 from schema.db_routes import db_routes
 from db_operations.routes import op_routes
 from media_operations.docs_routes import docs_routes
+from jobs.routes import job_routes
+from metrics.registry import REQUEST_LATENCY, render
+from metrics.routes import admin_routes
 
 
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "*"}})
+# Hooks and routes of the app itself; create_app wires them up
+def start_timer():
+    g.request_started = time.perf_counter()
 
-app.register_blueprint(db_routes, url_prefix="/db")
-app.register_blueprint(op_routes, url_prefix="/")
-app.register_blueprint(docs_routes, url_prefix="/media")
+def record_request(response):
+    started = getattr(g, "request_started", None)
+    if started is not None:
+        # Label by URL rule, not path, so /<db_name>/<table_name> is one series
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - started, request.method, route, str(response.status_code))
+    return response
+
+def metrics():
+    """
+    Exposes request latency, SQLite statement timings, row and connection counters and
+    cache statistics of this process in the Prometheus text format.
+    """
+    return Response(render(), mimetype="text/plain; version=0.0.4")
 
-@app.route("/")
 def hello_world():
     name = os.environ.get("NAME", "World")
     return f"Hello {name}!"
 
-@app.route('/routes', methods=['GET'])
 def list_routes():
     routes = []
-    for rule in app.url_map.iter_rules():
+    for rule in current_app.url_map.iter_rules():
         routes.append({
             "methods": list(rule.methods),
             "rule": rule.rule
         })
     return jsonify(routes)
 
-if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+def create_app():
+    """
+    Builds the Flask application. Production servers load it through the factory, e.g.
+    gunicorn with "main:create_app()" (see gunicorn.conf.py); the module-level app below
+    serves the development server and `flask --app main run`.
+    """
+    app = Flask(__name__)
+    CORS(app, resources={r"/*": {"origins": "*"}})
+
+    app.register_blueprint(db_routes, url_prefix="/db")
+    app.register_blueprint(op_routes, url_prefix="/")
+    app.register_blueprint(docs_routes, url_prefix="/media")
+    app.register_blueprint(job_routes, url_prefix="/jobs")
+    app.register_blueprint(admin_routes, url_prefix="/admin")
 
+    app.before_request(start_timer)
+    app.after_request(record_request)
 
+    app.add_url_rule("/metrics", view_func=metrics, methods=["GET"])
+    app.add_url_rule("/", view_func=hello_world)
+    app.add_url_rule("/routes", view_func=list_routes, methods=["GET"])
+    return app
+
+app = create_app()
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=5000, debug=True)
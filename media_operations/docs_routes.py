@@ -1,18 +1,147 @@
 import os
+import json
 import uuid
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from openpyxl import load_workbook
+from db_operations.ingest import ingest_rows, INGEST_BATCH_SIZE
+from db_operations.utils import STREAM_FORMATS
+from jobs.manager import submit, async_requested, spool_upload
+from jobs.routes import job_accepted
 
 docs_routes = Blueprint("docs_routes", __name__)
 
 UPLOAD_FOLDER = "uploads/documents"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+REQUIRED_COLUMNS = {"firstName", "lastName", "emailAddress"}
+
 def generate_random_id():
     return str(uuid.uuid4())
 
+# Map a spreadsheet row to the user object returned by the API
+def map_row(header, row):
+    row_data = dict(zip(header, row))
+    return {
+        "id": generate_random_id(),
+        "firstName": row_data.get("firstName", ""),
+        "lastName": row_data.get("lastName", ""),
+        "emailAddress": row_data.get("emailAddress", ""),
+        "phoneNumber": row_data.get("phoneNumber", ""),
+        "isAdmin": False,
+        "isActive": False,
+        "isDeleted": False
+    }
+
+# Encode mapped rows as NDJSON lines or as the usual JSON envelope, one row at a time
+def encode_rows(rows, fmt):
+    if fmt == "json":
+        yield '{"status": "SUCCESS", "message": "SUCCESS", "data": ['
+    for index, row in enumerate(rows):
+        encoded = json.dumps(row, default=str)
+        if fmt == "json":
+            yield encoded if index == 0 else "," + encoded
+        else:
+            yield encoded + "\n"
+    if fmt == "json":
+        yield "]}"
+
+# Insert the mapped rows of a spooled workbook into db_name/table_name; runs as a background job
+def import_excel(path, db_name, table_name, batch_size, progress=None):
+    workbook = load_workbook(path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return {"error": "Excel sheet is empty"}
+        if not REQUIRED_COLUMNS.issubset(set(header)):
+            return {"error": "Missing required columns"}
+        records = ((line_number, map_row(header, row), None) for line_number, row in enumerate(rows, start=2))
+        return ingest_rows(db_name, table_name, records, batch_size, progress)
+    finally:
+        workbook.close()
+
+# Read the workbook in read-only mode straight from the upload stream. Rows are mapped
+# lazily and either streamed back or inserted into db_name/table_name in batches.
+def process_excel_stream(file, stream, db_name, table_name, batch_size):
+    try:
+        workbook = load_workbook(file.stream, read_only=True)
+    except Exception as e:
+        return jsonify({
+            "status": "ERROR",
+            "message": "Error processing Excel file",
+            "error": [str(e)]
+        }), 500
+
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            workbook.close()
+            return jsonify({
+                "status": "ERROR",
+                "message": "Excel sheet is empty",
+                "error": []
+            }), 400
+
+        if not REQUIRED_COLUMNS.issubset(set(header)):
+            workbook.close()
+            return jsonify({
+                "status": "ERROR",
+                "message": "Missing required columns",
+                "error": []
+            }), 400
+
+        # Spreadsheet row numbers start at 1 for the header
+        records = ((line_number, map_row(header, row), None) for line_number, row in enumerate(rows, start=2))
+
+        if db_name and table_name:
+            try:
+                summary = ingest_rows(db_name, table_name, records, batch_size)
+            finally:
+                workbook.close()
+            return jsonify({
+                "status": "SUCCESS",
+                "message": "SUCCESS",
+                "data": summary
+            }), 200
+
+        def generate():
+            try:
+                yield from encode_rows((row for _, row, _ in records), stream)
+            finally:
+                workbook.close()
+
+        return Response(stream_with_context(generate()), mimetype=STREAM_FORMATS[stream])
+
+    except Exception as e:
+        workbook.close()
+        return jsonify({
+            "status": "ERROR",
+            "message": "Error processing Excel file",
+            "error": [str(e)]
+        }), 500
+
 @docs_routes.route("/docs", methods=["POST"])
 def upload_and_process_excel():
+    """
+    Converts the first sheet of an uploaded Excel file into user objects.
+
+    Parameters:
+        - file (file): The .xlsx upload. The header row must contain firstName, lastName and emailAddress.
+        - stream (str, optional): "ndjson" or "json". Reads the workbook in read-only mode straight
+          from the upload and streams the mapped rows back instead of building one large array.
+        - db, table (str, optional): Write the mapped rows into this table in batched transactions
+          instead of returning them. Implies the streaming reader. May be sent as query or form fields.
+        - batch_size (int, optional): Rows per transaction when writing to a table. Default is 5000.
+        - async (bool, optional): With db and table, spool the upload and import it in a background
+          job. The response then contains a job_id to poll at /jobs/<job_id>.
+
+    Returns:
+        - JSON response containing:
+            - status (str): "SUCCESS" or "ERROR".
+            - message (str): A message describing the result of the operation.
+            - data (list or dict): The mapped rows, or the accepted/rejected summary when writing to a table.
+    """
     if "file" not in request.files:
         return jsonify({
             "status": "ERROR",
@@ -35,6 +164,42 @@ def upload_and_process_excel():
             "error": []
         }), 400
 
+    stream = request.values.get("stream")
+    db_name = request.values.get("db")
+    table_name = request.values.get("table")
+    if stream and stream not in STREAM_FORMATS:
+        return jsonify({
+            "status": "ERROR",
+            "message": "Invalid stream parameter",
+            "error": []
+        }), 400
+    if bool(db_name) != bool(table_name):
+        return jsonify({
+            "status": "ERROR",
+            "message": "Both db and table are required to write rows to a table",
+            "error": []
+        }), 400
+    if stream or db_name:
+        try:
+            batch_size = int(request.values.get("batch_size", INGEST_BATCH_SIZE))
+        except ValueError:
+            return jsonify({
+                "status": "ERROR",
+                "message": "Invalid batch_size parameter",
+                "error": []
+            }), 400
+        if db_name and async_requested(request.args):
+            path = spool_upload(file.stream, os.path.splitext(file.filename)[1])
+            job_id = submit(
+                "excel_import",
+                lambda progress: import_excel(path, db_name, table_name, batch_size, progress),
+                db_name,
+                table_name,
+                cleanup=[path],
+            )
+            return job_accepted(job_id)
+        return process_excel_stream(file, stream or "ndjson", db_name, table_name, batch_size)
+
     file_path = os.path.join(UPLOAD_FOLDER, file.filename)
     try:
         file.save(file_path)
@@ -60,8 +225,7 @@ def upload_and_process_excel():
 
         # Extract header and validate
         header = rows[0]
-        required_columns = {"firstName", "lastName", "emailAddress"}
-        if not required_columns.issubset(set(header)):
+        if not REQUIRED_COLUMNS.issubset(set(header)):
             return jsonify({
                 "status": "ERROR",
                 "message": "Missing required columns",
@@ -69,19 +233,7 @@ def upload_and_process_excel():
             }), 400
 
         # Map rows to objects
-        data = []
-        for row in rows[1:]:
-            row_data = dict(zip(header, row))
-            data.append({
-                "id": generate_random_id(),
-                "firstName": row_data.get("firstName", ""),
-                "lastName": row_data.get("lastName", ""),
-                "emailAddress": row_data.get("emailAddress", ""),
-                "phoneNumber": row_data.get("phoneNumber", ""),
-                "isAdmin": False,
-                "isActive": False,
-                "isDeleted": False
-            })
+        data = [map_row(header, row) for row in rows[1:]]
 
         return jsonify({
             "status": "SUCCESS",
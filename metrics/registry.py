@@ -0,0 +1,119 @@
+import threading
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics = []
+_collectors = []
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = f"{name}_total"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            yield self.name, _format_labels(self.labelnames, labelvalues), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._values = {}  # labelvalues -> [bucket counts..., sum]
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, *labelvalues):
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [0] * len(self.buckets) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labelvalues, list(state)) for labelvalues, state in self._values.items()]
+        for labelvalues, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, labelvalues, [("le", _format_value(bound))]), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labelvalues), state[-1]
+            yield f"{self.name}_count", _format_labels(self.labelnames, labelvalues), cumulative
+
+
+# Register a function called at scrape time that returns
+# [(name, kind, documentation, [(labels dict, value), ...]), ...]; used for values that
+# already live elsewhere, such as cache and pool statistics
+def register_collector(func):
+    _collectors.append(func)
+    return func
+
+
+# All metrics of this process in the Prometheus text exposition format
+def render():
+    lines = []
+    for metric in _metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+    for collector in _collectors:
+        for name, kind, documentation, samples in collector():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_LATENCY = Histogram(
+    "dynamic_api_request_duration_seconds",
+    "Time spent handling HTTP requests, by route",
+    ("method", "route", "status"),
+)
+STATEMENT_DURATION = Histogram(
+    "dynamic_api_sqlite_statement_duration_seconds",
+    "Time spent executing SQLite statements, by statement type",
+    ("operation",),
+)
+ROWS_READ = Counter("dynamic_api_sqlite_rows_read", "Rows fetched from SQLite", ("operation",))
+ROWS_WRITTEN = Counter("dynamic_api_sqlite_rows_written", "Rows inserted, updated or deleted in SQLite", ("operation",))
+CONNECTIONS_OPENED = Counter("dynamic_api_sqlite_connections_opened", "SQLite connections opened by the pools")
+CONNECTIONS_CLOSED = Counter("dynamic_api_sqlite_connections_closed", "SQLite connections closed by the pools")
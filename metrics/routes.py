@@ -0,0 +1,56 @@
+from flask import Blueprint, request, jsonify
+from metrics import slow_queries
+
+admin_routes = Blueprint("admin_routes", __name__)
+
+
+@admin_routes.route("/slow_queries", methods=["GET", "DELETE"])
+def route_slow_queries():
+    """
+    Shows or clears the slow-query log of this process.
+
+    Every statement that takes at least the configured threshold, including the time spent
+    reading its rows, is recorded with its SQL, the types of its bound parameters, its
+    duration, the rows it returned or wrote and the EXPLAIN QUERY PLAN output. A plan
+    step starting with SCAN reads a whole table or index and is flagged as full_scan.
+
+    Parameters:
+        - limit (int, optional): The number of entries to return, newest first. Default is all.
+        - full_scan (bool, optional): Only return statements whose plan contains a full scan.
+
+    Returns:
+        - JSON response containing:
+            - status (str): "SUCCESS".
+            - settings (dict): The threshold in milliseconds, the ring buffer size and the log file.
+            - data (list): The logged statements, newest first.
+    """
+    if request.method == "DELETE":
+        slow_queries.clear()
+        return jsonify({"status": "SUCCESS", "message": "Slow-query log cleared"})
+
+    limit = request.args.get("limit", type=int)
+    data = slow_queries.entries(limit if not request.args.get("full_scan") else None)
+    if request.args.get("full_scan", "").lower() in ("1", "true", "yes"):
+        data = [entry for entry in data if entry["full_scan"]][:limit]
+    return jsonify({"status": "SUCCESS", "settings": slow_queries.settings(), "data": data})
+
+
+@admin_routes.route("/slow_queries/settings", methods=["GET", "PUT"])
+def route_slow_query_settings():
+    """
+    Shows or changes the slow-query threshold of this process.
+
+    PUT expects a JSON payload with:
+        - threshold_ms (number): Log statements taking at least this many milliseconds.
+          0 logs every statement; a negative value turns the log off.
+
+    Returns:
+        - JSON response containing the current settings.
+    """
+    if request.method == "PUT":
+        data = request.get_json(silent=True) or {}
+        try:
+            return jsonify(slow_queries.update_settings(data.get("threshold_ms")))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    return jsonify(slow_queries.settings())
@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+# Statements taking at least this many milliseconds are logged; a negative value turns the log off
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 200))
+# Entries kept in memory for GET /admin/slow_queries
+SLOW_QUERY_LOG_SIZE = int(os.environ.get("SLOW_QUERY_LOG_SIZE", 200))
+# Optional JSON-lines file, rotated at SLOW_QUERY_LOG_MAX_BYTES with SLOW_QUERY_LOG_BACKUPS old files
+SLOW_QUERY_LOG_FILE = os.environ.get("SLOW_QUERY_LOG_FILE")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get("SLOW_QUERY_LOG_MAX_BYTES", 10 * 1024 * 1024))
+SLOW_QUERY_LOG_BACKUPS = int(os.environ.get("SLOW_QUERY_LOG_BACKUPS", 5))
+# Longest SQL text kept per entry
+MAX_SQL_LENGTH = 2000
+
+# Statements EXPLAIN QUERY PLAN can describe
+EXPLAINABLE = {"select", "with", "insert", "update", "delete", "replace"}
+
+_settings = {"threshold_ms": SLOW_QUERY_THRESHOLD_MS}
+_entries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+_lock = threading.Lock()
+_logger = None
+
+
+def _file_logger():
+    global _logger
+    if _logger is None and SLOW_QUERY_LOG_FILE:
+        logger = logging.getLogger("dynamic_api.slow_queries")
+        logger.propagate = False
+        handler = RotatingFileHandler(SLOW_QUERY_LOG_FILE, maxBytes=SLOW_QUERY_LOG_MAX_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        _logger = logger
+    return _logger
+
+
+def threshold_ms():
+    return _settings["threshold_ms"]
+
+
+def is_slow(elapsed):
+    threshold = _settings["threshold_ms"]
+    return threshold >= 0 and elapsed * 1000 >= threshold
+
+
+# Types of the bound parameters, never their values
+def parameter_shape(parameters):
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    shape = [type(value).__name__ for value in parameters]
+    if len(shape) > 20:
+        return shape[:20] + [f"... {len(shape) - 20} more"]
+    return shape
+
+
+# Ask SQLite how it runs a statement; conn must not be instrumented, or this would recurse
+def explain(cursor, sql, parameters):
+    try:
+        rows = cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parameters or ()).fetchall()
+    except Exception:
+        return None
+    return [row[3] for row in rows]
+
+
+# Start an entry for a slow statement; the caller keeps updating its duration and row
+# counts while the result is read and calls finish() once it is done
+def start(database, operation, sql, parameters, elapsed, plan=None):
+    entry = {
+        "time": datetime.now(timezone.utc).isoformat(),
+        "database": database,
+        "operation": operation,
+        "sql": sql if len(sql) <= MAX_SQL_LENGTH else sql[:MAX_SQL_LENGTH] + "...",
+        "parameters": parameter_shape(parameters),
+        "duration_ms": round(elapsed * 1000, 3),
+        "rows_returned": 0,
+        "rows_written": 0,
+        "plan": plan,
+        # A SCAN step reads a whole table or index; SEARCH steps seek
+        "full_scan": any(step.startswith("SCAN") for step in plan) if plan else None,
+    }
+    with _lock:
+        _entries.append(entry)
+    return entry
+
+
+def finish(entry):
+    logger = _file_logger()
+    if logger is not None:
+        with _lock:
+            line = json.dumps(entry)
+        logger.info(line)
+
+
+def entries(limit=None):
+    with _lock:
+        result = list(_entries)
+    result.reverse()
+    return result[:limit] if limit else result
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def update_settings(threshold):
+    if isinstance(threshold, bool) or not isinstance(threshold, (int, float)):
+        raise ValueError("threshold_ms must be a number")
+    _settings["threshold_ms"] = float(threshold)
+    return settings()
+
+
+def settings():
+    return {
+        "threshold_ms": _settings["threshold_ms"],
+        "log_size": SLOW_QUERY_LOG_SIZE,
+        "log_file": SLOW_QUERY_LOG_FILE,
+    }
@@ -0,0 +1,124 @@
+import os
+import threading
+from schema.db_utils import create_index, list_indexes
+from jobs.manager import submit
+
+# Reads of a query shape needed before an index is recommended for it
+INDEX_ADVISOR_MIN_QUERIES = int(os.environ.get("INDEX_ADVISOR_MIN_QUERIES", 20))
+# Average latency in milliseconds a query shape must reach before an index is recommended
+INDEX_ADVISOR_MIN_MS = float(os.environ.get("INDEX_ADVISOR_MIN_MS", 20))
+# Create recommended indexes automatically, as background jobs, once both thresholds are met
+INDEX_AUTO_CREATE = os.environ.get("INDEX_AUTO_CREATE", "false").lower() in ("1", "true", "yes")
+# Distinct query shapes remembered per table
+MAX_SHAPES_PER_TABLE = 256
+
+_workload = {}
+_auto_created = set()
+_lock = threading.Lock()
+
+
+class _ShapeStats:
+    def __init__(self):
+        self.queries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, elapsed_ms):
+        self.queries += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.queries if self.queries else 0.0
+
+
+# Shape of a read: the equality-filtered columns (their order does not matter) and the one
+# column an index can range-scan after them, which is a range filter if any, else the sort column
+def _shape(filter_columns, order_by, range_columns=()):
+    filters = tuple(sorted(set(filter_columns) - {"id"}))
+    ranges = sorted(set(range_columns) - {"id"} - set(filters))
+    sort = ranges[0] if ranges else order_by
+    sort = sort if sort and sort != "id" and sort not in filters else None
+    return filters, sort
+
+
+def _index_columns(shape):
+    filters, sort = shape
+    return list(filters) + ([sort] if sort else [])
+
+
+def _covered(shape, indexes):
+    filters, sort = shape
+    wanted = {column.lower() for column in filters}
+    for index in indexes:
+        columns = [(column or "").lower() for column in index["columns"]]
+        if set(columns[:len(wanted)]) != wanted:
+            continue
+        if sort is None or columns[len(wanted):len(wanted) + 1] == [sort.lower()]:
+            return True
+    return False
+
+
+def _qualifies(stats):
+    return stats.queries >= INDEX_ADVISOR_MIN_QUERIES and stats.avg_ms >= INDEX_ADVISOR_MIN_MS
+
+
+# Record one filtered or sorted read of a table and how long it took
+def record_query(db_name, table_name, filter_columns, order_by, elapsed, range_columns=()):
+    shape = _shape(filter_columns, order_by, range_columns)
+    if not _index_columns(shape):
+        # Plain reads by id use the rowid and need no index
+        return
+    with _lock:
+        shapes = _workload.setdefault((db_name, table_name), {})
+        stats = shapes.get(shape)
+        if stats is None:
+            if len(shapes) >= MAX_SHAPES_PER_TABLE:
+                return
+            stats = shapes[shape] = _ShapeStats()
+        stats.add(elapsed * 1000)
+        auto_create = INDEX_AUTO_CREATE and _qualifies(stats) and (db_name, table_name, shape) not in _auto_created
+        if auto_create:
+            _auto_created.add((db_name, table_name, shape))
+
+    if auto_create:
+        indexes = list_indexes(db_name, table_name)
+        if isinstance(indexes, dict) and not _covered(shape, indexes["indexes"]):
+            submit("create_index", lambda progress: create_index(db_name, table_name, _index_columns(shape)), db_name, table_name)
+
+
+# Indexes worth creating for a table, most expensive query shape first
+def recommendations(db_name, table_name):
+    indexes = list_indexes(db_name, table_name)
+    if not isinstance(indexes, dict):
+        return indexes
+    with _lock:
+        shapes = [(shape, stats) for shape, stats in _workload.get((db_name, table_name), {}).items()]
+
+    wanted = [shape for shape, stats in shapes if _qualifies(stats) and not _covered(shape, indexes["indexes"])]
+    result = {}
+    for shape, stats in shapes:
+        if shape not in wanted:
+            continue
+        # Count the shape towards the widest recommended index that also serves it
+        covering = [other for other in wanted if _covered(shape, [{"columns": _index_columns(other)}])]
+        columns = max((_index_columns(other) for other in covering), key=len)
+        item = result.setdefault(tuple(columns), {"columns": columns, "queries": 0, "avg_ms": 0.0, "max_ms": 0.0, "total_ms": 0.0})
+        item["queries"] += stats.queries
+        item["total_ms"] = round(item["total_ms"] + stats.total_ms, 3)
+        item["max_ms"] = round(max(item["max_ms"], stats.max_ms), 3)
+        item["avg_ms"] = round(item["total_ms"] / item["queries"], 3)
+    result = list(result.values())
+    result.sort(key=lambda item: item["total_ms"], reverse=True)
+    return {"recommendations": result, "workload": workload(db_name, table_name), "auto_create": INDEX_AUTO_CREATE}
+
+
+# Observed query shapes of a table, whether or not they need an index
+def workload(db_name, table_name):
+    with _lock:
+        shapes = list(_workload.get((db_name, table_name), {}).items())
+    return [
+        {"columns": _index_columns(shape), "queries": stats.queries, "avg_ms": round(stats.avg_ms, 3), "max_ms": round(stats.max_ms, 3)}
+        for shape, stats in shapes
+    ]
@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+from schema.connection import get_connection
+
+# Seconds a cached schema is trusted before PRAGMA schema_version is checked again.
+# DDL issued through this API invalidates the cache immediately; the interval only
+# bounds how long a change made by another process can go unnoticed.
+SCHEMA_RECHECK_INTERVAL = float(os.environ.get("SCHEMA_RECHECK_INTERVAL", 1.0))
+
+# SQLite keeps its own tables (sqlite_sequence, sqlite_stat1 from ANALYZE) under this prefix
+SQLITE_TABLE_PREFIX = "sqlite_"
+
+_catalog = {}
+_lock = threading.Lock()
+
+
+class _DatabaseSchema:
+    def __init__(self, version, tables):
+        self.version = version
+        self.tables = tables
+        self.columns = {}
+        self.checked_at = time.monotonic()
+
+
+def is_sqlite_table(table_name):
+    return table_name.lower().startswith(SQLITE_TABLE_PREFIX)
+
+
+def _schema_version(conn):
+    return conn.execute("PRAGMA schema_version").fetchone()[0]
+
+
+def _load(db_name):
+    with get_connection(db_name) as conn:
+        version = _schema_version(conn)
+        rows = conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+    entry = _DatabaseSchema(version, {row[0] for row in rows})
+    with _lock:
+        _catalog[db_name] = entry
+    return entry
+
+
+def _get_entry(db_name, force_check=False):
+    with _lock:
+        entry = _catalog.get(db_name)
+    if entry is None:
+        return _load(db_name)
+    if force_check or time.monotonic() - entry.checked_at > SCHEMA_RECHECK_INTERVAL:
+        with get_connection(db_name) as conn:
+            version = _schema_version(conn)
+        if version != entry.version:
+            return _load(db_name)
+        entry.checked_at = time.monotonic()
+    return entry
+
+
+# Lazily cached set of table names in a database
+def get_tables(db_name):
+    return set(_get_entry(db_name).tables)
+
+
+def has_table(db_name, table_name):
+    if table_name in _get_entry(db_name).tables:
+        return True
+    # A miss may be a table another process just created
+    return table_name in _get_entry(db_name, force_check=True).tables
+
+
+# Lazily cached {column name: declared type} for a table, or None if the table is missing
+def get_columns(db_name, table_name):
+    if not has_table(db_name, table_name):
+        return None
+    entry = _get_entry(db_name)
+    columns = entry.columns.get(table_name)
+    if columns is None:
+        with get_connection(db_name) as conn:
+            version = _schema_version(conn)
+            rows = conn.execute(f"PRAGMA table_info({table_name})").fetchall()
+        columns = {row[1]: row[2] for row in rows}
+        if version == entry.version:
+            entry.columns[table_name] = columns
+        else:
+            invalidate(db_name)
+    return dict(columns)
+
+
+# Forget the cached schema of a database; called by every DDL path
+def invalidate(db_name):
+    with _lock:
+        _catalog.pop(db_name, None)
@@ -0,0 +1,381 @@
+import os
+import random
+import sqlite3
+import stat
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from urllib.request import pathname2url
+from schema.tuning import profile_for_path, apply_profile
+from metrics import slow_queries
+from metrics.registry import (
+    register_collector, Counter, STATEMENT_DURATION, ROWS_READ, ROWS_WRITTEN, CONNECTIONS_OPENED, CONNECTIONS_CLOSED,
+)
+
+DB_FOLDER = "databases"
+# Partition files live below these folders of DB_FOLDER (see schema.partitions)
+SHARDS_FOLDER = "_shards"
+ARCHIVE_FOLDER = "_archive"
+
+# Maximum number of open connections per database file
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))
+# Seconds an unused connection may stay open before it is closed
+POOL_IDLE_TIMEOUT = float(os.environ.get("DB_POOL_IDLE_TIMEOUT", 60))
+# Seconds to wait for a free connection when the pool is exhausted
+POOL_WAIT_TIMEOUT = float(os.environ.get("DB_POOL_WAIT_TIMEOUT", 30))
+# Extra attempts of a write that still finds the database locked once busy_timeout has run out
+DB_BUSY_RETRIES = int(os.environ.get("DB_BUSY_RETRIES", 5))
+# Seconds before the first retry; each further retry waits twice as long, with jitter
+DB_BUSY_BACKOFF = float(os.environ.get("DB_BUSY_BACKOFF", 0.05))
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Pools inherited from the parent of a forked process; kept referenced so their
+# connections are never closed (or garbage collected) in the child
+_inherited_pools = []
+
+BUSY_RETRIES = Counter("dynamic_api_sqlite_busy_retries", "Write transactions retried because the database was locked")
+
+
+def db_path(db_name):
+    return os.path.join(DB_FOLDER, f"{db_name}.db")
+
+
+# Single place where every new connection is configured, using the database's tuning profile
+def configure_connection(conn, path):
+    apply_profile(conn, profile_for_path(path, DB_FOLDER))
+
+
+STATEMENT_TYPES = {
+    "select", "insert", "update", "delete", "replace", "with", "pragma", "create", "alter", "drop",
+    "begin", "commit", "rollback", "savepoint", "release", "analyze", "vacuum", "explain",
+}
+WRITE_TYPES = {"insert", "update", "delete", "replace"}
+
+
+# Statement type used as the metrics label, e.g. "select" or "insert"
+@lru_cache(maxsize=1024)
+def statement_type(sql):
+    words = sql.lstrip(" \t\r\n(").split(None, 1)
+    keyword = words[0].lower() if words else ""
+    return keyword if keyword in STATEMENT_TYPES else "other"
+
+
+# Cursor that times every statement, counts the rows it reads and writes and records
+# statements over the slow-query threshold. A statement's time includes reading its rows,
+# since SQLite does most of the work of a SELECT while rows are fetched.
+class InstrumentedCursor(sqlite3.Cursor):
+    _operation = "other"
+    _sql = None
+    _parameters = None
+    _elapsed = 0.0
+    _slow = None
+
+    def _timed(self, method, sql, parameters, many=False):
+        self._finish_slow()
+        started = time.perf_counter()
+        try:
+            return method(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._operation = operation = statement_type(sql)
+            STATEMENT_DURATION.observe(elapsed, operation)
+            if operation in WRITE_TYPES and self.rowcount > 0:
+                ROWS_WRITTEN.inc(operation, amount=self.rowcount)
+            self._sql, self._parameters, self._elapsed = sql, None if many else parameters, elapsed
+            if slow_queries.is_slow(elapsed):
+                self._start_slow()
+                if operation in WRITE_TYPES:
+                    self._finish_slow()
+
+    def _start_slow(self):
+        plan = None
+        if self._operation in slow_queries.EXPLAINABLE and self._parameters is not None:
+            plan = slow_queries.explain(self.connection.cursor(sqlite3.Cursor), self._sql, self._parameters)
+        self._slow = slow_queries.start(
+            getattr(self.connection, "path", None), self._operation, self._sql, self._parameters, self._elapsed, plan
+        )
+        self._slow["rows_written"] = max(self.rowcount, 0) if self._operation in WRITE_TYPES else 0
+
+    def _finish_slow(self):
+        if self._slow is not None:
+            slow_queries.finish(self._slow)
+            self._slow = None
+
+    def _read(self, count, started, done):
+        if count:
+            ROWS_READ.inc(self._operation, amount=count)
+        self._elapsed += time.perf_counter() - started
+        if self._slow is None and self._sql is not None and slow_queries.is_slow(self._elapsed):
+            self._start_slow()
+        if self._slow is not None:
+            self._slow["duration_ms"] = round(self._elapsed * 1000, 3)
+            self._slow["rows_returned"] += count
+            if done:
+                self._finish_slow()
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters, many=True)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._read(0 if row is None else 1, started, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._read(len(rows), started, len(rows) < (self.arraysize if size is None else size))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._read(len(rows), started, True)
+        return rows
+
+    def close(self):
+        self._finish_slow()
+        super().close()
+
+    def __del__(self):
+        self._finish_slow()
+
+
+# Connection class of every pooled connection; all statements go through InstrumentedCursor
+class InstrumentedConnection(sqlite3.Connection):
+    def __init__(self, database, *args, **kwargs):
+        super().__init__(database, *args, **kwargs)
+        self.path = database
+        CONNECTIONS_OPENED.inc()
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        super().close()
+        CONNECTIONS_CLOSED.inc()
+
+
+# How to open a database file: "ro" for files without write permission (read-only
+# archives), "rw" for partition files, which are only ever created explicitly so that a
+# late connection never brings back a partition that was moved or dropped, None otherwise
+def _open_mode(path):
+    try:
+        if not os.stat(path).st_mode & stat.S_IWUSR:
+            return "ro"
+    except OSError:
+        pass
+    if os.path.relpath(path, DB_FOLDER).split(os.sep)[0] in (SHARDS_FOLDER, ARCHIVE_FOLDER):
+        return "rw"
+    return None
+
+
+def open_connection(path):
+    mode = _open_mode(path)
+    if mode:
+        uri = f"file:{pathname2url(os.path.abspath(path))}?mode={mode}"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=InstrumentedConnection)
+        conn.path = path
+    else:
+        conn = sqlite3.connect(path, check_same_thread=False, factory=InstrumentedConnection)
+    try:
+        configure_connection(conn, path)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+class ConnectionPool:
+    def __init__(self, path, max_size=POOL_SIZE, idle_timeout=POOL_IDLE_TIMEOUT):
+        self.path = path
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle = []  # (connection, released_at), most recently used last
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _connect(self):
+        return open_connection(self.path)
+
+    def _close_expired(self):
+        now = time.monotonic()
+        keep = []
+        for conn, released_at in self._idle:
+            if now - released_at > self.idle_timeout:
+                conn.close()
+                self._open -= 1
+            else:
+                keep.append((conn, released_at))
+        self._idle = keep
+
+    def acquire(self, timeout=POOL_WAIT_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._close_expired()
+            while not self._idle and self._open >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError(f"Connection pool for {self.path} exhausted")
+                self._cond.wait(remaining)
+            if self._idle:
+                return self._idle.pop()[0]
+            self._open += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, discard=False):
+        with self._cond:
+            if discard or self._closed:
+                conn.close()
+                self._open -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._close_expired()
+            self._cond.notify()
+
+    def close(self):
+        # Connections still borrowed are closed when they are released
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                conn.close()
+                self._open -= 1
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {"open": self._open, "idle": len(self._idle), "max_size": self.max_size}
+
+
+def get_pool(path):
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path)
+        return pool
+
+
+@contextmanager
+def get_path_connection(path):
+    pool = get_pool(path)
+    conn = pool.acquire()
+    discard = False
+    try:
+        yield conn
+    finally:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            discard = True
+        pool.release(conn, discard=discard)
+
+
+# SQLite connections must not be used on both sides of a fork. A forked child (e.g. a
+# gunicorn worker of a preloaded app) starts with empty pools and opens its own connections.
+def _reset_after_fork():
+    global _pools_lock
+    _inherited_pools.extend(_pools.values())
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def is_busy(error):
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        # SQLITE_BUSY and SQLITE_LOCKED, including their extended codes such as BUSY_SNAPSHOT
+        return code & 0xFF in (5, 6)
+    message = str(error)
+    return "database is locked" in message or "database table is locked" in message or "database is busy" in message
+
+
+# Retry a function that runs whole transactions when another process or connection holds
+# the write lock past busy_timeout. The function must be safe to run again from the start.
+def retry_on_busy(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(DB_BUSY_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if attempt == DB_BUSY_RETRIES or not is_busy(e):
+                    raise
+                BUSY_RETRIES.inc()
+                time.sleep(DB_BUSY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
+
+
+# Borrow a pooled connection for a database; uncommitted work is rolled back on return
+def get_connection(db_name):
+    return get_path_connection(db_path(db_name))
+
+
+# A connection of its own, outside the pool, for readers that stay open as long as a client
+# takes to read a streamed response; with many slow clients they would otherwise hold every
+# pooled connection and starve short requests
+@contextmanager
+def get_dedicated_connection(db_name):
+    conn = open_connection(db_path(db_name))
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+# Drop the pool of a database file, e.g. before the file is removed or replaced
+def close_path_connections(path):
+    with _pools_lock:
+        pool = _pools.pop(path, None)
+    if pool is not None:
+        pool.close()
+
+
+def close_connections(db_name=None):
+    if db_name is not None:
+        close_path_connections(db_path(db_name))
+        return
+    with _pools_lock:
+        paths = list(_pools)
+    for path in paths:
+        close_path_connections(path)
+
+
+def pool_stats():
+    with _pools_lock:
+        return {path: pool.stats() for path, pool in _pools.items()}
+
+
+@register_collector
+def _pool_metrics():
+    stats = pool_stats()
+    return [
+        ("dynamic_api_sqlite_pool_open_connections", "gauge", "Open connections per database file",
+         [({"path": path}, pool["open"]) for path, pool in stats.items()]),
+        ("dynamic_api_sqlite_pool_idle_connections", "gauge", "Idle pooled connections per database file",
+         [({"path": path}, pool["idle"]) for path, pool in stats.items()]),
+    ]
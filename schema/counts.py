@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from schema.connection import get_connection
+from schema.versions import version
+from metrics.registry import Counter
+
+# Exact row counts kept inside each database, so they commit and roll back with the rows.
+# A table gets an entry the first time it is counted; from then on every write path of
+# the API adjusts it in the same transaction.
+COUNTS_TABLE = "_row_counts"
+# Filtered counts remembered across requests
+COUNT_CACHE_SIZE = int(os.environ.get("COUNT_CACHE_SIZE", 1024))
+
+_filtered = OrderedDict()
+_lock = threading.Lock()
+
+COUNT_CACHE_LOOKUPS = Counter("dynamic_api_count_cache_lookups", "Filtered row count lookups", ("result",))
+
+
+# Add delta to a table's count; call inside the transaction that changed the rows
+def adjust_count(conn, table_name, delta):
+    if not delta:
+        return
+    try:
+        conn.execute(f"UPDATE {COUNTS_TABLE} SET row_count = row_count + ? WHERE table_name = ?", (delta, table_name))
+    except sqlite3.OperationalError:
+        # Nothing in this database has been counted yet
+        pass
+
+
+# Record a known count, or forget it (row_count=None) so the next count scans the table
+def set_count(conn, table_name, row_count=None):
+    try:
+        if row_count is None:
+            conn.execute(f"DELETE FROM {COUNTS_TABLE} WHERE table_name = ?", (table_name,))
+        else:
+            conn.execute(f"INSERT OR REPLACE INTO {COUNTS_TABLE} VALUES (?, ?)", (table_name, row_count))
+    except sqlite3.OperationalError:
+        pass
+
+
+# Forget every count of a database; used after raw SQL, which may have changed any table
+def forget_counts(conn):
+    try:
+        conn.execute(f"DELETE FROM {COUNTS_TABLE}")
+    except sqlite3.OperationalError:
+        pass
+
+
+def exact_count(db_name, table_name):
+    with get_connection(db_name) as conn:
+        try:
+            row = conn.execute(f"SELECT row_count FROM {COUNTS_TABLE} WHERE table_name = ?", (table_name,)).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        if row is not None:
+            return row[0]
+
+        # First count of this table: scan it while holding the write lock so no write
+        # can land between the count and storing it
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {COUNTS_TABLE} (table_name TEXT PRIMARY KEY, row_count INTEGER NOT NULL)")
+            total = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+            conn.execute(f"INSERT OR REPLACE INTO {COUNTS_TABLE} VALUES (?, ?)", (table_name, total))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    return total
+
+
+# Filtered counts are cached by table version, so any write to the table invalidates them
+def filtered_count(db_name, table_name, where_clause, where_values):
+    key = (db_name, table_name, where_clause, tuple(where_values))
+    data_version = version(db_name, table_name)
+    with _lock:
+        entry = _filtered.get(key)
+        if entry is not None and entry[0] == data_version:
+            _filtered.move_to_end(key)
+            COUNT_CACHE_LOOKUPS.inc("hit")
+            return entry[1]
+    COUNT_CACHE_LOOKUPS.inc("miss")
+
+    with get_connection(db_name) as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM {table_name} WHERE {where_clause}", where_values).fetchone()[0]
+
+    with _lock:
+        _filtered[key] = (data_version, total)
+        _filtered.move_to_end(key)
+        while len(_filtered) > COUNT_CACHE_SIZE:
+            _filtered.popitem(last=False)
+    return total
+
+
+def count_rows(db_name, table_name, where_clause=None, where_values=None):
+    if where_clause:
+        return filtered_count(db_name, table_name, where_clause, where_values or [])
+    return exact_count(db_name, table_name)
@@ -3,19 +3,38 @@ from schema.db_utils import (
     create_db,
     delete_db,
     create_table,
-    alter_table_add_column,
-    alter_table_remove_column,
+    alter_table,
     truncate_table,
     delete_table,
     list_databases,
     list_tables,
     table_details, 
     rename_table,
-    rename_column
+    rename_column,
+    database_settings,
+    update_database_settings,
+    list_indexes,
+    create_index,
+    drop_index,
+    create_partitioned_table,
+    create_time_partitioned_table,
+    partition_details,
+    archive_partitions,
+    is_reserved_table,
 )
+from schema.advisor import recommendations
+from jobs.manager import submit, async_requested
+from jobs.routes import job_accepted
 
 db_routes = Blueprint("db_routes", __name__)
 
+# SQLite's own tables and the API's bookkeeping tables are not part of the API, whatever the route
+@db_routes.before_request
+def reject_reserved_tables():
+    table_name = (request.view_args or {}).get("table_name")
+    if table_name and is_reserved_table(table_name):
+        return jsonify({"error": f"Table {table_name} is reserved for internal use"}), 400
+
 @db_routes.route("/", methods=["POST"])
 def route_create_db():
     """
@@ -37,7 +56,10 @@ def route_create_db():
     db_name = data.get("name")
     if not db_name:
         return jsonify({"error": "name is required"}), 400
-    return jsonify(create_db(db_name))
+    result = create_db(db_name)
+    if isinstance(result, tuple):
+        return jsonify(result[0]), result[1]
+    return jsonify(result)
 
 @db_routes.route("/", methods=["GET"])
 def route_list_databases():
@@ -53,6 +75,57 @@ def route_list_databases():
     """
     return jsonify(list_databases())
 
+@db_routes.route("/settings", methods=["GET", "PUT"])
+def route_global_settings():
+    """
+    Shows or updates the global SQLite tuning profile applied to every connection.
+
+    PUT expects a JSON object with any of the following keys; a null value restores the built-in default:
+        - journal_mode (str): "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL" or "OFF".
+        - synchronous (str): "OFF", "NORMAL", "FULL" or "EXTRA".
+        - mmap_size (int): Bytes of the database file to memory-map.
+        - cache_size (int): Page cache size; negative values are in KiB.
+        - temp_store (str): "DEFAULT", "FILE" or "MEMORY".
+        - busy_timeout (int): Milliseconds to wait for a lock before failing.
+
+    Returns:
+        - JSON response containing:
+            - profile (dict): The global profile.
+            - overrides (dict): The settings stored in the profile file.
+    """
+    if request.method == "PUT":
+        result = update_database_settings(request.get_json())
+    else:
+        result = database_settings()
+    if isinstance(result, tuple):
+        return jsonify(result[0]), result[1]
+    return jsonify(result)
+
+@db_routes.route("/settings/<db_name>", methods=["GET", "PUT"])
+def route_database_settings(db_name):
+    """
+    Shows or updates the SQLite tuning profile of a single database.
+
+    PUT accepts the same keys as /db/settings and stores them as overrides for this
+    database only; a null value falls back to the global profile.
+
+    Returns:
+        - JSON response containing:
+            - profile (dict): The effective profile (built-in defaults, global settings, then overrides).
+            - overrides (dict): The overrides stored for this database.
+            - in_effect (dict): The values read back from a live connection.
+
+    Errors:
+        - Returns an error if the database does not exist or a setting is invalid.
+    """
+    if request.method == "PUT":
+        result = update_database_settings(request.get_json(), db_name)
+    else:
+        result = database_settings(db_name)
+    if isinstance(result, tuple):
+        return jsonify(result[0]), result[1]
+    return jsonify(result)
+
 @db_routes.route("/<db_name>", methods=["DELETE"])
 def route_delete_db(db_name):
     """
@@ -105,6 +178,21 @@ def route_create_table(db_name, table_name):
             - name (str): The column name.
             - type (str): The data type of the column.
             - primary_key (bool, optional): Whether the column is a primary key.
+        - partitions (int, optional): Split the table into this many partitions, each in a database
+            file of its own under databases/_shards/<db_name>/<table_name>/. Inserts are routed to one
+            partition, GET by id reads a single partition and other reads query the partitions in
+            parallel and merge the results. Between 2 and MAX_PARTITIONS.
+        - partition_key (str, optional): The column that decides the partition of a row. With "id"
+            (the default) rows are spread round robin; with another column, rows with the same value
+            share a partition and equality filters on it read only that partition.
+        - partition_interval (str, optional): "day", "month" or "year". Splits the table by time
+            instead: partition_key names a timestamp column (ISO 8601 text or Unix time) and rows
+            land in one partition per range, created when its first row arrives. Filters on the
+            column read only the partitions of the requested time range.
+        - archive_after (int, optional): With partition_interval, partitions this many ranges older
+            than the current one are moved to compact archive files under
+            databases/_archive/<db_name>/<table_name>/. Default is never.
+        - archive_read_only (bool, optional): Make archive files read-only. Default is true.
 
     Returns:
         - JSON response containing:
@@ -119,6 +207,19 @@ def route_create_table(db_name, table_name):
     columns = data.get("columns")
     if not db_name or not table_name or not columns:
         return jsonify({"error": "db_name, table_name, and columns are required"}), 400
+    if data.get("partition_interval") is not None:
+        result = create_time_partitioned_table(
+            db_name, table_name, columns, data.get("partition_key"), data["partition_interval"],
+            data.get("archive_after"), bool(data.get("archive_read_only", True)),
+        )
+        if isinstance(result, tuple):
+            return jsonify(result[0]), result[1]
+        return jsonify(result)
+    if data.get("partitions") is not None:
+        result = create_partitioned_table(db_name, table_name, columns, data["partitions"], data.get("partition_key") or "id")
+        if isinstance(result, tuple):
+            return jsonify(result[0]), result[1]
+        return jsonify(result)
     return jsonify(create_table(db_name, table_name, columns))
 
 @db_routes.route("/<db_name>/<table_name>", methods=["GET"])
@@ -161,9 +262,15 @@ def route_delete_table(db_name, table_name):
     Errors:
         - Returns an error if db_name or table_name is missing.
         - Returns an error if there is an issue with deleting the table.
+
+    Pass ?async=true to run the operation as a background job; the response then
+    contains a job_id to poll at /jobs/<job_id>.
     """
     if not db_name or not table_name:
         return jsonify({"error": "db_name and table_name are required"}), 400
+    if async_requested(request.args):
+        job_id = submit("delete_table", lambda progress: delete_table(db_name, table_name), db_name, table_name)
+        return job_accepted(job_id)
     return jsonify(delete_table(db_name, table_name))
 
 @db_routes.route("/<db_name>/<table_name>", methods=["PUT"])
@@ -188,6 +295,9 @@ def route_alter_table(db_name, table_name):
     Errors:
         - Returns an error if db_name or table_name is missing.
         - Returns an error if there is an issue with adding or removing columns.
+
+    Removing a column rebuilds the table. Pass ?async=true to run the operation as a
+    background job; the response then contains a job_id to poll at /jobs/<job_id>.
     """
     data = request.get_json()
     add_columns = data.get("add_column")  # List of columns to add
@@ -196,25 +306,16 @@ def route_alter_table(db_name, table_name):
     if not db_name or not table_name:
         return jsonify({"error": "db_name and table_name are required"}), 400
 
-    result = {}
-
-    # Handle adding columns
-    if add_columns:
-        if isinstance(add_columns, list):
-            for col in add_columns:
-                result[f"add_column_{col['name']}"] = alter_table_add_column(db_name, table_name, col)
-        else:
-            result["add_column"] = alter_table_add_column(db_name, table_name, add_columns)
-
-    # Handle removing columns
-    if remove_columns:
-        if isinstance(remove_columns, list):
-            for col in remove_columns:
-                result[f"remove_column_{col}"] = alter_table_remove_column(db_name, table_name, col)
-        else:
-            result["remove_column"] = alter_table_remove_column(db_name, table_name, remove_columns)
+    if async_requested(request.args):
+        job_id = submit(
+            "alter_table",
+            lambda progress: alter_table(db_name, table_name, add_columns, remove_columns, progress),
+            db_name,
+            table_name,
+        )
+        return job_accepted(job_id)
 
-    return jsonify(result)
+    return jsonify(alter_table(db_name, table_name, add_columns, remove_columns))
 
 @db_routes.route("/<db_name>/<table_name>/truncate", methods=["POST"])
 def route_truncate_table(db_name, table_name):
@@ -233,10 +334,16 @@ def route_truncate_table(db_name, table_name):
     Errors:
         - Returns an error if db_name or table_name is missing.
         - Returns an error if there is an issue with truncating the table.
+
+    Pass ?async=true to run the operation as a background job; the response then
+    contains a job_id to poll at /jobs/<job_id>.
     """
     data = request.get_json()
     if not db_name or not table_name:
         return jsonify({"error": "db_name and table_name are required"}), 400
+    if async_requested(request.args):
+        job_id = submit("truncate_table", lambda progress: truncate_table(db_name, table_name), db_name, table_name)
+        return job_accepted(job_id)
     return jsonify(truncate_table(db_name, table_name))
 
 @db_routes.route("/<db_name>/<table_name>/rename", methods=["POST"])
@@ -257,6 +364,9 @@ def route_rename_table(db_name, table_name):
     Errors:
         - Returns an error if db_name, old_table_name, or new_table_name is missing.
         - Returns an error if there is an issue with renaming the table.
+
+    Pass ?async=true to run the operation as a background job; the response then
+    contains a job_id to poll at /jobs/<job_id>.
     """
     data = request.get_json()
     new_table_name = data.get("new_table_name")
@@ -264,6 +374,15 @@ def route_rename_table(db_name, table_name):
     if not db_name or not table_name or not new_table_name:
         return jsonify({"error": "db_name, table_name, and new_table_name are required"}), 400
 
+    if async_requested(request.args):
+        job_id = submit(
+            "rename_table",
+            lambda progress: rename_table(db_name, table_name, new_table_name),
+            db_name,
+            table_name,
+        )
+        return job_accepted(job_id)
+
     result = rename_table(db_name, table_name, new_table_name)
     return jsonify(result), 200 if "message" in result else 500
 
@@ -286,6 +405,9 @@ def route_rename_column(db_name, table_name):
     Errors:
         - Returns an error if db_name, table_name, old_column_name, or new_column_name is missing.
         - Returns an error if there is an issue with renaming the column.
+
+    Renaming a column rebuilds the table. Pass ?async=true to run the operation as a
+    background job; the response then contains a job_id to poll at /jobs/<job_id>.
     """
     data = request.get_json()
     old_column_name = data.get("old_column_name")
@@ -294,6 +416,165 @@ def route_rename_column(db_name, table_name):
     if not db_name or not table_name or not old_column_name or not new_column_name:
         return jsonify({"error": "db_name, table_name, old_column_name, and new_column_name are required"}), 400
 
+    if async_requested(request.args):
+        job_id = submit(
+            "rename_column",
+            lambda progress: rename_column(db_name, table_name, old_column_name, new_column_name, progress),
+            db_name,
+            table_name,
+        )
+        return job_accepted(job_id)
+
     result = rename_column(db_name, table_name, old_column_name, new_column_name)
     return jsonify(result), 200 if "message" in result else 500
 
+@db_routes.route("/<db_name>/<table_name>/partitions", methods=["GET"])
+def route_partitions(db_name, table_name):
+    """
+    Describes the partitions of a partitioned table.
+
+    Returns:
+        - JSON response containing:
+            - type (str): "hash" or "time".
+            - key (str): The partition key.
+            - partitions (list): Each partition with its index (or time range, e.g. "2024-05"),
+              database file, row count and file size in bytes, to spot uneven keys. Partitions
+              of time-partitioned tables also tell whether they are archived and writable.
+
+    Errors:
+        - Returns an error if the database does not exist or the table is not partitioned.
+    """
+    result = partition_details(db_name, table_name)
+    if isinstance(result, tuple):
+        return jsonify(result[0]), result[1]
+    return jsonify(result)
+
+@db_routes.route("/<db_name>/<table_name>/partitions/archive", methods=["POST"])
+def route_archive_partitions(db_name, table_name):
+    """
+    Archives partitions of a time-partitioned table.
+
+    Each partition is copied into a compact file under databases/_archive/<db_name>/<table_name>/
+    (read-only unless the table was created with archive_read_only false) and removed from
+    the hot partitions. Reads keep finding its rows.
+
+    Accepts an optional JSON payload with the following key:
+        - partitions (list, optional): Time ranges to archive, e.g. ["2024-04", "2024-05"]. Only
+            past ranges can be archived. Default is every partition due under archive_after.
+
+    Returns:
+        - JSON response containing:
+            - message (str): A message describing the result of the operation.
+            - archived (list): The time ranges archived.
+
+    Errors:
+        - Returns an error if the database does not exist or the table is not time-partitioned.
+        - Returns an error if a range is unknown or not in the past.
+
+    Pass ?async=true to archive in a background job; the response then contains a job_id
+    to poll at /jobs/<job_id>. Partitions that come due are also archived in the
+    background whenever a new partition is created.
+    """
+    labels = (request.get_json(silent=True) or {}).get("partitions")
+    if async_requested(request.args):
+        job_id = submit(
+            "archive_partitions",
+            lambda progress: archive_partitions(db_name, table_name, labels, progress),
+            db_name,
+            table_name,
+        )
+        return job_accepted(job_id)
+    result = archive_partitions(db_name, table_name, labels)
+    if isinstance(result, tuple):
+        return jsonify(result[0]), result[1]
+    return jsonify(result)
+
+@db_routes.route("/<db_name>/<table_name>/indexes", methods=["GET", "POST"])
+def route_indexes(db_name, table_name):
+    """
+    Lists or creates indexes on a table.
+
+    POST expects a JSON payload with the following keys:
+        - columns (list or str): The column(s) to index, in order. Put columns filtered with
+            "=" first and the orderby column last.
+        - unique (bool, optional): Create a UNIQUE index. Default is false.
+        - name (str, optional): The index name. Defaults to idx_<table>_<columns>.
+
+    Returns:
+        - JSON response containing:
+            - indexes (list): For GET, each index with its name, columns, unique flag and origin
+              ("c" for CREATE INDEX, "u" for UNIQUE constraints, "pk" for primary keys).
+            - message (str): For POST, a message describing the result of the operation.
+
+    Errors:
+        - Returns an error if the database, table or a column does not exist.
+        - Returns an error if there is an issue with creating the index.
+
+    Indexing a large table takes a while. Pass ?async=true to build the index as a
+    background job; the response then contains a job_id to poll at /jobs/<job_id>.
+    """
+    if request.method == "GET":
+        result = list_indexes(db_name, table_name)
+    else:
+        data = request.get_json()
+        columns = data.get("columns")
+        unique = bool(data.get("unique", False))
+        index_name = data.get("name")
+        if not columns:
+            return jsonify({"error": "columns is required"}), 400
+        if async_requested(request.args):
+            job_id = submit(
+                "create_index",
+                lambda progress: create_index(db_name, table_name, columns, unique, index_name),
+                db_name,
+                table_name,
+            )
+            return job_accepted(job_id)
+        result = create_index(db_name, table_name, columns, unique, index_name)
+    if isinstance(result, tuple):
+        return jsonify(result[0]), result[1]
+    return jsonify(result)
+
+@db_routes.route("/<db_name>/<table_name>/indexes/<index_name>", methods=["DELETE"])
+def route_drop_index(db_name, table_name, index_name):
+    """
+    Drops an index from a table.
+
+    Returns:
+        - JSON response containing:
+            - message (str): A message describing the result of the operation.
+
+    Errors:
+        - Returns an error if the index does not exist on the table.
+        - Returns an error if the index backs a PRIMARY KEY or UNIQUE constraint.
+    """
+    result = drop_index(db_name, table_name, index_name)
+    if isinstance(result, tuple):
+        return jsonify(result[0]), result[1]
+    return jsonify(result)
+
+@db_routes.route("/<db_name>/<table_name>/indexes/recommendations", methods=["GET"])
+def route_index_recommendations(db_name, table_name):
+    """
+    Recommends indexes for a table from the reads this server has seen.
+
+    Every filtered or sorted GET /<db_name>/<table_name> is recorded with its filter columns,
+    orderby column and latency. A query shape is recommended once it has been seen
+    INDEX_ADVISOR_MIN_QUERIES times with an average latency of at least INDEX_ADVISOR_MIN_MS
+    and no existing index covers it. With INDEX_AUTO_CREATE=true such indexes are created
+    automatically as background jobs.
+
+    Returns:
+        - JSON response containing:
+            - recommendations (list): Indexes to create, most expensive first, with the columns
+              to POST to /db/<db_name>/<table_name>/indexes and the observed query count and latency.
+            - workload (list): Every query shape recorded for the table.
+            - auto_create (bool): Whether recommended indexes are created automatically.
+
+    Errors:
+        - Returns an error if the database or table does not exist.
+    """
+    result = recommendations(db_name, table_name)
+    if isinstance(result, tuple):
+        return jsonify(result[0]), result[1]
+    return jsonify(result)
@@ -1,17 +1,88 @@
 import sqlite3
 import os
-
-DB_FOLDER = "databases"
+import re
+import shutil
+import stat
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from schema.connection import DB_FOLDER, db_path as database_path, get_connection, close_connections, open_connection
+from schema.catalog import invalidate, has_table, get_columns, is_sqlite_table
+from schema.versions import bump, observe
+from schema.counts import COUNTS_TABLE, set_count, exact_count
+from schema.partitions import (
+    PARTITIONS_TABLE, TIME_PARTITIONS_TABLE, TIME_PARTITION_RANGES_TABLE, METADATA_TABLES, MAX_PARTITIONS, INTERVALS,
+    PartitionSpec, TimePartitionSpec, partition_spec, partition_specs, partition_folder, range_ordinal,
+)
+from jobs.manager import submit
+from schema.tuning import get_profile, get_overrides, update_profile
+
+# Rows copied per statement when a table has to be rebuilt
+COPY_CHUNK_SIZE = int(os.environ.get("COPY_CHUNK_SIZE", 50000))
+
+# In-place ALTER TABLE support of the SQLite library Python is linked against
+SUPPORTS_RENAME_COLUMN = sqlite3.sqlite_version_info >= (3, 25, 0)
+SUPPORTS_DROP_COLUMN = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Names taken by static routes under /db, which would hide a database of the same name
+RESERVED_DB_NAMES = {"settings"}
+# Bookkeeping tables the API keeps inside each database, next to the user's tables
+INTERNAL_TABLES = (COUNTS_TABLE, *METADATA_TABLES)
 
 if not os.path.exists(DB_FOLDER):
     os.makedirs(DB_FOLDER)
 
+# SQLite's own tables and the API's bookkeeping tables cannot be used as user tables
+def is_reserved_table(table_name):
+    return is_sqlite_table(table_name) or table_name.lower() in {name.lower() for name in INTERNAL_TABLES}
+
+def reserved_table_error(table_name):
+    return {"error": f"Table name {table_name} is reserved for internal use"}, 400
+
+# Every DDL path ends here so neither the schema catalog nor cached reads outlive a change
+def schema_changed(db_name):
+    invalidate(db_name)
+    bump(db_name)
+
+# Helper function to copy a table in rowid chunks, calling progress(copied, total) after each chunk
+def copy_rows(cursor, source, target, columns=None, progress=None, chunk_size=COPY_CHUNK_SIZE, target_columns=None):
+    total = cursor.execute(f"SELECT COUNT(*) FROM {source}").fetchone()[0]
+    first_rowid, last_rowid = cursor.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {source}").fetchone()
+    target_columns = target_columns or columns
+    target_columns = f" ({', '.join(target_columns)})" if target_columns else ""
+    select_columns = ', '.join(columns) if columns else "*"
+    copied = 0
+    if progress:
+        progress(copied, total)
+    if first_rowid is None:
+        return copied
+
+    low = first_rowid - 1
+    while low < last_rowid:
+        row = cursor.execute(
+            f"SELECT rowid FROM {source} WHERE rowid > ? ORDER BY rowid LIMIT 1 OFFSET ?", (low, chunk_size - 1)
+        ).fetchone()
+        high = row[0] if row else last_rowid
+        cursor.execute(
+            f"INSERT INTO {target}{target_columns} SELECT {select_columns} FROM {source} WHERE rowid > ? AND rowid <= ?",
+            (low, high),
+        )
+        copied += cursor.rowcount
+        low = high
+        if progress:
+            progress(copied, total)
+    return copied
+
 def create_db(db_name):
+    if db_name in RESERVED_DB_NAMES:
+        return {"error": f"{db_name} is reserved and cannot be used as a database name"}, 400
     db_path = os.path.join(DB_FOLDER, f"{db_name}.db")
     if os.path.exists(db_path):
         return {"error": f"Database {db_name} already exists"}, 400
 
-    sqlite3.connect(db_path).close()
+    with get_connection(db_name):
+        pass
     return {"message": f"Database {db_name} created successfully"}
 
 def delete_db(db_name):
@@ -19,13 +90,29 @@ def delete_db(db_name):
     if not os.path.exists(db_path):
         return {"error": f"Database {db_name} does not exist"}, 404
 
+    # Partitioned tables of the database go with it
+    for spec in partition_specs(db_name).values():
+        _remove_partitions(spec)
+    shutil.rmtree(partition_folder(db_name), ignore_errors=True)
+    shutil.rmtree(partition_folder(db_name, archived=True), ignore_errors=True)
+
+    close_connections(db_name)
     os.remove(db_path)
+    # WAL mode keeps two companion files next to the database
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    schema_changed(db_name)
     return {"message": f"Database {db_name} deleted successfully"}
 
 def create_table(db_name, table_name, columns):
     db_path = os.path.join(DB_FOLDER, f"{db_name}.db")
     if not os.path.exists(db_path):
         return {"error": f"Database {db_name} does not exist"}, 404
+    if is_reserved_table(table_name):
+        return reserved_table_error(table_name)
+    if partition_spec(db_name, table_name):
+        return {"error": f"Table {table_name} already exists in database {db_name} as a partitioned table"}, 400
 
     # Ensure the 'id' column exists and is primary key with auto-increment
     id_column = {"name": "id", "type": "INTEGER", "primary_key": True, "autoincrement": True}
@@ -48,11 +135,10 @@ def create_table(db_name, table_name, columns):
     sql_query = f"CREATE TABLE IF NOT EXISTS {table_name} ({column_definitions})"
 
     # Execute the SQL query
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute(sql_query)
-    conn.commit()
-    conn.close()
+    with get_connection(db_name) as conn:
+        conn.execute(sql_query)
+        conn.commit()
+    schema_changed(db_name)
 
     return {"message": f"Table {table_name} created successfully in database {db_name}"}
 
@@ -61,25 +147,37 @@ def alter_table_add_column(db_name, table_name, new_column):
     if not os.path.exists(db_path):
         return {"error": f"Database {db_name} does not exist"}, 404
 
+    spec = partition_spec(db_name, table_name)
+    if spec:
+        error = change_partitions(spec, lambda shard: alter_table_add_column(shard, table_name, new_column))
+        if error:
+            return error
+        return {"message": f"Column {new_column['name']} added to table {table_name} in database {db_name}"}
+
     sql_query = f"ALTER TABLE {table_name} ADD COLUMN {new_column['name']} {new_column['type']}"
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    try:
-        cursor.execute(sql_query)
-        conn.commit()
-    except sqlite3.OperationalError as e:
-        return {"error": str(e)}, 400
-    finally:
-        conn.close()
+    with get_connection(db_name) as conn:
+        try:
+            conn.execute(sql_query)
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            return {"error": str(e)}, 400
+    schema_changed(db_name)
 
     return {"message": f"Column {new_column['name']} added to table {table_name} in database {db_name}"}
 
-def alter_table_remove_column(db_name, table_name, column_name):
+def alter_table_remove_column(db_name, table_name, column_name, progress=None):
     db_path = os.path.join(DB_FOLDER, f"{db_name}.db")
     if not os.path.exists(db_path):
         return {"error": f"Database {db_name} does not exist"}, 404
+    if partition_spec(db_name, table_name):
+        return {"error": f"Columns cannot be removed from partitioned table {table_name}"}, 400
+
+    with get_connection(db_name) as conn:
+        result = _remove_column(conn, db_name, table_name, column_name, progress)
+    schema_changed(db_name)
+    return result
 
-    conn = sqlite3.connect(db_path)
+def _remove_column(conn, db_name, table_name, column_name, progress=None):
     cursor = conn.cursor()
 
     try:
@@ -91,68 +189,451 @@ def alter_table_remove_column(db_name, table_name, column_name):
         if column_name not in column_names:
             return {"error": f"Column {column_name} does not exist in table {table_name}"}, 404
 
-        # Recreate the table without the specified column
-        remaining_columns = [col for col in columns if col[1] != column_name]
-        remaining_column_names = [col[1] for col in remaining_columns]
-
-        # Generate the SQL queries for creating the new table and migrating data
-        create_table_sql = f"""
-        CREATE TABLE {table_name}_new (
-            {', '.join([f"{col[1]} {col[2]}" for col in remaining_columns])}
-        )
-        """
-        insert_data_sql = f"""
-        INSERT INTO {table_name}_new ({', '.join(remaining_column_names)})
-        SELECT {', '.join(remaining_column_names)} FROM {table_name}
-        """
-        drop_old_table_sql = f"DROP TABLE {table_name}"
-        rename_table_sql = f"ALTER TABLE {table_name}_new RENAME TO {table_name}"
-
-        # Execute the queries
-        cursor.execute(create_table_sql)
-        cursor.execute(insert_data_sql)
-        cursor.execute(drop_old_table_sql)
-        cursor.execute(rename_table_sql)
+        # Drop the column in place when SQLite allows it; it refuses for indexed,
+        # primary key, UNIQUE and otherwise referenced columns
+        dropped = False
+        if SUPPORTS_DROP_COLUMN:
+            try:
+                cursor.execute(f"ALTER TABLE {table_name} DROP COLUMN {column_name}")
+                dropped = True
+            except sqlite3.OperationalError:
+                conn.rollback()
+
+        if not dropped:
+            # Recreate the table without the specified column, keeping the rest of its indexes and triggers
+            remaining_columns = [col for col in columns if col[1] != column_name]
+            rebuild_table(cursor, table_name, remaining_columns, dropped_column=column_name, progress=progress)
 
         conn.commit()
     except sqlite3.OperationalError as e:
         return {"error": str(e)}, 400
-    finally:
-        conn.close()
 
     return {"message": f"Column {column_name} removed from table {table_name} in database {db_name}"}
 
-def truncate_table(db_name, table_name):
+def _mentions(sql, column_name):
+    return re.search(rf"\b{re.escape(column_name)}\b", sql, re.IGNORECASE) is not None
+
+# Helper function to rebuild a table with the given PRAGMA table_info columns, optionally
+# dropping or renaming columns. Primary keys, AUTOINCREMENT, NOT NULL, defaults, UNIQUE
+# constraints, indexes and triggers are carried over unless they use a dropped column.
+# Rows are copied in chunks; the caller owns the transaction.
+def rebuild_table(cursor, table_name, columns, dropped_column=None, renamed=None, progress=None):
+    renamed = renamed or {}
+
+    def new_name(name):
+        return renamed.get(name, name)
+
+    def rename_in(sql):
+        for old, new in renamed.items():
+            sql = re.sub(rf"\b{re.escape(old)}\b", new, sql, flags=re.IGNORECASE)
+        return sql
+
+    sequence = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='sqlite_sequence'"
+    ).fetchone() and cursor.execute("SELECT seq FROM sqlite_sequence WHERE name=?", (table_name,)).fetchone()
+    uses_autoincrement = bool(sequence)
+
+    # Column definitions
+    pk_columns = sorted((col for col in columns if col[5]), key=lambda col: col[5])
+    column_defs = []
+    for _, name, column_type, notnull, default, pk in columns:
+        definition = f"{new_name(name)} {column_type}".strip()
+        if pk and len(pk_columns) == 1:
+            definition += " PRIMARY KEY"
+            if uses_autoincrement and column_type.upper() == "INTEGER":
+                definition += " AUTOINCREMENT"
+        if notnull:
+            definition += " NOT NULL"
+        if default is not None:
+            definition += f" DEFAULT {default}"
+        column_defs.append(definition)
+    if len(pk_columns) > 1:
+        column_defs.append(f"PRIMARY KEY ({', '.join(new_name(col[1]) for col in pk_columns)})")
+
+    # UNIQUE constraints live in automatic indexes without SQL of their own
+    for _, index_name, _, origin, _ in cursor.execute(f"PRAGMA index_list({table_name})").fetchall():
+        if origin != "u":
+            continue
+        index_columns = [row[2] for row in cursor.execute(f"PRAGMA index_info({index_name})").fetchall()]
+        if dropped_column not in index_columns:
+            column_defs.append(f"UNIQUE ({', '.join(new_name(col) for col in index_columns)})")
+
+    # Indexes and triggers are dropped with the old table and recreated afterwards
+    dependents = cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name=? AND type IN ('index', 'trigger') AND sql IS NOT NULL",
+        (table_name,),
+    ).fetchall()
+    dependents = [rename_in(sql) for (sql,) in dependents if not (dropped_column and _mentions(sql, dropped_column))]
+
+    # DDL does not open a transaction implicitly, so start one to keep the rebuild atomic
+    if not cursor.connection.in_transaction:
+        cursor.execute("BEGIN IMMEDIATE")
+
+    new_table_name = f"{table_name}_new"
+    cursor.execute(f"CREATE TABLE {new_table_name} ({', '.join(column_defs)})")
+    copy_rows(cursor, table_name, new_table_name, [col[1] for col in columns], progress, target_columns=[new_name(col[1]) for col in columns])
+    cursor.execute(f"DROP TABLE {table_name}")
+    cursor.execute(f"ALTER TABLE {new_table_name} RENAME TO {table_name}")
+    if uses_autoincrement:
+        # The copy only raises the sequence to the largest id left; ids of deleted rows stay used
+        cursor.execute("DELETE FROM sqlite_sequence WHERE name=?", (table_name,))
+        cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table_name, sequence[0]))
+    for sql in dependents:
+        cursor.execute(sql)
+
+# Apply a list (or single entry) of column additions and removals to a table
+def alter_table(db_name, table_name, add_columns, remove_columns, progress=None):
+    result = {}
+
+    # Handle adding columns
+    if add_columns:
+        if isinstance(add_columns, list):
+            for col in add_columns:
+                result[f"add_column_{col['name']}"] = alter_table_add_column(db_name, table_name, col)
+        else:
+            result["add_column"] = alter_table_add_column(db_name, table_name, add_columns)
+
+    # Handle removing columns
+    if remove_columns:
+        if isinstance(remove_columns, list):
+            for col in remove_columns:
+                result[f"remove_column_{col}"] = alter_table_remove_column(db_name, table_name, col, progress)
+        else:
+            result["remove_column"] = alter_table_remove_column(db_name, table_name, remove_columns, progress)
+
+    return result
+
+def delete_table(db_name, table_name):
     db_path = os.path.join(DB_FOLDER, f"{db_name}.db")
     if not os.path.exists(db_path):
         return {"error": f"Database {db_name} does not exist"}, 404
 
-    sql_query = f"DELETE FROM {table_name}"
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    try:
-        cursor.execute(sql_query)
+    spec = partition_spec(db_name, table_name)
+    if spec:
+        return drop_partitioned_table(spec)
+
+    sql_query = f"DROP TABLE IF EXISTS {table_name}"
+    with get_connection(db_name) as conn:
+        conn.execute(sql_query)
+        set_count(conn, table_name)
         conn.commit()
-    except sqlite3.OperationalError as e:
-        return {"error": str(e)}, 400
-    finally:
-        conn.close()
+    schema_changed(db_name)
 
-    return {"message": f"Table {table_name} in database {db_name} truncated successfully"}
+    return {"message": f"Table {table_name} in database {db_name} deleted successfully"}
 
-def delete_table(db_name, table_name):
+def create_partitioned_table(db_name, table_name, columns, partitions, key="id"):
     db_path = os.path.join(DB_FOLDER, f"{db_name}.db")
     if not os.path.exists(db_path):
         return {"error": f"Database {db_name} does not exist"}, 404
+    if not isinstance(partitions, int) or not 2 <= partitions <= MAX_PARTITIONS:
+        return {"error": f"partitions must be a number between 2 and {MAX_PARTITIONS}"}, 400
+    columns = [dict(col) for col in columns or []]
+    if key != "id" and key not in {col["name"] for col in columns}:
+        return {"error": f"Partition key {key} must be id or one of the columns"}, 400
+    if not re.fullmatch(r"\w+", table_name):
+        return {"error": f"Invalid table name {table_name}"}, 400
+    if is_reserved_table(table_name):
+        return reserved_table_error(table_name)
+    if has_table(db_name, table_name) or partition_spec(db_name, table_name):
+        return {"error": f"Table {table_name} already exists in database {db_name}"}, 400
+
+    spec = PartitionSpec(db_name, table_name, key, partitions)
+    for shard in spec.shards:
+        create_partition_file(shard)
+        create_table(shard, table_name, [dict(col) for col in columns])
+
+    # The table becomes visible once its partitions are in place
+    with get_connection(db_name) as conn:
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {PARTITIONS_TABLE} "
+            "(table_name TEXT PRIMARY KEY, partition_key TEXT NOT NULL, partitions INTEGER NOT NULL)"
+        )
+        conn.execute(f"INSERT INTO {PARTITIONS_TABLE} VALUES (?, ?, ?)", (table_name, key, partitions))
+        conn.commit()
+    schema_changed(db_name)
+    return {"message": f"Table {table_name} created in database {db_name} with {partitions} partitions by {key}"}
 
-    sql_query = f"DROP TABLE IF EXISTS {table_name}"
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute(sql_query)
-    conn.commit()
-    conn.close()
+def create_time_partitioned_table(db_name, table_name, columns, key, interval, archive_after=None, read_only=True):
+    db_path = os.path.join(DB_FOLDER, f"{db_name}.db")
+    if not os.path.exists(db_path):
+        return {"error": f"Database {db_name} does not exist"}, 404
+    if interval not in INTERVALS:
+        return {"error": f"partition_interval must be one of {', '.join(INTERVALS)}"}, 400
+    if archive_after is not None and (not isinstance(archive_after, int) or isinstance(archive_after, bool) or archive_after < 1):
+        return {"error": "archive_after must be a positive number of partitions"}, 400
+    columns = [dict(col) for col in columns or []]
+    if key not in {col["name"] for col in columns} or key == "id":
+        return {"error": f"Partition key {key} must be one of the columns and hold timestamps"}, 400
+    if not re.fullmatch(r"\w+", table_name):
+        return {"error": f"Invalid table name {table_name}"}, 400
+    if is_reserved_table(table_name):
+        return reserved_table_error(table_name)
+    if has_table(db_name, table_name) or partition_spec(db_name, table_name):
+        return {"error": f"Table {table_name} already exists in database {db_name}"}, 400
+
+    # The partition of the current range is created now, so the table always has one to
+    # take its columns from; the others follow their first rows
+    current = range_ordinal(interval, datetime.now(timezone.utc))
+    spec = TimePartitionSpec(db_name, table_name, key, interval, archive_after, read_only, {current: False})
+    shard = spec.shard(current)
+    create_partition_file(shard)
+    create_table(shard, table_name, columns)
+
+    with get_connection(db_name) as conn:
+        _create_time_metadata(conn)
+        conn.execute(
+            f"INSERT INTO {TIME_PARTITIONS_TABLE} VALUES (?, ?, ?, ?, ?)", (table_name, key, interval, archive_after, int(read_only))
+        )
+        conn.execute(f"INSERT INTO {TIME_PARTITION_RANGES_TABLE} VALUES (?, ?, 0)", (table_name, current))
+        conn.commit()
+    schema_changed(db_name)
+    return {"message": f"Table {table_name} created in database {db_name} with a partition per {interval} of {key}"}
 
-    return {"message": f"Table {table_name} in database {db_name} deleted successfully"}
+def _create_time_metadata(conn):
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {TIME_PARTITIONS_TABLE} (table_name TEXT PRIMARY KEY, time_column TEXT NOT NULL, "
+        "interval TEXT NOT NULL, archive_after INTEGER, read_only INTEGER NOT NULL)"
+    )
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {TIME_PARTITION_RANGES_TABLE} (table_name TEXT NOT NULL, ordinal INTEGER NOT NULL, "
+        "archived INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (table_name, ordinal))"
+    )
+
+# Create the partitions of new time ranges with the columns and indexes of the newest
+# partition, and return the spec that includes them. Safe to race with other writers:
+# every step tolerates the partition already being there.
+def add_time_partitions(spec, indexes):
+    template = spec.shards[-1]
+    columns = [{"name": name, "type": column_type} for name, column_type in get_columns(template, spec.table_name).items()]
+    with get_connection(template) as conn:
+        index_sql = [
+            re.sub(r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX IF NOT EXISTS ", sql)
+            for (sql,) in conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type='index' AND tbl_name=? AND sql IS NOT NULL", (spec.table_name,)
+            ).fetchall()
+        ]
+
+    for index in indexes:
+        shard = spec.shard(index)
+        create_partition_file(shard)
+        create_table(shard, spec.table_name, [dict(col) for col in columns])
+        with get_connection(shard) as conn:
+            for sql in index_sql:
+                conn.execute(sql)
+            conn.commit()
+        invalidate(shard)
+
+    with get_connection(spec.db_name) as conn:
+        conn.executemany(
+            f"INSERT OR IGNORE INTO {TIME_PARTITION_RANGES_TABLE} VALUES (?, ?, 0)",
+            [(spec.table_name, index) for index in indexes],
+        )
+        conn.commit()
+    schema_changed(spec.db_name)
+    return partition_spec(spec.db_name, spec.table_name)
+
+# Tables with an archiving job queued or running in this process
+_archiving = set()
+_archiving_lock = threading.Lock()
+
+# Archive the partitions of a time-partitioned table that have come due, in a background job
+def schedule_archiving(spec):
+    if not isinstance(spec, TimePartitionSpec) or not spec.due_for_archive():
+        return None
+    key = (spec.db_name, spec.table_name)
+    with _archiving_lock:
+        if key in _archiving:
+            return None
+        _archiving.add(key)
+
+    def run(progress):
+        try:
+            return archive_partitions(spec.db_name, spec.table_name, progress=progress)
+        finally:
+            with _archiving_lock:
+                _archiving.discard(key)
+
+    return submit("archive_partitions", run, spec.db_name, spec.table_name)
+
+# Move time partitions to the archive: the given labels, or every partition that is due.
+# Each is copied with VACUUM INTO into a compact file under databases/_archive/, which is
+# made read-only when the table asks for it, and then removed from databases/_shards/.
+def archive_partitions(db_name, table_name, labels=None, progress=None):
+    db_path = os.path.join(DB_FOLDER, f"{db_name}.db")
+    if not os.path.exists(db_path):
+        return {"error": f"Database {db_name} does not exist"}, 404
+    spec = partition_spec(db_name, table_name)
+    if not isinstance(spec, TimePartitionSpec):
+        return {"error": f"Table {table_name} is not a time-partitioned table in {db_name}"}, 404
+
+    if labels is None:
+        indexes = spec.due_for_archive()
+    else:
+        by_label = {spec.label(index): index for index in spec.indexes()}
+        unknown = [label for label in labels if label not in by_label]
+        if unknown:
+            return {"error": f"Unknown partition(s) {', '.join(map(str, unknown))} of table {table_name}"}, 400
+        current = range_ordinal(spec.interval, datetime.now(timezone.utc))
+        indexes = [by_label[label] for label in labels if not spec.archived(by_label[label])]
+        if any(index >= current for index in indexes):
+            return {"error": "Only partitions of past ranges can be archived"}, 400
+
+    archived = []
+    for done, index in enumerate(indexes):
+        if progress:
+            progress(done, len(indexes))
+        if _archive_partition(spec, index):
+            archived.append(spec.label(index))
+    if progress:
+        progress(len(indexes), len(indexes))
+    return {"message": f"{len(archived)} partition(s) of table {table_name} archived", "archived": archived}
+
+def _archive_partition(spec, index):
+    shard, archive = spec.shard(index), spec.archive_shard(index)
+    source, target = database_path(shard), database_path(archive)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    partial_copy = f"{target}.{uuid.uuid4().hex}.tmp"
+
+    # The write lock of the partition is held throughout, so no write is lost between the
+    # copy and the drop; writers that still hold the old spec fail once the table is gone
+    with get_connection(shard) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (spec.table_name,)).fetchone():
+                # Another process archived it first
+                conn.rollback()
+                return False
+            rows = conn.execute(f"SELECT COUNT(*) FROM {spec.table_name}").fetchone()[0]
+            # VACUUM cannot run inside a transaction, so a second connection makes the copy
+            reader = open_connection(source)
+            try:
+                reader.execute("VACUUM INTO ?", (partial_copy,))
+            finally:
+                reader.close()
+            # Archives carry their row count, since a read-only file cannot store one later
+            copy = sqlite3.connect(partial_copy)
+            try:
+                copy.execute(f"CREATE TABLE IF NOT EXISTS {COUNTS_TABLE} (table_name TEXT PRIMARY KEY, row_count INTEGER NOT NULL)")
+                copy.execute(f"INSERT OR REPLACE INTO {COUNTS_TABLE} VALUES (?, ?)", (spec.table_name, rows))
+                copy.commit()
+            finally:
+                copy.close()
+            if spec.read_only:
+                os.chmod(partial_copy, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(partial_copy, target)
+
+            with get_connection(spec.db_name) as main:
+                main.execute(
+                    f"UPDATE {TIME_PARTITION_RANGES_TABLE} SET archived = 1 WHERE table_name = ? AND ordinal = ?",
+                    (spec.table_name, index),
+                )
+                main.commit()
+            conn.execute(f"DROP TABLE {spec.table_name}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            if os.path.exists(partial_copy):
+                os.remove(partial_copy)
+            raise
+
+    schema_changed(spec.db_name)
+    remove_partition_file(shard)
+    schema_changed(archive)
+    return True
+
+# Close and remove the file of a single partition
+def remove_partition_file(shard):
+    close_connections(shard)
+    path = database_path(shard)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    schema_changed(shard)
+
+# Schema changes must reach read-only archives too: the file is made writable for the
+# change and read-only again afterwards. Other partitions are left as they are.
+@contextmanager
+def writable_partition(shard):
+    path = database_path(shard)
+    mode = os.stat(path).st_mode if os.path.exists(path) else None
+    if mode is None or mode & stat.S_IWUSR:
+        yield
+        return
+    close_connections(shard)
+    os.chmod(path, mode | stat.S_IWUSR)
+    try:
+        yield
+    finally:
+        close_connections(shard)
+        os.chmod(path, mode)
+
+# Partition files are created here and only here; connections never create them (see
+# schema.connection.open_connection)
+def create_partition_file(shard):
+    path = database_path(shard)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    sqlite3.connect(path).close()
+
+# Apply a schema change, change(shard) returning a result dict or (dict, status) tuple, to
+# every partition of a table, read-only archives included. Partitions archived while the
+# change runs are visited again at their new place. Returns the first error, if any.
+def change_partitions(spec, change):
+    done = set()
+    while True:
+        for shard in spec.shards:
+            if shard in done:
+                continue
+            with writable_partition(shard):
+                result = change(shard)
+            if isinstance(result, tuple) or "error" in result:
+                fresh = partition_spec(spec.db_name, spec.table_name)
+                if fresh is None or shard in fresh.shards:
+                    return result
+            done.add(shard)
+        fresh = partition_spec(spec.db_name, spec.table_name)
+        if fresh is None or set(fresh.shards) <= done:
+            return None
+        spec = fresh
+
+# Close and remove the partition files of a table
+def _remove_partitions(spec):
+    for shard in spec.shards:
+        close_connections(shard)
+        schema_changed(shard)
+    shutil.rmtree(partition_folder(spec.db_name, spec.table_name), ignore_errors=True)
+    shutil.rmtree(partition_folder(spec.db_name, spec.table_name, archived=True), ignore_errors=True)
+
+def drop_partitioned_table(spec):
+    with get_connection(spec.db_name) as conn:
+        if isinstance(spec, TimePartitionSpec):
+            conn.execute(f"DELETE FROM {TIME_PARTITIONS_TABLE} WHERE table_name = ?", (spec.table_name,))
+            conn.execute(f"DELETE FROM {TIME_PARTITION_RANGES_TABLE} WHERE table_name = ?", (spec.table_name,))
+        else:
+            conn.execute(f"DELETE FROM {PARTITIONS_TABLE} WHERE table_name = ?", (spec.table_name,))
+        conn.commit()
+    schema_changed(spec.db_name)
+    _remove_partitions(spec)
+    return {"message": f"Table {spec.table_name} in database {spec.db_name} deleted successfully"}
+
+def partition_details(db_name, table_name):
+    db_path = os.path.join(DB_FOLDER, f"{db_name}.db")
+    if not os.path.exists(db_path):
+        return {"error": f"Database {db_name} does not exist"}, 404
+    spec = partition_spec(db_name, table_name)
+    if spec is None:
+        return {"error": f"Table {table_name} is not a partitioned table in {db_name}"}, 404
+
+    partitions = []
+    for index in spec.indexes():
+        shard = spec.shard(index)
+        path = os.path.join(DB_FOLDER, f"{shard}.db")
+        size = sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+        partition = {"partition": spec.label(index), "file": path, "rows": exact_count(shard, table_name), "bytes": size}
+        if isinstance(spec, TimePartitionSpec):
+            partition["archived"] = spec.archived(index)
+            partition["writable"] = spec.writable(index)
+        partitions.append(partition)
+    return {**spec.to_dict(), "partitions": partitions}
 
 def list_databases():
     return {"databases": [db[:-3] for db in os.listdir(DB_FOLDER) if db.endswith(".db")]}
@@ -162,120 +643,218 @@ def list_tables(db_name):
     if not os.path.exists(db_path):
         return {"error": f"Database {db_name} does not exist"}, 404
 
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return {"tables": tables}
+    with get_connection(db_name) as conn:
+        cursor = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT IN (?, ?, ?, ?) AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\';",
+            INTERNAL_TABLES,
+        )
+        tables = [row[0] for row in cursor.fetchall()]
+    return {"tables": tables + sorted(partition_specs(db_name))}
 
 def table_details(db_name, table_name):
     db_path = os.path.join(DB_FOLDER, f"{db_name}.db")
     if not os.path.exists(db_path):
         return {"error": f"Database {db_name} does not exist"}, 404
 
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    try:
-        cursor.execute(f"PRAGMA table_info({table_name});")
-        columns = [{"name": row[1], "type": row[2]} for row in cursor.fetchall()]
-        conn.close()
-        return {"columns": columns}
-    except sqlite3.OperationalError:
-        conn.close()
-        return {"error": f"Table {table_name} does not exist in {db_name}"}, 404
+    spec = partition_spec(db_name, table_name)
+    if spec:
+        columns = [{"name": name, "type": column_type} for name, column_type in spec.columns().items()]
+        return {"columns": columns, "partitioning": spec.to_dict()}
+
+    with get_connection(db_name) as conn:
+        try:
+            cursor = conn.execute(f"PRAGMA table_info({table_name});")
+            columns = [{"name": row[1], "type": row[2]} for row in cursor.fetchall()]
+            return {"columns": columns}
+        except sqlite3.OperationalError:
+            return {"error": f"Table {table_name} does not exist in {db_name}"}, 404
 
 def rename_table(db_name, old_table_name, new_table_name):
+    if partition_spec(db_name, old_table_name):
+        return {"error": f"Partitioned table {old_table_name} cannot be renamed"}
+    if is_reserved_table(new_table_name):
+        return reserved_table_error(new_table_name)[0]
     try:
-        conn = sqlite3.connect(f"{DB_FOLDER}/{db_name}.db")
-        cursor = conn.cursor()
-        cursor.execute(f"ALTER TABLE {old_table_name} RENAME TO {new_table_name}")
-        conn.commit()
-        conn.close()
+        with get_connection(db_name) as conn:
+            conn.execute(f"ALTER TABLE {old_table_name} RENAME TO {new_table_name}")
+            set_count(conn, old_table_name)
+            set_count(conn, new_table_name)
+            conn.commit()
+        schema_changed(db_name)
         return {"message": f"Table {old_table_name} renamed to {new_table_name} in database {db_name}"}
     except Exception as e:
         return {"error": str(e)}
 
-def rename_column(db_name, table_name, old_column_name, new_column_name):
+def rename_column(db_name, table_name, old_column_name, new_column_name, progress=None):
+    if partition_spec(db_name, table_name):
+        return {"error": f"Columns of partitioned table {table_name} cannot be renamed"}
     try:
-        # Open the database connection
-        conn = sqlite3.connect(f"{DB_FOLDER}/{db_name}.db")
-        cursor = conn.cursor()
+        # Borrow a connection from the pool
+        with get_connection(db_name) as conn:
+            result = _rename_column(conn, db_name, table_name, old_column_name, new_column_name, progress)
+        schema_changed(db_name)
+        return result
+    except sqlite3.Error as e:
+        return {"error": f"SQLite error: {str(e)}"}
 
-        # Retrieve the table schema
-        cursor.execute(f"PRAGMA table_info({table_name})")
-        columns = cursor.fetchall()
+def _rename_column(conn, db_name, table_name, old_column_name, new_column_name, progress=None):
+    cursor = conn.cursor()
 
-        # Log columns for debugging
-        print(f"Columns in table {table_name}: {columns}")
-
-        # Initialize flag to check if the column exists
-        column_found = False
-
-        # Initialize list for column definitions for the new table
-        column_defs = []
-
-        # Iterate through each column and build the new table definition
-        for column in columns:
-            column_name = column[1].strip()  # Normalize column name (remove extra spaces)
-            column_type = column[2]
-            column_default = column[4]
-            column_notnull = column[3]
-
-            # Check if the current column matches the old column name
-            if column_name.lower() == old_column_name.strip().lower():  # Case insensitive check
-                column_defs.append(f"{new_column_name} {column_type}")
-                column_found = True
-            else:
-                # Retain other columns as they are
-                if column_notnull == 1:
-                    column_defs.append(f"{column_name} {column_type} NOT NULL")
-                else:
-                    column_defs.append(f"{column_name} {column_type}")
-            
-            # Include default value if there is one
-            if column_default is not None:
-                column_defs[-1] += f" DEFAULT {column_default}"
-
-        # If the column wasn't found, return an error
-        if not column_found:
-            return {"error": f"Column {old_column_name} does not exist in table {table_name}"}
-
-        # Prepare the column definitions string for the new table
-        column_defs_str = ", ".join(column_defs)
-
-        # Log the CREATE TABLE query for debugging
-        print(f"CREATE TABLE query: CREATE TABLE {table_name}_new ({column_defs_str})")
-
-        # Create the new table with the updated column name
-        new_table_name = f"{table_name}_new"
-        cursor.execute(f"CREATE TABLE {new_table_name} ({column_defs_str})")
-
-        # Copy data from the old table to the new table
-        cursor.execute(f"INSERT INTO {new_table_name} SELECT * FROM {table_name}")
-
-        # Drop the old table
-        cursor.execute(f"DROP TABLE {table_name}")
-
-        # Rename the new table to the original table name
-        cursor.execute(f"ALTER TABLE {new_table_name} RENAME TO {table_name}")
-
-        # Commit changes and close the connection
-        conn.commit()
-        conn.close()
+    # Retrieve the table schema
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = cursor.fetchall()
 
-        return {"message": f"Column {old_column_name} renamed to {new_column_name} in table {table_name} in database {db_name}"}
-    
-    except sqlite3.Error as e:
-        return {"error": f"SQLite error: {str(e)}"}
+    # Find the column, ignoring case like SQLite does
+    old_name = next((col[1] for col in columns if col[1].strip().lower() == old_column_name.strip().lower()), None)
+
+    # If the column wasn't found, return an error
+    if old_name is None:
+        return {"error": f"Column {old_column_name} does not exist in table {table_name}"}
+
+    if SUPPORTS_RENAME_COLUMN:
+        # Renames in place and rewrites indexes, triggers and views that use the column
+        cursor.execute(f"ALTER TABLE {table_name} RENAME COLUMN {old_name} TO {new_column_name}")
+    else:
+        rebuild_table(cursor, table_name, columns, renamed={old_name: new_column_name}, progress=progress)
+
+    # Commit changes
+    conn.commit()
+
+    return {"message": f"Column {old_column_name} renamed to {new_column_name} in table {table_name} in database {db_name}"}
 
 def truncate_table(db_name, table_name):
+    spec = partition_spec(db_name, table_name)
+    if spec:
+        error = change_partitions(spec, lambda shard: truncate_table(shard, table_name))
+        if error:
+            return error
+        return {"message": f"Table {table_name} truncated in database {db_name}"}
     try:
-        conn = sqlite3.connect(f"{DB_FOLDER}/{db_name}.db")
-        cursor = conn.cursor()
-        cursor.execute(f"DELETE FROM {table_name}")
-        conn.commit()
-        conn.close()
+        with get_connection(db_name) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            observe(db_name)
+            conn.execute(f"DELETE FROM {table_name}")
+            set_count(conn, table_name, 0)
+            conn.commit()
+        bump(db_name, table_name)
         return {"message": f"Table {table_name} truncated in database {db_name}"}
     except Exception as e:
         return {"error": str(e)}
+
+# Indexes of a table as [{name, columns, unique, origin}]; origin is "c" for CREATE INDEX,
+# "u" for UNIQUE constraints and "pk" for primary keys
+def _table_indexes(conn, table_name):
+    indexes = []
+    for _, name, unique, origin, _ in conn.execute(f"PRAGMA index_list({table_name})").fetchall():
+        columns = [row[2] for row in conn.execute(f"PRAGMA index_info({name})").fetchall()]
+        indexes.append({"name": name, "columns": columns, "unique": bool(unique), "origin": origin})
+    return indexes
+
+def list_indexes(db_name, table_name):
+    db_path = os.path.join(DB_FOLDER, f"{db_name}.db")
+    if not os.path.exists(db_path):
+        return {"error": f"Database {db_name} does not exist"}, 404
+
+    spec = partition_spec(db_name, table_name)
+    if spec:
+        # Every partition carries the same indexes
+        return list_indexes(spec.shards[0], table_name)
+
+    with get_connection(db_name) as conn:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table_name,)).fetchone():
+            return {"error": f"Table {table_name} does not exist in {db_name}"}, 404
+        return {"indexes": _table_indexes(conn, table_name)}
+
+def create_index(db_name, table_name, columns, unique=False, index_name=None):
+    if isinstance(columns, str):
+        columns = [columns]
+    if not columns:
+        return {"error": "At least one column is required"}, 400
+    index_name = index_name or f"idx_{table_name}_{'_'.join(columns)}"
+    if not re.fullmatch(r"\w+", index_name):
+        return {"error": f"Invalid index name {index_name}"}, 400
+
+    spec = partition_spec(db_name, table_name)
+    if spec:
+        error = change_partitions(spec, lambda shard: create_index(shard, table_name, columns, unique, index_name))
+        if error:
+            return error
+        return {"message": f"Index {index_name} created on {table_name}({', '.join(columns)}) in database {db_name}", "name": index_name}
+
+    try:
+        with get_connection(db_name) as conn:
+            table_columns = {row[1].lower() for row in conn.execute(f"PRAGMA table_info({table_name})").fetchall()}
+            if not table_columns:
+                return {"error": f"Table {table_name} does not exist in {db_name}"}, 404
+            missing = [column for column in columns if column.lower() not in table_columns]
+            if missing:
+                return {"error": f"Column(s) {', '.join(missing)} do not exist in table {table_name}"}, 400
+
+            # Builds the index with a single sort over the table; readers are not blocked in WAL mode
+            unique_clause = "UNIQUE " if unique else ""
+            conn.execute(f"CREATE {unique_clause}INDEX {index_name} ON {table_name} ({', '.join(columns)})")
+            conn.commit()
+            conn.execute(f"ANALYZE {index_name}")
+            conn.commit()
+        # Indexes do not change any data, so cached reads stay valid
+        invalidate(db_name)
+        return {"message": f"Index {index_name} created on {table_name}({', '.join(columns)}) in database {db_name}", "name": index_name}
+    except sqlite3.Error as e:
+        return {"error": str(e)}, 400
+
+def drop_index(db_name, table_name, index_name):
+    spec = partition_spec(db_name, table_name)
+    if spec:
+        error = change_partitions(spec, lambda shard: drop_index(shard, table_name, index_name))
+        if error:
+            return error
+        return {"message": f"Index {index_name} dropped from table {table_name} in database {db_name}"}
+    try:
+        with get_connection(db_name) as conn:
+            row = conn.execute(
+                "SELECT tbl_name, sql FROM sqlite_master WHERE type='index' AND name=?", (index_name,)
+            ).fetchone()
+            if row is None or row[0] != table_name:
+                return {"error": f"Index {index_name} does not exist on table {table_name}"}, 404
+            if row[1] is None:
+                return {"error": f"Index {index_name} belongs to a constraint and cannot be dropped"}, 400
+            conn.execute(f"DROP INDEX {index_name}")
+            conn.commit()
+        invalidate(db_name)
+        return {"message": f"Index {index_name} dropped from table {table_name} in database {db_name}"}
+    except sqlite3.Error as e:
+        return {"error": str(e)}, 400
+
+# Names SQLite reports numerically for these pragmas
+PRAGMA_NAMES = {
+    "synchronous": {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"},
+    "temp_store": {0: "DEFAULT", 1: "FILE", 2: "MEMORY"},
+}
+
+def database_settings(db_name=None):
+    result = {"profile": get_profile(db_name), "overrides": get_overrides(db_name)}
+    if db_name is None:
+        return result
+
+    db_path = os.path.join(DB_FOLDER, f"{db_name}.db")
+    if not os.path.exists(db_path):
+        return {"error": f"Database {db_name} does not exist"}, 404
+
+    # Read back what a pooled connection actually runs with
+    in_effect = {}
+    with get_connection(db_name) as conn:
+        for pragma in result["profile"]:
+            value = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+            in_effect[pragma] = PRAGMA_NAMES.get(pragma, {}).get(value, value)
+    in_effect["journal_mode"] = str(in_effect.get("journal_mode", "")).upper()
+    result["in_effect"] = in_effect
+    return result
+
+def update_database_settings(settings, db_name=None):
+    try:
+        update_profile(settings, db_name)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    # New settings apply to connections opened from now on
+    close_connections(db_name)
+    return database_settings(db_name)
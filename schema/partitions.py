@@ -0,0 +1,345 @@
+import itertools
+import os
+import random
+import sqlite3
+import threading
+import zlib
+from datetime import date, datetime, timezone
+from schema.connection import DB_FOLDER, SHARDS_FOLDER, ARCHIVE_FOLDER, db_path, get_connection
+from schema.catalog import get_tables, get_columns
+from schema.versions import version
+
+# Partitioned tables of a database, kept inside that database
+PARTITIONS_TABLE = "_partitions"
+# Time-partitioned tables, and the time partitions each of them has
+TIME_PARTITIONS_TABLE = "_time_partitions"
+TIME_PARTITION_RANGES_TABLE = "_time_partition_ranges"
+METADATA_TABLES = (PARTITIONS_TABLE, TIME_PARTITIONS_TABLE, TIME_PARTITION_RANGES_TABLE)
+# Each partition is a database of its own: databases/_shards/<db>/<table>/part_<n>.db
+# (SHARDS_FOLDER), and archived time partitions go to databases/_archive/<db>/<table>/p_<range>.db
+# (ARCHIVE_FOLDER)
+# Most partitions a table can be split into
+MAX_PARTITIONS = int(os.environ.get("MAX_PARTITIONS", 64))
+
+# Time partition ranges; a range is numbered by its ordinal, e.g. year * 12 + month - 1
+INTERVALS = ("day", "month", "year")
+# Ids of a time partition start at its ordinal << ID_RANGE_BITS, so the id of a row
+# names its partition; ordinals stay small enough for ids to remain exact in JSON
+ID_RANGE_BITS = 32
+
+_specs = {}
+_lock = threading.Lock()
+
+
+# Where a partitioned table lives and how its rows are spread. Every partition holds the
+# same table with the same columns. Ids are handed out by each partition so that
+# id % partitions is the partition holding the row, whatever the partition key is; rows
+# are spread round robin when the key is id and by a hash of the key otherwise.
+class PartitionSpec:
+    kind = "hash"
+    id_step = None
+
+    def __init__(self, db_name, table_name, key, partitions):
+        self.db_name = db_name
+        self.table_name = table_name
+        self.key = key
+        self.partitions = partitions
+        self.shards = [partition_name(db_name, table_name, f"part_{index}") for index in range(partitions)]
+        self.id_step = partitions
+        self._next = itertools.count(random.randrange(partitions))
+
+    def indexes(self):
+        return list(range(self.partitions))
+
+    def shard(self, index):
+        return self.shards[index]
+
+    def label(self, index):
+        return index
+
+    def writable(self, index):
+        return True
+
+    # First id of a write to a partition whose sequence stands at last_id
+    def first_id(self, index, last_id):
+        return last_id + ((index - last_id) % self.partitions or self.partitions)
+
+    def index_for_id(self, record_id):
+        try:
+            return int(record_id) % self.partitions
+        except (TypeError, ValueError):
+            return None
+
+    def shard_for_id(self, record_id):
+        index = self.index_for_id(record_id)
+        return None if index is None else self.shard(index)
+
+    def index_for_key(self, value):
+        if self.key == "id":
+            return self.index_for_id(value)
+        # Hash the text form so 5 and "5" (e.g. from a query string) land together
+        return zlib.crc32(str(value).encode("utf-8")) % self.partitions
+
+    def index_for_row(self, row):
+        if self.key == "id":
+            return next(self._next) % self.partitions
+        return self.index_for_key(row.get(self.key))
+
+    # Partition index of each row, in order
+    def assign(self, rows):
+        return [self.index_for_row(row) for row in rows]
+
+    # Partitions that can hold rows matching GET filters, as (column, operator, values) triples.
+    # Equality on id or on the partition key narrows the search; anything else reads them all.
+    def indexes_for_filters(self, filters):
+        indexes = set(range(self.partitions))
+        for column, operator, values in filters:
+            if operator not in ("eq", "in"):
+                continue
+            if column.lower() == "id":
+                matches = {self.index_for_id(value) for value in values}
+            elif column.lower() == self.key.lower():
+                matches = {self.index_for_key(value) for value in values}
+            else:
+                continue
+            if None not in matches:
+                indexes &= matches
+        return sorted(indexes)
+
+    # Filter values in the form the rows store them; only time-partitioned tables rewrite any
+    def normalise_filters(self, filters):
+        return filters
+
+    # Columns of the table, which are the same in every partition
+    def columns(self):
+        return get_columns(self.shards[0], self.table_name)
+
+    # Version of the data across all partitions, for ETags and cached reads
+    def version(self):
+        return format(zlib.crc32("|".join(version(shard, self.table_name) for shard in self.shards).encode()), "08x")
+
+    def to_dict(self):
+        return {"type": self.kind, "key": self.key, "partitions": self.partitions}
+
+
+# Where a time-partitioned table lives. Rows are kept in one partition per day, month or
+# year of their timestamp column; a partition is created when its first row arrives.
+# Partitions older than archive_after ranges move to compact files under
+# databases/_archive/, which are read-only when read_only is set.
+class TimePartitionSpec(PartitionSpec):
+    kind = "time"
+    id_step = 1
+
+    # ranges: {ordinal: archived}
+    def __init__(self, db_name, table_name, key, interval, archive_after, read_only, ranges):
+        self.db_name = db_name
+        self.table_name = table_name
+        self.key = key
+        self.interval = interval
+        self.archive_after = archive_after
+        self.read_only = read_only
+        self.ranges = ranges
+        self.partitions = len(ranges)
+        self.shards = [self.shard(index) for index in self.indexes()]
+
+    def indexes(self):
+        return sorted(self.ranges)
+
+    def shard(self, index):
+        return partition_name(self.db_name, self.table_name, f"p_{self.label(index)}", self.archived(index))
+
+    # Where a range lives once archived
+    def archive_shard(self, index):
+        return partition_name(self.db_name, self.table_name, f"p_{self.label(index)}", True)
+
+    def label(self, index):
+        return range_label(self.interval, index)
+
+    def archived(self, index):
+        return self.ranges.get(index, False)
+
+    def writable(self, index):
+        return not (self.read_only and self.archived(index))
+
+    def first_id(self, index, last_id):
+        return max(last_id, index << ID_RANGE_BITS) + 1
+
+    def index_for_id(self, record_id):
+        try:
+            return int(record_id) >> ID_RANGE_BITS
+        except (TypeError, ValueError):
+            return None
+
+    def shard_for_id(self, record_id):
+        index = self.index_for_id(record_id)
+        return self.shard(index) if index in self.ranges else None
+
+    # Range of a row. A row without a timestamp is stamped with the current UTC time. Every
+    # timestamp is stored as UTC text in one form (YYYY-MM-DD HH:MM:SS), so that timestamps
+    # written as ISO strings of any style or as Unix times compare alike in SQL.
+    def index_for_row(self, row):
+        value = row.get(self.key)
+        moment = datetime.now(timezone.utc).replace(tzinfo=None) if value is None else parse_timestamp(value)
+        if moment is None:
+            raise ValueError(f"{self.key} must be an ISO 8601 timestamp or a Unix time, got {value!r}")
+        row[self.key] = moment.isoformat(sep=" ")
+        return range_ordinal(self.interval, moment)
+
+    # Ranges that can hold rows matching GET filters: equality on id or the timestamp
+    # picks ranges, and lt/lte/gt/gte on the timestamp bound them
+    def indexes_for_filters(self, filters):
+        low, high = None, None
+        indexes = set(self.ranges)
+        for column, operator, values in filters:
+            if column.lower() == "id" and operator in ("eq", "in"):
+                matches = {self.index_for_id(value) for value in values}
+                if None not in matches:
+                    indexes &= matches
+                continue
+            if column.lower() != self.key.lower():
+                continue
+            moments = [parse_timestamp(value) for value in values]
+            if not moments or None in moments:
+                continue
+            ordinals = {range_ordinal(self.interval, moment) for moment in moments}
+            if operator in ("eq", "in"):
+                indexes &= ordinals
+            elif operator in ("lt", "lte"):
+                high = min(ordinals) if high is None else min(high, *ordinals)
+            elif operator in ("gt", "gte"):
+                low = max(ordinals) if low is None else max(low, *ordinals)
+        return sorted(index for index in indexes if (low is None or index >= low) and (high is None or index <= high))
+
+    # Timestamps filtering the key are rewritten in the stored form, so that they compare
+    # with the stored text the way the moments they name compare
+    def normalise_filters(self, filters):
+        normalised = []
+        for column, operator, values in filters:
+            if column.lower() == self.key.lower():
+                moments = [parse_timestamp(value) for value in values]
+                values = [value if moment is None else moment.isoformat(sep=" ") for value, moment in zip(values, moments)]
+            normalised.append((column, operator, values))
+        return normalised
+
+    # Columns of the newest partition; new columns reach every partition
+    def columns(self):
+        return get_columns(self.shard(max(self.ranges)), self.table_name) if self.ranges else {}
+
+    # Hot ranges due for the archive, oldest first
+    def due_for_archive(self, now=None):
+        if not self.archive_after:
+            return []
+        current = range_ordinal(self.interval, now or datetime.now(timezone.utc).replace(tzinfo=None))
+        return [index for index in self.indexes() if not self.archived(index) and current - index >= self.archive_after]
+
+    def to_dict(self):
+        return {
+            "type": self.kind,
+            "key": self.key,
+            "interval": self.interval,
+            "archive_after": self.archive_after,
+            "read_only": self.read_only,
+            "partitions": self.partitions,
+        }
+
+
+# The naive UTC moment of a timestamp: an ISO 8601 string with a UTC offset (or Z) is
+# converted to UTC, one without is taken as UTC already, and a number is a Unix time.
+# Returns None for anything else.
+def parse_timestamp(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            moment = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            pass
+        else:
+            if moment.tzinfo is not None:
+                moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+            return moment
+        try:
+            value = float(text)
+        except ValueError:
+            return None
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+        except (OverflowError, OSError, ValueError):
+            return None
+    return None
+
+
+def range_ordinal(interval, moment):
+    if interval == "day":
+        return moment.toordinal()
+    if interval == "month":
+        return moment.year * 12 + moment.month - 1
+    return moment.year
+
+
+def range_label(interval, ordinal):
+    if interval == "day":
+        return date.fromordinal(ordinal).isoformat()
+    if interval == "month":
+        return f"{ordinal // 12:04d}-{ordinal % 12 + 1:02d}"
+    return f"{ordinal:04d}"
+
+
+def partition_name(db_name, table_name, name, archived=False):
+    return "/".join((ARCHIVE_FOLDER if archived else SHARDS_FOLDER, db_name, table_name, name))
+
+
+def partition_folder(db_name, table_name=None, archived=False):
+    folder = os.path.join(DB_FOLDER, ARCHIVE_FOLDER if archived else SHARDS_FOLDER, db_name)
+    return os.path.join(folder, table_name) if table_name else folder
+
+
+# Rows of a metadata table, or none if nothing in the database needed it yet
+def _metadata(conn, query):
+    try:
+        return conn.execute(query).fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+
+def _load_specs(db_name):
+    specs = {}
+    with get_connection(db_name) as conn:
+        hashed = _metadata(conn, f"SELECT table_name, partition_key, partitions FROM {PARTITIONS_TABLE}")
+        timed = _metadata(conn, f"SELECT table_name, time_column, interval, archive_after, read_only FROM {TIME_PARTITIONS_TABLE}")
+        ranges = _metadata(conn, f"SELECT table_name, ordinal, archived FROM {TIME_PARTITION_RANGES_TABLE}")
+    for table_name, key, partitions in hashed:
+        specs[table_name] = PartitionSpec(db_name, table_name, key, partitions)
+    table_ranges = {}
+    for table_name, ordinal, archived in ranges:
+        table_ranges.setdefault(table_name, {})[ordinal] = bool(archived)
+    for table_name, key, interval, archive_after, read_only in timed:
+        specs[table_name] = TimePartitionSpec(
+            db_name, table_name, key, interval, archive_after, bool(read_only), table_ranges.get(table_name, {})
+        )
+    return specs
+
+
+# {table name: PartitionSpec} of a database, reloaded whenever the database changes
+def partition_specs(db_name):
+    if not os.path.exists(db_path(db_name)):
+        return {}
+    data_version = version(db_name, PARTITIONS_TABLE)
+    with _lock:
+        entry = _specs.get(db_name)
+    if entry is not None and entry[0] == data_version:
+        return entry[1]
+    specs = _load_specs(db_name)
+    with _lock:
+        _specs[db_name] = (data_version, specs)
+    return specs
+
+
+# The PartitionSpec of a table, or None for plain tables and tables that do not exist.
+# Plain tables are answered from the cached schema catalog without reading the metadata.
+def partition_spec(db_name, table_name):
+    if not os.path.exists(db_path(db_name)) or table_name in get_tables(db_name):
+        return None
+    return partition_specs(db_name).get(table_name)
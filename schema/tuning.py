@@ -0,0 +1,125 @@
+import json
+import os
+import sqlite3
+import threading
+
+# Profiles live next to the databases/ folder:
+# {"default": {...}, "databases": {"<db_name>": {...}}}
+PROFILE_FILE = os.environ.get("DB_PROFILE_FILE", "db_profiles.json")
+
+# Built-in profile, used for any setting the profile file does not override
+DEFAULT_PROFILE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 268435456,
+    "cache_size": -65536,
+    "temp_store": "MEMORY",
+    "busy_timeout": int(os.environ.get("DB_BUSY_TIMEOUT", 5000)),
+}
+
+SETTING_CHOICES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+}
+INTEGER_SETTINGS = {"mmap_size", "cache_size", "busy_timeout"}
+
+_profiles = {"default": {}, "databases": {}}
+_profiles_mtime = None
+_lock = threading.RLock()
+
+
+def _load():
+    global _profiles, _profiles_mtime
+    try:
+        mtime = os.path.getmtime(PROFILE_FILE)
+    except OSError:
+        mtime = None
+    if mtime == _profiles_mtime:
+        return _profiles
+    with _lock:
+        if mtime is None:
+            _profiles = {"default": {}, "databases": {}}
+        else:
+            with open(PROFILE_FILE) as f:
+                data = json.load(f)
+            _profiles = {"default": data.get("default", {}), "databases": data.get("databases", {})}
+        _profiles_mtime = mtime
+    return _profiles
+
+
+# Check a partial profile; returns the normalised settings or raises ValueError
+def validate_settings(settings):
+    if not isinstance(settings, dict):
+        raise ValueError("Settings must be a JSON object")
+    normalised = {}
+    for key, value in settings.items():
+        if value is None:
+            normalised[key] = None
+        elif key in SETTING_CHOICES:
+            value = str(value).upper()
+            if value not in SETTING_CHOICES[key]:
+                raise ValueError(f"{key} must be one of {', '.join(sorted(SETTING_CHOICES[key]))}")
+            normalised[key] = value
+        elif key in INTEGER_SETTINGS:
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(f"{key} must be an integer")
+            normalised[key] = value
+        else:
+            raise ValueError(f"Unknown setting {key}")
+    return normalised
+
+
+def get_profile(db_name=None):
+    profiles = _load()
+    profile = dict(DEFAULT_PROFILE)
+    profile.update(profiles["default"])
+    if db_name is not None:
+        profile.update(profiles["databases"].get(db_name, {}))
+    return profile
+
+
+def get_overrides(db_name=None):
+    profiles = _load()
+    if db_name is None:
+        return dict(profiles["default"])
+    return dict(profiles["databases"].get(db_name, {}))
+
+
+# Merge settings into the global profile (db_name=None) or a database override; None removes a key
+def update_profile(settings, db_name=None):
+    global _profiles, _profiles_mtime
+    settings = validate_settings(settings)
+    with _lock:
+        profiles = json.loads(json.dumps(_load()))
+        target = profiles["default"] if db_name is None else profiles["databases"].setdefault(db_name, {})
+        for key, value in settings.items():
+            if value is None:
+                target.pop(key, None)
+            else:
+                target[key] = value
+        if db_name is not None and not target:
+            del profiles["databases"][db_name]
+        tmp_path = f"{PROFILE_FILE}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(profiles, f, indent=2)
+        os.replace(tmp_path, PROFILE_FILE)
+        _profiles, _profiles_mtime = profiles, os.path.getmtime(PROFILE_FILE)
+    return get_profile(db_name)
+
+
+# Profile for a database file; internal files get the global profile
+def profile_for_path(path, db_folder):
+    if os.path.dirname(path) == db_folder:
+        return get_profile(os.path.splitext(os.path.basename(path))[0])
+    return get_profile()
+
+
+def apply_profile(conn, profile):
+    for pragma, value in profile.items():
+        try:
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        except sqlite3.OperationalError:
+            # Another connection may hold the file in a journal mode that cannot be left right now
+            if pragma != "journal_mode":
+                raise
@@ -0,0 +1,70 @@
+import os
+import threading
+import uuid
+from schema.connection import db_path
+
+# Counters are per process; the boot id keeps versions from two process lifetimes apart
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+_tables = {}
+_databases = {}
+_file_tokens = {}
+_lock = threading.Lock()
+
+
+# Forked workers of a preloaded app each count on their own, so each needs its own boot id
+def _reset_after_fork():
+    global _BOOT_ID
+    _BOOT_ID = uuid.uuid4().hex[:8]
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# The database and WAL files change on every commit, including commits from other processes
+def _file_token(db_name):
+    path = db_path(db_name)
+    token = []
+    for name in (path, path + "-wal"):
+        try:
+            stat = os.stat(name)
+            token.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            token.append(None)
+    return tuple(token)
+
+
+# Call with _lock held. A file that changed since we last looked was written by someone
+# else, and we cannot tell which tables they touched, so the whole database moves on.
+def _observe(db_name, token):
+    if _file_tokens.get(db_name) != token:
+        _databases[db_name] = _databases.get(db_name, 0) + 1
+        _file_tokens[db_name] = token
+
+
+# Take note of writes by other processes before writing. Writers call this holding the
+# database's write lock, so the file changes between here and their bump() are their own.
+def observe(db_name):
+    token = _file_token(db_name)
+    with _lock:
+        _observe(db_name, token)
+
+
+# Record a write to a table, or to the whole database when table_name is None (DDL, raw SQL).
+# The new file token is taken as our own write; call observe() before writing so that
+# writes from other processes are not absorbed into it.
+def bump(db_name, table_name=None):
+    with _lock:
+        if table_name is None:
+            _databases[db_name] = _databases.get(db_name, 0) + 1
+        else:
+            _tables[(db_name, table_name)] = _tables.get((db_name, table_name), 0) + 1
+        _file_tokens[db_name] = _file_token(db_name)
+
+
+# Opaque version of a table's data; it changes whenever any write path touches the table
+def version(db_name, table_name):
+    token = _file_token(db_name)
+    with _lock:
+        _observe(db_name, token)
+        return f"{_BOOT_ID}.{_databases.get(db_name, 0)}.{_tables.get((db_name, table_name), 0)}"
@@ -0,0 +1,156 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from schema.connection import get_connection, retry_on_busy
+from schema.versions import observe
+from metrics.registry import register_collector, Counter, Histogram
+
+# Send every API write of a database through one writer thread per process, which commits
+# the writes that queue up together in one transaction (group commit)
+WRITE_COORDINATOR = os.environ.get("WRITE_COORDINATOR", "false").lower() in ("1", "true", "yes")
+# Milliseconds the writer waits for more writes after the first one of a group
+GROUP_COMMIT_WINDOW_MS = float(os.environ.get("GROUP_COMMIT_WINDOW_MS", 2))
+# Most writes committed in one transaction
+GROUP_COMMIT_MAX_WRITES = int(os.environ.get("GROUP_COMMIT_MAX_WRITES", 256))
+# Seconds an idle writer thread stays around
+WRITER_IDLE_TIMEOUT = 60
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+GROUP_SIZE = Histogram(
+    "dynamic_api_write_group_size",
+    "Writes committed per group-commit transaction",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+GROUP_COMMITS = Counter("dynamic_api_write_group_commits", "Group-commit transactions, by outcome", ("result",))
+
+
+# Threads do not survive a fork; a forked worker starts its own writers on first use
+def _reset_after_fork():
+    global _writers_lock
+    _writers.clear()
+    _writers_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class _Writer:
+    def __init__(self, db_name):
+        self.db_name = db_name
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._loop, name=f"writer-{db_name}", daemon=True)
+
+    def _collect(self, first):
+        group = [first]
+        deadline = time.monotonic() + GROUP_COMMIT_WINDOW_MS / 1000
+        while len(group) < GROUP_COMMIT_MAX_WRITES:
+            # Take what queued up while the last group was committing, then wait out the window
+            try:
+                remaining = deadline - time.monotonic()
+                group.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return group
+
+    def _loop(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=WRITER_IDLE_TIMEOUT)
+            except queue.Empty:
+                # Writes are only queued while holding _writers_lock, so none can slip in here
+                with _writers_lock:
+                    if self.queue.empty():
+                        if _writers.get(self.db_name) is self:
+                            del _writers[self.db_name]
+                        return
+                continue
+
+            group = self._collect(first)
+            GROUP_SIZE.observe(len(group))
+            try:
+                outcomes = _commit_group(self.db_name, [work for work, _ in group])
+            except BaseException as e:
+                GROUP_COMMITS.inc("failed")
+                for _, future in group:
+                    future.set_exception(e)
+                continue
+            GROUP_COMMITS.inc("committed")
+            for (_, future), (ok, value) in zip(group, outcomes):
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+
+# One transaction for the whole group; each write runs in its own savepoint, so a failing
+# write is undone on its own and reported to its caller while the others still commit.
+# Runs again from the start if the database is locked, so outcomes are only handed out
+# once the commit has succeeded.
+@retry_on_busy
+def _commit_group(db_name, works):
+    outcomes = []
+    with get_connection(db_name) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        observe(db_name)
+        try:
+            for work in works:
+                conn.execute("SAVEPOINT group_write")
+                try:
+                    outcomes.append((True, work(conn)))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO group_write")
+                    outcomes.append((False, e))
+                conn.execute("RELEASE group_write")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return outcomes
+
+
+@retry_on_busy
+def _run_alone(db_name, work):
+    with get_connection(db_name) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        observe(db_name)
+        try:
+            result = work(conn)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return result
+
+
+# Run work(conn) in a write transaction on the database and return its result. The work
+# must not commit or roll back itself, and must be safe to run again if the database is
+# locked. With WRITE_COORDINATOR on, it shares a transaction with other queued writes.
+def run_write(db_name, work):
+    if not WRITE_COORDINATOR:
+        return _run_alone(db_name, work)
+    future = Future()
+    with _writers_lock:
+        writer = _writers.get(db_name)
+        if writer is None:
+            writer = _writers[db_name] = _Writer(db_name)
+            writer.thread.start()
+        writer.queue.put((work, future))
+    return future.result()
+
+
+def writer_stats():
+    with _writers_lock:
+        return {db_name: {"queued": writer.queue.qsize()} for db_name, writer in _writers.items()}
+
+
+@register_collector
+def _writer_metrics():
+    stats = writer_stats()
+    return [
+        ("dynamic_api_write_queue_depth", "gauge", "Writes waiting for the writer thread of each database",
+         [({"database": db_name}, writer["queued"]) for db_name, writer in stats.items()]),
+    ]
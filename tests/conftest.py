@@ -0,0 +1,29 @@
+import os
+import sys
+import uuid
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Databases live under the working directory, and connections, caches and versions are
+# kept per process, so the whole session runs in one scratch directory and every test
+# gets a database of its own.
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    os.chdir(tmp_path_factory.mktemp("work"))
+    from main import create_app
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def db(client):
+    name = f"test_{uuid.uuid4().hex[:8]}"
+    response = client.post("/db/", json={"name": name})
+    assert response.status_code < 400, response.json
+    return name
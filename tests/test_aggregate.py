@@ -0,0 +1,77 @@
+import pytest
+
+COLUMNS = [{"name": "region", "type": "TEXT"}, {"name": "status", "type": "TEXT"}, {"name": "amount", "type": "INTEGER"}]
+ROWS = [
+    {"region": "west", "status": "paid", "amount": 100},
+    {"region": "west", "status": "paid", "amount": 300},
+    {"region": "west", "status": "open", "amount": 50},
+    {"region": "east", "status": "paid", "amount": 20},
+    {"region": "east", "status": "paid", "amount": None},
+    {"region": "north", "status": "open", "amount": 70},
+]
+
+
+def make_table(client, db, table_name, **options):
+    assert client.post(f"/db/{db}/{table_name}", json={"columns": COLUMNS, **options}).status_code < 400
+    assert client.post(f"/{db}/{table_name}", json={"data": [dict(row) for row in ROWS]}).status_code == 200
+
+
+def aggregate(client, db, table_name="orders", **params):
+    response = client.get(f"/{db}/{table_name}/aggregate", query_string=params)
+    assert response.status_code == 200, response.json
+    return response.json["data"]
+
+
+@pytest.fixture
+def table(client, db):
+    make_table(client, db, "orders")
+    return db
+
+
+def test_group_by_with_every_function(client, table):
+    data = aggregate(client, table, group_by="region", agg="count,sum:amount,avg:amount,min:amount,max:amount")
+    assert data == [
+        {"region": "east", "count": 2, "sum_amount": 20, "avg_amount": 20.0, "min_amount": 20, "max_amount": 20},
+        {"region": "north", "count": 1, "sum_amount": 70, "avg_amount": 70.0, "min_amount": 70, "max_amount": 70},
+        {"region": "west", "count": 3, "sum_amount": 450, "avg_amount": 150.0, "min_amount": 50, "max_amount": 300},
+    ]
+
+
+def test_filters_having_order_and_limit(client, table):
+    data = aggregate(client, table, group_by="region", agg="count,sum:amount", status="paid",
+                     having="sum_amount__gt:10", orderby="sum_amount", order="DESC", limit=1)
+    assert data == [{"region": "west", "count": 2, "sum_amount": 400}]
+
+
+def test_without_group_by_aggregates_whole_table(client, table):
+    assert aggregate(client, table, agg="count,max:amount") == [{"count": 6, "max_amount": 300}]
+    # agg defaults to count
+    assert aggregate(client, table) == [{"count": 6}]
+
+
+def test_partitioned_table_matches_plain_table(client, table):
+    make_table(client, table, "sharded", partitions=3)
+    params = dict(group_by="region", agg="count,sum:amount,avg:amount,min:amount,max:amount", having="count__gte:2")
+
+    assert aggregate(client, table, "sharded", **params) == aggregate(client, table, **params)
+
+
+def test_aggregate_is_cached_until_the_table_changes(client, table):
+    first = client.get(f"/{table}/orders/aggregate", query_string={"agg": "count"})
+    etag = first.headers["ETag"]
+    assert client.get(f"/{table}/orders/aggregate", query_string={"agg": "count"}, headers={"If-None-Match": etag}).status_code == 304
+
+    client.post(f"/{table}/orders", json={"data": {"region": "west"}})
+    second = client.get(f"/{table}/orders/aggregate", query_string={"agg": "count"}, headers={"If-None-Match": etag})
+    assert second.status_code == 200 and second.json["data"] == [{"count": 7}]
+
+
+@pytest.mark.parametrize("params", [
+    {"agg": "median:amount"},
+    {"agg": "sum:missing"},
+    {"agg": "count", "having": "nope__gt:1"},
+    {"agg": "count", "group_by": "region", "orderby": "status"},
+    {"agg": "count", "group_by": "missing"},
+])
+def test_invalid_aggregates_are_rejected(client, table, params):
+    assert client.get(f"/{table}/orders/aggregate", query_string=params).status_code == 400
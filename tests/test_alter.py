@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import pytest
+from schema.connection import DB_FOLDER
+
+COLUMNS = [
+    {"name": "k", "type": "TEXT UNIQUE"},
+    {"name": "a", "type": "TEXT"},
+    {"name": "b", "type": "INTEGER NOT NULL DEFAULT 0"},
+]
+
+
+def rootpage(db, table_name):
+    conn = sqlite3.connect(os.path.join(DB_FOLDER, f"{db}.db"))
+    try:
+        return conn.execute("SELECT rootpage FROM sqlite_master WHERE name = ?", (table_name,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def table(client, db):
+    assert client.post(f"/db/{db}/t", json={"columns": COLUMNS}).status_code < 400
+    client.post(f"/{db}/t", json={"data": [{"k": "x", "a": "1", "b": 2}, {"k": "y", "a": "2"}, {"k": "z", "a": "3"}]})
+    client.delete(f"/{db}/t/3")
+    assert client.post(f"/db/{db}/t/indexes", json={"columns": ["b"]}).status_code < 400
+    return db
+
+
+def column_names(client, db):
+    return [column["name"] for column in client.get(f"/db/{db}/t").json["columns"]]
+
+
+def test_plain_column_is_dropped_in_place(client, table):
+    before = rootpage(table, "t")
+    response = client.put(f"/db/{table}/t", json={"remove_column": ["a"]})
+
+    assert response.status_code == 200, response.json
+    assert column_names(client, table) == ["id", "k", "b"]
+    assert rootpage(table, "t") == before
+    assert [row["k"] for row in client.get(f"/{table}/t").json["data"]] == ["x", "y"]
+
+
+def test_column_is_renamed_in_place(client, table):
+    before = rootpage(table, "t")
+    response = client.post(f"/db/{table}/t/rename_column", json={"old_column_name": "b", "new_column_name": "c"})
+
+    assert response.status_code == 200, response.json
+    assert column_names(client, table) == ["id", "k", "a", "c"]
+    assert rootpage(table, "t") == before
+    assert [row["c"] for row in client.get(f"/{table}/t").json["data"]] == [2, 0]
+    assert client.get(f"/db/{table}/t/indexes").json["indexes"][0]["columns"] in (["c"], ["k"])
+
+
+# SQLite refuses to drop an indexed column in place, so the table is rebuilt
+def test_indexed_column_falls_back_to_rebuild(client, table):
+    before = rootpage(table, "t")
+    response = client.put(f"/db/{table}/t", json={"remove_column": ["b"]})
+
+    assert response.status_code == 200, response.json
+    assert column_names(client, table) == ["id", "k", "a"]
+    assert rootpage(table, "t") != before
+    indexes = client.get(f"/db/{table}/t/indexes").json["indexes"]
+    assert [(index["columns"], index["unique"]) for index in indexes] == [(["k"], True)]
+
+
+def test_rebuild_keeps_keys_constraints_and_indexes(client, table, monkeypatch):
+    monkeypatch.setattr("schema.db_utils.SUPPORTS_DROP_COLUMN", False)
+    response = client.put(f"/db/{table}/t", json={"remove_column": ["a"]})
+
+    assert response.status_code == 200, response.json
+    assert column_names(client, table) == ["id", "k", "b"]
+    indexes = {tuple(index["columns"]): index["unique"] for index in client.get(f"/db/{table}/t/indexes").json["indexes"]}
+    assert indexes == {("k",): True, ("b",): False}
+    # AUTOINCREMENT survives, so the id of the deleted row is not handed out again
+    assert client.post(f"/{table}/t", json={"data": {"k": "w"}}).json["data"]["first_rowid"] == 4
+    assert client.post(f"/{table}/t", json={"data": {"k": "x"}}).status_code == 400
+    assert client.get(f"/{table}/t/4").json["data"]["b"] == 0
+
+
+def test_unknown_column_is_reported(client, table):
+    result = client.put(f"/db/{table}/t", json={"remove_column": ["missing"]}).json
+    assert "does not exist" in str(result)
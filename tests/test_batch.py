@@ -0,0 +1,87 @@
+import pytest
+
+
+@pytest.fixture
+def table(client, db):
+    client.post(f"/db/{db}/accounts", json={"columns": [{"name": "owner", "type": "TEXT UNIQUE"}, {"name": "balance", "type": "INTEGER"}]})
+    client.post(f"/{db}/accounts", json={"data": [{"owner": "ann", "balance": 100}, {"owner": "bob", "balance": 50}]})
+    return db
+
+
+def run(client, db, operations, **options):
+    return client.post("/batch", json={"db_name": db, "operations": operations, **options})
+
+
+def balances(client, db):
+    return {row["owner"]: row["balance"] for row in client.get(f"/{db}/accounts", query_string={"limit": 100}).json["data"]}
+
+
+def test_operations_commit_together(client, table):
+    response = run(client, table, [
+        {"op": "update", "table": "accounts", "id": 1, "data": {"balance": 70}},
+        {"op": "update", "table": "accounts", "where": {"owner": "bob"}, "update": {"balance": 80}},
+        {"op": "insert", "table": "accounts", "data": [{"owner": "cid", "balance": 5}]},
+        {"op": "delete", "table": "accounts", "where": {"owner": "cid"}},
+    ])
+
+    assert response.status_code == 200, response.json
+    assert [result["status"] for result in response.json["data"]] == ["SUCCESS"] * 4
+    assert balances(client, table) == {"ann": 70, "bob": 80}
+
+
+def test_failing_operation_rolls_back_the_batch(client, table):
+    response = run(client, table, [
+        {"op": "update", "table": "accounts", "id": 1, "data": {"balance": 0}},
+        {"op": "insert", "table": "accounts", "data": {"owner": "bob", "balance": 1}},
+        {"op": "update", "table": "accounts", "id": 2, "data": {"balance": 0}},
+    ])
+
+    assert response.status_code == 400
+    assert "operation 1 failed" in response.json["message"]
+    assert [result["index"] for result in response.json["data"]] == [0, 1]
+    assert balances(client, table) == {"ann": 100, "bob": 50}
+
+
+def test_missing_record_fails_the_batch(client, table):
+    response = run(client, table, [
+        {"op": "insert", "table": "accounts", "data": {"owner": "cid"}},
+        {"op": "delete", "table": "accounts", "id": 99},
+    ])
+
+    assert response.status_code == 400
+    assert "cid" not in balances(client, table)
+
+
+def test_non_atomic_batch_commits_the_operations_that_succeed(client, table):
+    response = run(client, table, [
+        {"op": "insert", "table": "accounts", "data": {"owner": "ann"}},
+        {"op": "insert", "table": "accounts", "data": {"owner": "cid", "balance": 1}},
+    ], atomic=False)
+
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json["data"]] == ["ERROR", "SUCCESS"]
+    assert balances(client, table) == {"ann": 100, "bob": 50, "cid": 1}
+
+
+def test_insert_creates_table_and_columns(client, db):
+    response = run(client, db, [{"op": "insert", "table": "events", "data": [{"kind": "a"}, {"kind": "b", "extra": "x"}]}])
+
+    assert response.status_code == 200, response.json
+    assert [row["kind"] for row in client.get(f"/{db}/events").json["data"]] == ["a", "b"]
+
+
+@pytest.mark.parametrize("operations", [
+    [],
+    [{"op": "upsert", "table": "accounts"}],
+    [{"op": "insert", "table": "accounts"}],
+    [{"op": "delete", "table": "accounts"}],
+    [{"op": "insert", "data": {"owner": "x"}}],
+])
+def test_invalid_batches_are_rejected_before_running(client, table, operations):
+    assert run(client, table, operations).status_code == 400
+    assert balances(client, table) == {"ann": 100, "bob": 50}
+
+
+def test_partitioned_tables_cannot_join_a_batch(client, table):
+    client.post(f"/db/{table}/sharded", json={"columns": [{"name": "x", "type": "TEXT"}], "partitions": 2})
+    assert run(client, table, [{"op": "insert", "table": "sharded", "data": {"x": "1"}}]).status_code == 400
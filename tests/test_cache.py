@@ -0,0 +1,56 @@
+import os
+import sqlite3
+from schema.connection import DB_FOLDER
+
+
+def external_write(db, sql):
+    conn = sqlite3.connect(os.path.join(DB_FOLDER, f"{db}.db"))
+    try:
+        conn.execute(sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# Tables created on first insert store their columns as TEXT
+def seed(client, db):
+    assert client.post(f"/{db}/first", json={"data": {"x": 1}}).status_code == 200
+    assert client.post(f"/{db}/second", json={"data": {"y": 1}}).status_code == 200
+
+
+def test_write_from_another_connection_changes_etag(client, db):
+    seed(client, db)
+    before = client.get(f"/{db}/second")
+    etag = before.headers["ETag"]
+    assert client.get(f"/{db}/second", headers={"If-None-Match": etag}).status_code == 304
+
+    external_write(db, "UPDATE second SET y = 2")
+
+    after = client.get(f"/{db}/second", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+    assert after.json["data"][0]["y"] == "2"
+
+
+def test_local_write_does_not_absorb_another_connections_write(client, db):
+    seed(client, db)
+    etag = client.get(f"/{db}/second").headers["ETag"]
+
+    external_write(db, "UPDATE second SET y = 2")
+    # A write through the API to another table of the same database follows right away
+    assert client.post(f"/{db}/first", json={"data": {"x": 2}}).status_code == 200
+
+    after = client.get(f"/{db}/second")
+    assert after.headers["ETag"] != etag
+    assert after.json["data"][0]["y"] == "2"
+    assert client.get(f"/{db}/second/1").json["data"]["y"] == "2"
+
+
+def test_api_write_invalidates_only_its_table(client, db):
+    seed(client, db)
+    first, second = client.get(f"/{db}/first").headers["ETag"], client.get(f"/{db}/second").headers["ETag"]
+
+    assert client.put(f"/{db}/first/1", json={"x": 5}).status_code == 200
+
+    assert client.get(f"/{db}/first", headers={"If-None-Match": first}).status_code == 200
+    assert client.get(f"/{db}/second", headers={"If-None-Match": second}).status_code == 304
@@ -0,0 +1,63 @@
+import pytest
+
+
+@pytest.fixture
+def table(client, db):
+    assert client.post(f"/{db}/items", json={"data": [{"kind": "a" if i % 3 else "b"} for i in range(10)]}).status_code == 200
+    return db
+
+
+def listing(client, db, **params):
+    response = client.get(f"/{db}/items", query_string={"with_count": "true", **params})
+    assert response.status_code == 200, response.json
+    return response.json
+
+
+def test_total_and_page_metadata(client, table):
+    result = listing(client, table, limit=4, start=4)
+    assert (result["total"], result["has_more"]) == (10, True)
+    assert result["page"] == {"limit": 4, "start": 4, "returned": 4}
+
+    last = listing(client, table, limit=4, start=8)
+    assert (last["has_more"], last["page"]["returned"]) == (False, 2)
+
+
+def test_filtered_total(client, table):
+    result = listing(client, table, kind="b", limit=2)
+    assert (result["total"], result["has_more"]) == (4, True)
+
+
+def test_total_follows_api_writes(client, table):
+    client.post(f"/{table}/items", json={"data": [{"kind": "b"}, {"kind": "b"}]})
+    client.delete(f"/{table}/items/1")
+    client.put(f"/{table}/items/2", json={"kind": "b"})
+
+    assert listing(client, table)["total"] == 11
+    assert listing(client, table, kind="b")["total"] == 6
+
+    client.post(f"/db/{table}/items/truncate", json={})
+    assert listing(client, table)["total"] == 0
+
+
+def test_raw_sql_write_resets_counts(client, table):
+    client.post("/sql", json={"db_name": table, "query": "DELETE FROM items WHERE kind = 'a'"})
+    assert listing(client, table)["total"] == 4
+
+
+def test_cursor_pages_report_has_more(client, table):
+    result = listing(client, table, limit=6, cursor="")
+    assert (result["total"], result["has_more"], result["page"]) == (10, True, {"limit": 6, "returned": 6})
+
+
+@pytest.mark.parametrize("name", ["_row_counts", "_partitions", "_TIME_PARTITIONS", "_time_partition_ranges"])
+def test_internal_tables_are_reserved(client, table, name):
+    listing(client, table)
+
+    assert client.post(f"/db/{table}/{name}", json={"columns": [{"name": "x", "type": "TEXT"}]}).status_code == 400
+    assert client.post(f"/{table}/{name}", json={"data": {"x": 1}}).status_code == 400
+    assert client.get(f"/{table}/{name}").status_code == 400
+    assert client.post(f"/db/{table}/items/rename", json={"new_table_name": name}).status_code >= 400
+    batch = client.post("/batch", json={"db_name": table, "operations": [{"op": "insert", "table": name, "data": {"x": 1}}]})
+    assert batch.status_code == 400
+    assert client.get(f"/db/{table}").json["tables"] == ["items"]
+    assert listing(client, table)["total"] == 10
@@ -0,0 +1,59 @@
+import pytest
+
+COLUMNS = [{"name": "Score", "type": "INTEGER"}, {"name": "label", "type": "TEXT"}]
+# Every third score is NULL, and the others repeat, so pages end on NULLs and on ties
+ROWS = [{"Score": None if i % 3 == 0 else i % 4, "label": f"row{i}"} for i in range(20)]
+
+
+def make_table(client, db, partitions=None):
+    payload = {"columns": COLUMNS}
+    if partitions:
+        payload["partitions"] = partitions
+    assert client.post(f"/db/{db}/scores", json=payload).status_code < 400
+    assert client.post(f"/{db}/scores", json={"data": [dict(row) for row in ROWS]}).status_code == 200
+
+
+def page_through(client, db, **params):
+    rows, cursor = [], ""
+    while cursor is not None:
+        response = client.get(f"/{db}/scores", query_string={**params, "cursor": cursor, "limit": 3})
+        assert response.status_code == 200, response.json
+        rows += response.json["data"]
+        cursor = response.json["next_cursor"]
+    return rows
+
+
+@pytest.mark.parametrize("partitions", [None, 3])
+@pytest.mark.parametrize("order", ["ASC", "DESC"])
+@pytest.mark.parametrize("order_by", ["Score", "score", "SCORE"])
+def test_cursor_pages_cover_nullable_column(client, db, partitions, order, order_by):
+    make_table(client, db, partitions)
+    expected = client.get(f"/{db}/scores", query_string={"orderby": order_by, "order": order, "limit": 100}).json["data"]
+    assert len(expected) == len(ROWS)
+
+    assert page_through(client, db, orderby=order_by, order=order) == expected
+
+
+def test_nulls_sort_first_ascending_and_last_descending(client, db):
+    make_table(client, db)
+    ascending = [row["Score"] for row in page_through(client, db, orderby="score")]
+    descending = [row["Score"] for row in page_through(client, db, orderby="score", order="DESC")]
+
+    nulls = sum(1 for row in ROWS if row["Score"] is None)
+    assert ascending[:nulls] == [None] * nulls
+    assert descending[-nulls:] == [None] * nulls
+
+
+def test_cursor_carries_value_of_case_mismatched_column(client, db):
+    make_table(client, db)
+    first = client.get(f"/{db}/scores", query_string={"orderby": "SCORE", "order": "DESC", "cursor": "", "limit": 2}).json
+    # The largest scores come first, so the cursor must hold a real value, not null
+    following = client.get(f"/{db}/scores", query_string={"orderby": "SCORE", "order": "DESC", "cursor": first["next_cursor"], "limit": 2}).json
+
+    assert [row["Score"] for row in first["data"] + following["data"]] == [3, 3, 3, 2]
+
+
+def test_unknown_orderby_is_rejected(client, db):
+    make_table(client, db)
+    response = client.get(f"/{db}/scores", query_string={"orderby": "missing", "cursor": ""})
+    assert response.status_code == 400
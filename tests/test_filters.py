@@ -0,0 +1,70 @@
+import pytest
+
+ROWS = [
+    {"name": "ann", "age": 10, "city": "Oslo"},
+    {"name": "bob", "age": 40, "city": "Rome"},
+    {"name": "cid", "age": 35, "city": None},
+    {"name": "dee", "age": 9, "city": "Oslo"},
+]
+
+
+# Columns are created on insert, so every one of them is TEXT
+@pytest.fixture
+def table(client, db):
+    assert client.post(f"/{db}/people", json={"data": [dict(row) for row in ROWS]}).status_code == 200
+    return db
+
+
+def names(client, db, query):
+    response = client.get(f"/{db}/people?{query}&orderby=name")
+    assert response.status_code == 200, response.json
+    return [row["name"] for row in response.json["data"]]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("age__gt=5", ["ann", "bob", "cid", "dee"]),
+    ("age__gt=9", ["ann", "bob", "cid"]),
+    ("age__gte=35&age__lt=40.5", ["bob", "cid"]),
+    ("age__lte=10", ["ann", "dee"]),
+    ("name__gt=bob", ["cid", "dee"]),
+])
+def test_range_filters_on_auto_created_columns(client, table, query, expected):
+    assert names(client, table, query) == expected
+
+
+def test_range_filter_on_integer_column(client, db):
+    client.post(f"/db/{db}/people", json={"columns": [{"name": "name", "type": "TEXT"}, {"name": "age", "type": "INTEGER"}]})
+    client.post(f"/{db}/people", json={"data": [dict(name=row["name"], age=row["age"]) for row in ROWS]})
+
+    assert names(client, db, "age__gt=9") == ["ann", "bob", "cid"]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("city=Oslo", ["ann", "dee"]),
+    ("CITY__eq=Oslo", ["ann", "dee"]),
+    ("city__ne=Oslo", ["bob"]),
+    ("name__like=%e%", ["dee"]),
+    ("name__notlike=%e%", ["ann", "bob", "cid"]),
+    ("name__in=ann,cid", ["ann", "cid"]),
+    ("name__notin=[ann,cid]", ["bob", "dee"]),
+    ("name_IN=[bob]", ["bob"]),
+    ("city__isnull=true", ["cid"]),
+    ("city__isnull=false&age__lt=20", ["ann", "dee"]),
+])
+def test_filter_operators(client, table, query, expected):
+    assert names(client, table, query) == expected
+
+
+@pytest.mark.parametrize("query", ["age__near=5", "missing=1", "city__isnull=maybe"])
+def test_invalid_filters_are_rejected(client, table, query):
+    assert client.get(f"/{table}/people?{query}").status_code == 400
+
+
+def test_filter_shapes_are_compiled_once(client, table):
+    from db_operations.utils import _compile_where
+    names(client, table, "age__gt=1")
+    before = _compile_where.cache_info()
+    names(client, table, "age__gt=2")
+
+    assert _compile_where.cache_info().hits == before.hits + 1
+    assert _compile_where.cache_info().misses == before.misses
@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.fixture
+def table(client, db):
+    columns = [{"name": "city", "type": "TEXT"}, {"name": "age", "type": "INTEGER"}, {"name": "email", "type": "TEXT UNIQUE"}]
+    assert client.post(f"/db/{db}/people", json={"columns": columns}).status_code < 400
+    rows = [{"city": f"c{i % 4}", "age": i, "email": f"p{i}@example.com"} for i in range(20)]
+    assert client.post(f"/{db}/people", json={"data": rows}).status_code == 200
+    return db
+
+
+def test_create_list_and_drop_index(client, table):
+    created = client.post(f"/db/{table}/people/indexes", json={"columns": ["city", "age"]})
+    assert created.status_code == 200, created.json
+    name = created.json["name"]
+    assert name == "idx_people_city_age"
+
+    indexes = {index["name"]: index for index in client.get(f"/db/{table}/people/indexes").json["indexes"]}
+    assert indexes[name]["columns"] == ["city", "age"] and not indexes[name]["unique"]
+
+    assert client.delete(f"/db/{table}/people/indexes/{name}").status_code == 200
+    assert name not in {index["name"] for index in client.get(f"/db/{table}/people/indexes").json["indexes"]}
+
+
+def test_constraint_indexes_cannot_be_dropped(client, table):
+    unique = [index["name"] for index in client.get(f"/db/{table}/people/indexes").json["indexes"] if index["origin"] == "u"]
+    assert client.delete(f"/db/{table}/people/indexes/{unique[0]}").status_code == 400
+    assert client.delete(f"/db/{table}/people/indexes/missing").status_code == 404
+
+
+def test_advisor_recommends_index_for_repeated_slow_shape(client, table, monkeypatch):
+    monkeypatch.setattr("schema.advisor.INDEX_ADVISOR_MIN_QUERIES", 3)
+    monkeypatch.setattr("schema.advisor.INDEX_ADVISOR_MIN_MS", 0)
+    # Different pages, so none of them is answered from the response cache
+    for start in range(3):
+        client.get(f"/{table}/people", query_string={"city": "c1", "orderby": "age", "start": start})
+
+    recommended = client.get(f"/db/{table}/people/indexes/recommendations").json["recommendations"]
+    assert [item["columns"] for item in recommended] == [["city", "age"]]
+    assert recommended[0]["queries"] == 3
+
+    client.post(f"/db/{table}/people/indexes", json={"columns": recommended[0]["columns"]})
+    assert client.get(f"/db/{table}/people/indexes/recommendations").json["recommendations"] == []
+
+
+def test_sqlite_tables_are_hidden_and_rejected(client, table):
+    # Creating an index runs ANALYZE, which adds sqlite_stat1
+    client.post(f"/db/{table}/people/indexes", json={"columns": ["city"]})
+
+    assert client.get(f"/db/{table}").json["tables"] == ["people"]
+    assert client.get(f"/{table}/sqlite_stat1").status_code == 400
+    assert client.get(f"/db/{table}/sqlite_sequence").status_code == 400
+    assert client.delete(f"/db/{table}/SQLITE_stat1", json={}).status_code == 400
@@ -0,0 +1,40 @@
+import json
+import pytest
+
+LINES = [
+    {"code": "a", "note": "first"},
+    {"code": "b", "note": {"nested": 1}},
+    {"code": "a", "note": "duplicate"},
+    "not an object",
+    {"code": "c", "note": [1, 2]},
+    {"code": "d", "note": 2 ** 70},
+    {"code": "e", "note": "last"},
+]
+
+
+def ndjson(lines):
+    return "\n".join(json.dumps(line) for line in lines) + "\n"
+
+
+@pytest.mark.parametrize("partitions", [None, 2])
+def test_ingest_reports_duplicate_and_unbindable_rows(client, db, partitions):
+    payload = {"columns": [{"name": "code", "type": "TEXT UNIQUE"}, {"name": "note", "type": "TEXT"}]}
+    if partitions:
+        payload["partitions"] = partitions
+    assert client.post(f"/db/{db}/items", json=payload).status_code < 400
+
+    response = client.post(f"/{db}/items/ingest", data=ndjson(LINES), content_type="application/x-ndjson")
+
+    assert response.status_code == 200, response.json
+    summary = response.json["data"]
+    assert (summary["accepted"], summary["rejected"]) == (2, 5)
+    assert sorted(error["line"] for error in summary["errors"]) == [2, 3, 4, 5, 6]
+    stored = client.get(f"/{db}/items", query_string={"orderby": "code"}).json["data"]
+    assert [(row["code"], row["note"]) for row in stored] == [("a", "first"), ("e", "last")]
+
+
+def test_ingest_of_valid_rows_commits_one_batch(client, db):
+    lines = [{"code": str(i)} for i in range(10)]
+    response = client.post(f"/{db}/items/ingest", data=ndjson(lines), content_type="application/x-ndjson")
+
+    assert response.json["data"] == {"accepted": 10, "rejected": 0, "batches": 1, "errors": []}
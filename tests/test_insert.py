@@ -0,0 +1,31 @@
+def test_mixed_shapes_keep_payload_order(client, db):
+    payload = [{"a": 5}, {"a": 6, "new": 1}, {"a": 7}, {"a": 8, "new": 2}, {"a": 9, "new": 3}]
+    response = client.post(f"/{db}/items", json={"data": payload})
+
+    assert response.status_code == 200, response.json
+    result = response.json["data"]
+    assert (result["inserted"], result["first_rowid"], result["last_rowid"]) == (5, 1, 5)
+    rows = client.get(f"/{db}/items").json["data"]
+    assert [(row["id"], row["a"]) for row in rows] == [(1, "5"), (2, "6"), (3, "7"), (4, "8"), (5, "9")]
+
+
+def test_rowid_range_covers_only_this_payload(client, db):
+    client.post(f"/{db}/items", json={"data": [{"a": 1}, {"a": 2}]})
+    result = client.post(f"/{db}/items", json={"data": [{"a": 3}, {"a": 4, "b": 1}, {"a": 5}]}).json["data"]
+
+    assert (result["first_rowid"], result["last_rowid"]) == (3, 5)
+
+
+def test_failing_row_rolls_back_whole_payload(client, db):
+    client.post(f"/db/{db}/items", json={"columns": [{"name": "k", "type": "TEXT UNIQUE"}]})
+    response = client.post(f"/{db}/items", json={"data": [{"k": "a"}, {"k": "b"}, {"k": "a"}]})
+
+    assert response.status_code == 400
+    assert client.get(f"/{db}/items").json["data"] == []
+
+
+def test_single_record_is_inserted(client, db):
+    response = client.post(f"/{db}/items", json={"data": {"a": 1}})
+
+    assert response.json["data"]["inserted"] == 1
+    assert client.get(f"/{db}/items/1").json["data"]["a"] == "1"
@@ -0,0 +1,40 @@
+from schema.partitions import partition_spec
+
+COLUMNS = [{"name": "n", "type": "INTEGER"}, {"name": "created_at", "type": "TEXT"}]
+
+
+def create(client, db, table_name, **options):
+    response = client.post(f"/db/{db}/{table_name}", json={"columns": COLUMNS, **options})
+    assert response.status_code < 400, response.json
+
+
+def test_rows_land_in_partition_of_their_id(client, db):
+    create(client, db, "hashed", partitions=3)
+    inserted = client.post(f"/{db}/hashed", json={"data": [{"n": i} for i in range(10)]}).json["data"]
+    assert inserted["inserted"] == 10
+
+    rows = client.get(f"/{db}/hashed", query_string={"limit": 100}).json["data"]
+    spec = partition_spec(db, "hashed")
+    details = client.get(f"/db/{db}/hashed/partitions").json["partitions"]
+    assert [detail["rows"] for detail in details] == [sum(1 for row in rows if row["id"] % 3 == index) for index in range(3)]
+    for row in rows:
+        assert spec.index_for_id(row["id"]) == row["id"] % 3
+        assert client.get(f"/{db}/hashed/{row['id']}").json["data"] == row
+
+
+def test_merged_pages_follow_orderby_across_partitions(client, db):
+    create(client, db, "hashed", partitions=3)
+    client.post(f"/{db}/hashed", json={"data": [{"n": (i * 7) % 5} for i in range(15)]})
+    create(client, db, "plain")
+    client.post(f"/{db}/plain", json={"data": [{"n": (i * 7) % 5} for i in range(15)]})
+
+    for order in ("ASC", "DESC"):
+        query = {"orderby": "n", "order": order, "limit": 100}
+        rows = client.get(f"/{db}/hashed", query_string=query).json["data"]
+        keys = [(row["n"], row["id"]) for row in rows]
+        assert keys == sorted(keys, reverse=order == "DESC")
+        plain = client.get(f"/{db}/plain", query_string=query).json["data"]
+        assert [row["n"] for row in rows] == [row["n"] for row in plain]
+
+    page = client.get(f"/{db}/hashed", query_string={"orderby": "n", "start": 4, "limit": 5}).json["data"]
+    assert page == client.get(f"/{db}/hashed", query_string={"orderby": "n", "limit": 100}).json["data"][4:9]
@@ -0,0 +1,47 @@
+import pytest
+
+
+@pytest.fixture
+def table(client, db):
+    rows = [{"name": f"n{i}", "email": f"e{i}", "bio": "x" * 50} for i in range(5)]
+    assert client.post(f"/{db}/people", json={"data": rows}).status_code == 200
+    return db
+
+
+def test_fields_selects_columns(client, table):
+    rows = client.get(f"/{table}/people", query_string={"fields": "name,EMAIL"}).json["data"]
+    assert rows[0] == {"name": "n0", "email": "e0"}
+
+
+def test_exclude_drops_columns(client, table):
+    rows = client.get(f"/{table}/people", query_string={"exclude": "bio"}).json["data"]
+    assert set(rows[0]) == {"id", "name", "email"}
+
+
+def test_fields_and_exclude_combine(client, table):
+    rows = client.get(f"/{table}/people", query_string={"fields": "id,name,bio", "exclude": "bio"}).json["data"]
+    assert rows[0] == {"id": 1, "name": "n0"}
+
+
+def test_cursor_pages_without_id_or_orderby_in_fields(client, table):
+    first = client.get(f"/{table}/people", query_string={"fields": "email", "orderby": "name", "cursor": "", "limit": 3}).json
+    following = client.get(f"/{table}/people", query_string={"fields": "email", "orderby": "name", "cursor": first["next_cursor"], "limit": 3}).json
+
+    assert [row for row in first["data"] + following["data"]] == [{"email": f"e{i}"} for i in range(5)]
+
+
+def test_record_by_id_is_projected(client, table):
+    assert client.get(f"/{table}/people/2", query_string={"fields": "name"}).json["data"] == {"name": "n1"}
+
+
+def test_projection_applies_to_partitioned_tables(client, db):
+    client.post(f"/db/{db}/people", json={"columns": [{"name": "name", "type": "TEXT"}, {"name": "email", "type": "TEXT"}], "partitions": 2})
+    client.post(f"/{db}/people", json={"data": [{"name": f"n{i}", "email": f"e{i}"} for i in range(4)]})
+
+    rows = client.get(f"/{db}/people", query_string={"fields": "email", "orderby": "name"}).json["data"]
+    assert rows == [{"email": f"e{i}"} for i in range(4)]
+
+
+@pytest.mark.parametrize("params", [{"fields": "missing"}, {"exclude": "id,name,email,bio"}])
+def test_invalid_projection_is_rejected(client, table, params):
+    assert client.get(f"/{table}/people", query_string=params).status_code == 400
@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import threading
+import pytest
+from schema.connection import DB_FOLDER, BUSY_RETRIES, get_connection, close_connections
+
+
+def total(metric):
+    return sum(value for _, _, value in metric.samples())
+
+
+def test_factory_builds_independent_apps(app):
+    from main import create_app
+    other = create_app()
+
+    assert other is not app
+    assert {rule.rule for rule in other.url_map.iter_rules()} == {rule.rule for rule in app.url_map.iter_rules()}
+
+
+def test_locked_write_is_retried_until_the_lock_is_released(client, db):
+    client.post(f"/{db}/items", json={"data": {"x": 1}})
+    # A short busy_timeout makes the write give up quickly and go through the retries
+    assert client.put(f"/db/settings/{db}", json={"busy_timeout": 10}).status_code == 200
+    close_connections(db)
+
+    blocker = sqlite3.connect(os.path.join(DB_FOLDER, f"{db}.db"), check_same_thread=False)
+    blocker.execute("BEGIN IMMEDIATE")
+    release = threading.Timer(0.2, blocker.rollback)
+    retries = total(BUSY_RETRIES)
+    release.start()
+    try:
+        response = client.post(f"/{db}/items", json={"data": {"x": 2}})
+    finally:
+        release.join()
+        blocker.close()
+
+    assert response.status_code == 200, response.json
+    assert total(BUSY_RETRIES) > retries
+    assert len(client.get(f"/{db}/items").json["data"]) == 2
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_process_opens_its_own_connections(client, db):
+    client.post(f"/{db}/items", json={"data": {"x": 1}})
+    with get_connection(db) as conn:
+        parent_connection = id(conn)
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            with get_connection(db) as conn:
+                fresh = id(conn) != parent_connection
+                conn.execute("INSERT INTO items (x) VALUES ('2')")
+                conn.commit()
+            os._exit(0 if fresh else 1)
+        except BaseException:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.WEXITSTATUS(status) == 0
+    with get_connection(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 2
@@ -0,0 +1,30 @@
+def test_settings_cannot_be_a_database_name(client):
+    response = client.post("/db/", json={"name": "settings"})
+
+    assert response.status_code == 400
+    assert "profile" in client.get("/db/settings").json
+
+
+def test_database_override_applies_to_new_connections(client, db):
+    response = client.put(f"/db/settings/{db}", json={"cache_size": -4096, "synchronous": "FULL"})
+    assert response.status_code == 200, response.json
+
+    settings = client.get(f"/db/settings/{db}").json
+    assert settings["overrides"] == {"cache_size": -4096, "synchronous": "FULL"}
+    assert settings["profile"]["cache_size"] == -4096
+    assert settings["in_effect"]["cache_size"] == -4096
+
+
+def test_null_override_falls_back_to_global_profile(client, db):
+    client.put(f"/db/settings/{db}", json={"cache_size": -4096})
+    client.put(f"/db/settings/{db}", json={"cache_size": None})
+
+    settings = client.get(f"/db/settings/{db}").json
+    assert "cache_size" not in settings["overrides"]
+    assert settings["profile"]["cache_size"] == client.get("/db/settings").json["profile"]["cache_size"]
+
+
+def test_invalid_setting_is_rejected(client, db):
+    assert client.put(f"/db/settings/{db}", json={"journal_mode": "SIDEWAYS"}).status_code == 400
+    assert client.put(f"/db/settings/{db}", json={"page_size": 4096}).status_code == 400
+    assert client.get("/db/settings/missing_db").status_code == 404
@@ -0,0 +1,62 @@
+import pytest
+
+COLUMNS = [{"name": "n", "type": "INTEGER"}, {"name": "created_at", "type": "TEXT"}]
+
+
+def create(client, db, table_name, **options):
+    response = client.post(f"/db/{db}/{table_name}", json={"columns": COLUMNS, **options})
+    assert response.status_code < 400, response.json
+
+
+def test_time_partitions_route_by_month_and_merge_in_time_order(client, db):
+    create(client, db, "events", partition_key="created_at", partition_interval="month")
+    timestamps = ["2026-08-31 23:59:59", "2026-09-01T00:00:00", "2026-07-15 12:00:00", "2026-09-20 08:30:00"]
+    inserted = client.post(f"/{db}/events", json={"data": [{"n": i, "created_at": value} for i, value in enumerate(timestamps)]}).json["data"]
+
+    assert {part["partition"]: part["inserted"] for part in inserted["partitions"]} == {"2026-07": 1, "2026-08": 1, "2026-09": 2}
+    rows = client.get(f"/{db}/events", query_string={"orderby": "created_at", "order": "DESC"}).json["data"]
+    assert [row["n"] for row in rows] == [3, 1, 0, 2]
+    september = client.get(f"/{db}/events", query_string={"created_at__gte": "2026-09-01", "orderby": "n"}).json["data"]
+    assert [row["n"] for row in september] == [1, 3]
+
+
+def test_timestamps_are_stored_as_utc_in_one_form(client, db):
+    create(client, db, "events", partition_key="created_at", partition_interval="month")
+    written = ["2024-01-05T10:00:00", "2024-01-05T09:30:00Z", "2024-01-05 11:00:00-05:00", 1704448800, "2024-02-01T00:30:00+02:00"]
+    inserted = client.post(f"/{db}/events", json={"data": [{"n": i, "created_at": value} for i, value in enumerate(written)]}).json["data"]
+
+    # An offset moves a row across the month boundary to its UTC month
+    assert {part["partition"]: part["inserted"] for part in inserted["partitions"]} == {"2024-01": 5}
+    rows = client.get(f"/{db}/events", query_string={"orderby": "created_at"}).json["data"]
+    assert [(row["n"], row["created_at"]) for row in rows] == [
+        (1, "2024-01-05 09:30:00"),
+        (0, "2024-01-05 10:00:00"),
+        (3, "2024-01-05 10:00:00"),
+        (2, "2024-01-05 16:00:00"),
+        (4, "2024-01-31 22:30:00"),
+    ]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ({"created_at__lt": "2024-01-05T10:00:00"}, [1]),
+    ({"created_at__gte": "2024-01-05T10:00:00Z"}, [0, 2, 3]),
+    ({"created_at__gt": "2024-01-05T12:00:00+02:00"}, [2, 3]),
+    ({"created_at__lte": 1704448800}, [0, 1]),
+    ({"created_at": "2024-01-05T11:00:00+01:00"}, [0]),
+])
+def test_timestamp_filters_compare_moments(client, db, query, expected):
+    create(client, db, "events", partition_key="created_at", partition_interval="day")
+    written = ["2024-01-05T10:00:00", "2024-01-05T09:30:00Z", "2024-01-05 11:00:00-05:00", "2024-01-06T00:00:00"]
+    client.post(f"/{db}/events", json={"data": [{"n": i, "created_at": value} for i, value in enumerate(written)]})
+
+    rows = client.get(f"/{db}/events", query_string={**query, "orderby": "n"}).json["data"]
+    assert [row["n"] for row in rows] == expected
+
+
+def test_update_and_delete_by_timestamp_in_another_style(client, db):
+    create(client, db, "events", partition_key="created_at", partition_interval="month")
+    client.post(f"/{db}/events", json={"data": [{"n": 1, "created_at": "2024-01-05 10:00:00"}, {"n": 2, "created_at": "2024-01-06 10:00:00"}]})
+
+    client.put(f"/{db}/events", json={"where": {"created_at": "2024-01-06T11:00:00+01:00"}, "update": {"n": 3}})
+    client.delete(f"/{db}/events", json={"where": {"created_at": "2024-01-05T10:00:00Z"}})
+    assert [row["n"] for row in client.get(f"/{db}/events").json["data"]] == [3]
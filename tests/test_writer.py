@@ -0,0 +1,65 @@
+import threading
+import pytest
+from schema.writer import GROUP_SIZE
+
+
+@pytest.fixture
+def coordinated(monkeypatch):
+    monkeypatch.setattr("schema.writer.WRITE_COORDINATOR", True)
+    # A wide window so that concurrent writes share a transaction
+    monkeypatch.setattr("schema.writer.GROUP_COMMIT_WINDOW_MS", 50)
+
+
+def group_sizes():
+    samples = {name: value for name, _, value in GROUP_SIZE.samples() if not name.endswith("_bucket")}
+    return samples.get("dynamic_api_write_group_size_count", 0), samples.get("dynamic_api_write_group_size_sum", 0)
+
+
+def concurrently(app, requests):
+    responses = [None] * len(requests)
+
+    def send(position, path, payload):
+        responses[position] = app.test_client().post(path, json=payload)
+
+    threads = [threading.Thread(target=send, args=(position, *request)) for position, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+
+def test_concurrent_writes_are_committed_in_groups(app, client, db, coordinated):
+    client.post(f"/db/{db}/items", json={"columns": [{"name": "k", "type": "TEXT UNIQUE"}]})
+    groups, writes = group_sizes()
+
+    responses = concurrently(app, [(f"/{db}/items", {"data": {"k": str(i)}}) for i in range(16)])
+
+    assert all(response.status_code == 200 for response in responses)
+    assert sorted(int(row["k"]) for row in client.get(f"/{db}/items", query_string={"limit": 100}).json["data"]) == list(range(16))
+    new_groups, new_writes = group_sizes()
+    assert new_writes - writes == 16
+    assert new_groups - groups < 16
+
+
+def test_failing_write_does_not_undo_its_group(app, client, db, coordinated):
+    client.post(f"/db/{db}/items", json={"columns": [{"name": "k", "type": "TEXT UNIQUE"}]})
+    client.post(f"/{db}/items", json={"data": {"k": "taken"}})
+
+    requests = [(f"/{db}/items", {"data": {"k": str(i)}}) for i in range(6)] + [(f"/{db}/items", {"data": {"k": "taken"}})]
+    responses = concurrently(app, requests)
+
+    assert [response.status_code for response in responses] == [200] * 6 + [400]
+    assert len(client.get(f"/{db}/items", query_string={"limit": 100}).json["data"]) == 7
+
+
+def test_ids_follow_each_request_in_a_group(app, client, db, coordinated):
+    client.post(f"/db/{db}/items", json={"columns": [{"name": "k", "type": "TEXT"}]})
+    responses = concurrently(app, [(f"/{db}/items", {"data": [{"k": f"{i}a"}, {"k": f"{i}b"}]}) for i in range(4)])
+
+    for response in responses:
+        result = response.json["data"]
+        assert result["last_rowid"] - result["first_rowid"] == 1
+        first = client.get(f"/{db}/items/{result['first_rowid']}").json["data"]["k"]
+        second = client.get(f"/{db}/items/{result['last_rowid']}").json["data"]["k"]
+        assert (first[:-1], first[-1], second) == (second[:-1], "a", first[:-1] + "b")